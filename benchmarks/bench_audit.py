@@ -0,0 +1,288 @@
+"""
+Suite de benchmarks del auditor: tiempo de cada etapa de scripts.main.run_audit y de
+cada función de scripts.metrics, pico de RSS y comparación con una línea base.
+
+Cada escenario (tamaño, forma y cardinalidad de benchmarks.datagen) se ejecuta
+en un subproceso propio para que el pico de RSS sea sólo suyo. Las etapas son
+las de run_audit (el pipeline real del CLI, con índice de violaciones, alertas y
+archivo), leídas de su run_metrics.json; las funciones de metrics se miden por
+separado, cada una con sus propios perfiles.
+
+Uso:
+    python -m benchmarks.bench_audit                      # suite 'quick' vs baseline.json
+    python -m benchmarks.bench_audit --suite full --out /tmp/bench.json
+    python -m benchmarks.bench_audit --update-baseline    # fija la nueva línea base
+Sale con código 1 si alguna medida empeora más allá de la tolerancia.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from contextlib import contextmanager
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+SUITES = {
+    'quick': [
+        {'rows': 10_000, 'shape': 'narrow', 'cardinality': 'low'},
+        {'rows': 100_000, 'shape': 'narrow', 'cardinality': 'high'},
+        {'rows': 100_000, 'shape': 'wide', 'cardinality': 'low'},
+    ],
+    'full': [
+        {'rows': 1_000_000, 'shape': 'narrow', 'cardinality': 'low'},
+        {'rows': 1_000_000, 'shape': 'narrow', 'cardinality': 'high'},
+        {'rows': 1_000_000, 'shape': 'wide', 'cardinality': 'low'},
+        {'rows': 10_000_000, 'shape': 'narrow', 'cardinality': 'low'},
+    ],
+    # Más filas de las que caben cómodamente en memoria: modo streaming
+    'xl': [
+        {'rows': 50_000_000, 'shape': 'narrow', 'cardinality': 'low', 'chunksize': 1_000_000},
+    ],
+}
+
+
+def scenario_name(spec: dict) -> str:
+    name = f"{spec['shape']}-{spec['cardinality']}-{spec['rows']}"
+    return name + ('-stream' if spec.get('chunksize') else '')
+
+
+def peak_rss_mb() -> float:
+    """Pico de RSS del proceso (ru_maxrss: KiB en Linux, bytes en macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class Recorder:
+    """Acumula tiempo y pico de RSS tras cada medida."""
+
+    def __init__(self):
+        self.results = {}
+
+    @contextmanager
+    def measure(self, section: str, name: str):
+        t0 = time.perf_counter()
+        yield
+        self.results.setdefault(section, {})[name] = {
+            'seconds': round(time.perf_counter() - t0, 4),
+            'peak_rss_mb': peak_rss_mb()
+        }
+
+
+# --- Trabajo de un escenario (subproceso) ------------------------------------
+def _run_stages(rec: Recorder, spec: dict, data_path: str, rules_path: str, workdir: str):
+    """
+    Ejecuta scripts.main.run_audit, el mismo pipeline que el CLI, y toma de su
+    run_metrics.json el tiempo y el pico de RSS de cada etapa. Sin caché de
+    etapas (se mide el cálculo) y con su propio last_run.txt (sin filtro incremental).
+    """
+    from scripts.main import run_audit
+    from scripts.instrumentation import RunMetrics
+    from scripts.io_utils import archive_reports
+
+    outdir = os.path.join(workdir, 'reports')
+    with RunMetrics() as run:
+        run_id = run_audit(
+            data_path, rules_path, outdir, chunksize=spec.get('chunksize'), run=run,
+            state_file=os.path.join(workdir, 'state', 'last_run.txt'), stage_cache=None
+        )
+    run.write(outdir)
+    with open(os.path.join(outdir, 'run_metrics.json'), 'r', encoding='utf-8') as f:
+        metrics = json.load(f)
+    archive_reports(outdir, run_id)
+    for stage in metrics['stages']:
+        rec.results.setdefault('stages', {})[stage['stage']] = {
+            'seconds': stage['wall_s'],
+            'peak_rss_mb': stage['peak_rss_mb']
+        }
+
+
+def _run_functions(rec: Recorder, df, schema: dict, workdir: str):
+    from scripts import metrics
+
+    with rec.measure('functions', 'compute_quality_metrics'):
+        metrics.compute_quality_metrics(df, schema)
+    with rec.measure('functions', 'compute_statistical_profile'):
+        metrics.compute_statistical_profile(df)
+    with rec.measure('functions', 'compute_statistical_profile[sketch]'):
+        metrics.compute_statistical_profile(df, method='sketch')
+    with rec.measure('functions', 'validate_patterns'):
+        metrics.validate_patterns(df, schema)
+    parent = df[['id']].iloc[::2].rename(columns={'id': 'id_parent'})
+    with rec.measure('functions', 'validate_referential_integrity'):
+        metrics.validate_referential_integrity(df, parent, 'id', 'id_parent')
+    hist_dir = os.path.join(workdir, 'histograms')
+    metrics.compute_drift(df, hist_dir=hist_dir)
+    with rec.measure('functions', 'compute_drift'):
+        metrics.compute_drift(df, hist_dir=hist_dir)
+    with rec.measure('functions', 'generate_diagnostics'):
+        metrics.generate_diagnostics(df, schema, drift_report=None)
+
+
+def run_scenario(spec: dict) -> dict:
+    """Mide etapas y funciones sobre los ficheros ya generados en spec['workdir']."""
+    workdir = spec['workdir']
+    # Cada repetición parte sin informes, estado ni histogramas de la anterior
+    for name in ('reports', 'state', 'histograms'):
+        shutil.rmtree(os.path.join(workdir, name), ignore_errors=True)
+    rec = Recorder()
+    startup_rss = peak_rss_mb()
+    data_path, rules_path = os.path.join(workdir, 'data.csv'), os.path.join(workdir, 'rules.yml')
+    _run_stages(rec, spec, data_path, rules_path, workdir)
+    if not spec.get('chunksize'):
+        # Fuera de la medida de etapas: los datos para medir cada función
+        from scripts.load import load_data
+        from scripts.rules import infer_schema
+        _run_functions(rec, load_data(data_path), infer_schema(rules_path), workdir)
+    rec.results['peak_rss_mb'] = peak_rss_mb()
+    rec.results['startup_rss_mb'] = startup_rss
+    return rec.results
+
+
+# --- Orquestación y comparación ----------------------------------------------
+def _best_of(runs: list) -> dict:
+    """Mínimo de cada medida entre repeticiones (lo menos afectado por el ruido)."""
+    best = runs[0]
+    for run in runs[1:]:
+        for section in ('stages', 'functions'):
+            for name, m in run.get(section, {}).items():
+                b = best[section][name]
+                b['seconds'] = min(b['seconds'], m['seconds'])
+                b['peak_rss_mb'] = min(b['peak_rss_mb'], m['peak_rss_mb'])
+        best['peak_rss_mb'] = min(best['peak_rss_mb'], run['peak_rss_mb'])
+        best['startup_rss_mb'] = min(best['startup_rss_mb'], run['startup_rss_mb'])
+    return best
+
+
+def run_suite(specs: list, repeat: int = 3) -> dict:
+    """
+    Los datos se generan en este proceso (fuera de la medida) y cada escenario se
+    mide `repeat` veces, cada una en un subproceso limpio.
+    """
+    from benchmarks.datagen import write_dataset, write_config
+
+    results = {}
+    for spec in specs:
+        name = scenario_name(spec)
+        print(f"▶ {name}", flush=True)
+        workdir = tempfile.mkdtemp(prefix='dq_bench_')
+        try:
+            write_dataset(os.path.join(workdir, 'data.csv'), spec['rows'], shape=spec['shape'],
+                          cardinality=spec['cardinality'], seed=spec.get('seed', 0))
+            write_config(os.path.join(workdir, 'rules.yml'), spec['shape'])
+            runs = []
+            for _ in range(repeat):
+                out = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.bench_audit', '--scenario',
+                     json.dumps({**spec, 'workdir': workdir})],
+                    check=True, capture_output=True, text=True
+                ).stdout
+                runs.append(json.loads(out.strip().splitlines()[-1]))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        results[name] = _best_of(runs)
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.25,
+            min_seconds: float = 0.05, min_rss_mb: float = 32.0) -> list:
+    """
+    Regresiones: medidas más de `tolerance` (relativo) peores que la línea base
+    y por encima de un mínimo absoluto (ruido de temporización/asignador).
+    """
+    regressions = []
+    for scenario, res in current.items():
+        base = baseline.get(scenario)
+        if not base:
+            continue
+        for section in ('stages', 'functions'):
+            for name, m in res.get(section, {}).items():
+                b = base.get(section, {}).get(name)
+                if b is None:
+                    continue
+                delta = m['seconds'] - b['seconds']
+                if delta > min_seconds and m['seconds'] > b['seconds'] * (1 + tolerance):
+                    regressions.append(f"{scenario} {section}.{name}: {b['seconds']}s -> {m['seconds']}s")
+        delta = res['peak_rss_mb'] - base['peak_rss_mb']
+        if delta > min_rss_mb and res['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f"{scenario} peak_rss_mb: {base['peak_rss_mb']} -> {res['peak_rss_mb']}")
+    return regressions
+
+
+def _print_table(results: dict) -> None:
+    for scenario, res in results.items():
+        print(f"\n== {scenario} (pico RSS {res['peak_rss_mb']} MB) ==")
+        for section in ('stages', 'functions'):
+            for name, m in res.get(section, {}).items():
+                print(f"  {section[:-1]:<9} {name:<38} {m['seconds']:9.3f}s  {m['peak_rss_mb']:9.1f} MB")
+
+
+def _environment() -> dict:
+    import numpy
+    import pandas
+    return {
+        'python': platform.python_version(),
+        'pandas': pandas.__version__,
+        'numpy': numpy.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count()
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--suite', choices=sorted(SUITES), default='quick')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--out', default=None, help='Guarda los resultados en este JSON')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones por escenario (se toma el mínimo)')
+    parser.add_argument('--scenario', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.scenario:
+        # Subproceso: un único escenario, resultado en la última línea de stdout
+        print(json.dumps(run_scenario(json.loads(args.scenario))))
+        return 0
+
+    results = run_suite(SUITES[args.suite], args.repeat)
+    _print_table(results)
+    report = {'environment': _environment(), 'suite': args.suite, 'scenarios': results}
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        stored.setdefault('scenarios', {}).update(results)
+        stored['environment'] = report['environment']
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(stored, f, indent=2)
+        print(f"\nLínea base actualizada: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nSin línea base: ejecutar con --update-baseline para crearla")
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline.get('scenarios', {}), tolerance=args.tolerance)
+    if regressions:
+        print("\n❌ Regresiones respecto a la línea base:")
+        for r in regressions:
+            print(f"  - {r}")
+        return 1
+    print("\n✅ Sin regresiones respecto a la línea base")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
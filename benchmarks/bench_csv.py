@@ -0,0 +1,75 @@
+"""
+Benchmark de la ingesta de CSV: motor pandas (pd.read_csv) frente a pyarrow
+(pyarrow.csv por bloques en varios hilos).
+
+Genera el CSV con benchmarks.datagen, lo carga con load_data con cada motor
+(carga completa y streaming por chunks) y verifica que ambos devuelven las
+mismas columnas, dtypes, nulos y valores (los float, salvo el último bit:
+el parser por defecto de pandas no siempre redondea como float()).
+
+Uso:
+    python -m benchmarks.bench_csv                  # 1M filas
+    python -m benchmarks.bench_csv --rows 100000 5000000 --chunksize 250000
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datagen import write_config, write_dataset
+from scripts.load import load_data, CSV_ENGINES
+from scripts.rules import infer_schema
+
+
+def _timed(fn, repeat: int) -> tuple:
+    """(mejor tiempo, resultado de la última repetición)."""
+    best, out = float('inf'), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def check_same(a: pd.DataFrame, b: pd.DataFrame) -> None:
+    assert list(a.columns) == list(b.columns), (list(a.columns), list(b.columns))
+    for col in a.columns:
+        assert a[col].dtype == b[col].dtype, f"{col}: {a[col].dtype} != {b[col].dtype}"
+        assert a[col].isna().equals(b[col].isna()), f"{col}: nulos distintos"
+        if a[col].dtype.kind == 'f':
+            assert np.allclose(a[col], b[col], rtol=1e-15, atol=0, equal_nan=True), f"{col}: valores distintos"
+        else:
+            assert a[col].equals(b[col]), f"{col}: valores distintos"
+
+
+def run(n_rows: int, chunksize: int, repeat: int, tmpdir: str):
+    path = os.path.join(tmpdir, f'bench_{n_rows}.csv')
+    write_dataset(path, n_rows)
+    schema = infer_schema(write_config(os.path.join(tmpdir, 'rules.yml')))
+    print(f"\n== {n_rows:,} filas ({os.path.getsize(path) / 2**20:.0f} MB, {os.cpu_count()} CPUs) ==")
+
+    frames, times = {}, {}
+    for engine in CSV_ENGINES:
+        times[engine], frames[engine] = _timed(lambda: load_data(path, engine=engine, schema=schema), repeat)
+        stream, rows = _timed(
+            lambda: sum(len(c) for c in load_data(path, chunksize=chunksize, engine=engine, schema=schema)),
+            repeat
+        )
+        assert rows == n_rows
+        print(f"{engine:<8} completa={times[engine]:7.3f}s  streaming={stream:7.3f}s")
+    check_same(frames['pandas'], frames['pyarrow'])
+    print(f"pyarrow x{times['pandas'] / max(times['pyarrow'], 1e-9):.1f} (carga completa, mismos datos)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000])
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in args.rows:
+            run(n, args.chunksize, args.repeat, tmpdir)
@@ -0,0 +1,123 @@
+"""
+Benchmark del tiempo de arranque del CLI (python -X importtime).
+
+Mide el import de scripts.main y `python -m scripts.main --help` en procesos
+nuevos (mínimo de N repeticiones), lista los paquetes más caros
+y comprueba que los módulos de etapas opcionales (scipy, jinja2, remediación,
+alertas, --workers) no se cargan al arrancar. Compara con la sección
+'import_time' de benchmarks/baseline.json.
+
+Uso:
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --update-baseline
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+# Sólo deben cargarse en la etapa que los usa
+LAZY_MODULES = ('scipy', 'jinja2', 'scripts.remediation', 'scripts.alerts', 'scripts.parallel', 'scripts.drift',
+                'scripts.violations', 'scripts.sql_backend', 'duckdb', 'scripts.stage_cache')
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Líneas de -X importtime -> {módulo: (self_us, cumulative_us, profundidad)}.
+    """
+    out = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        self_us, cumulative, raw_name = int(parts[0]), int(parts[1]), parts[2]
+        name = raw_name.strip()
+        depth = (len(raw_name) - len(raw_name.lstrip(' ')) - 1) // 2
+        out[name] = (self_us, cumulative, depth)
+    return out
+
+
+def measure_import(repeat: int = 5) -> dict:
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             'import sys, json, scripts.main; print(json.dumps(sorted(sys.modules)))'],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        times = parse_importtime(proc.stderr)
+        if best is None or times['scripts.main'][1] < best[0]['scripts.main'][1]:
+            best = (times, json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {'times': best[0], 'modules': best[1]}
+
+
+def measure_help(repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'scripts.main', '--help'],
+                       cwd=ROOT, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - t0)
+    return round(best, 4)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args(argv)
+
+    imp = measure_import(args.repeat)
+    times = imp['times']
+    result = {
+        'scripts_main_ms': round(times['scripts.main'][1] / 1000, 1),
+        'cli_help_s': measure_help(args.repeat)
+    }
+    print(f"import scripts.main: {result['scripts_main_ms']} ms   "
+          f"audit_data --help: {result['cli_help_s']} s")
+    # Tiempo propio sumado por paquete raíz (pandas, pyarrow, numpy, ...)
+    by_package = {}
+    for name, (self_us, _, _) in times.items():
+        root = name.split('.')[0]
+        by_package[root] = by_package.get(root, 0) + self_us
+    print("\nPaquetes más caros (tiempo propio):")
+    for name, self_us in sorted(by_package.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  {name}")
+
+    failures = []
+    loaded = [m for m in LAZY_MODULES if m in imp['modules']]
+    if loaded:
+        failures.append(f"módulos que deberían cargarse en su etapa: {loaded}")
+
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    if args.update_baseline:
+        stored['import_time'] = result
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(stored, f, indent=2)
+        print(f"\nLínea base actualizada: {args.baseline}")
+    elif 'import_time' in stored:
+        base = stored['import_time']
+        if result['scripts_main_ms'] > base['scripts_main_ms'] * (1 + args.tolerance) + 30:
+            failures.append(f"import scripts.main: {base['scripts_main_ms']} ms -> {result['scripts_main_ms']} ms")
+        if result['cli_help_s'] > base['cli_help_s'] * (1 + args.tolerance) + 0.03:
+            failures.append(f"audit_data --help: {base['cli_help_s']} s -> {result['cli_help_s']} s")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        return 1
+    print("\n✅ Arranque sin regresiones")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Benchmark del motor de desajustes de tipo de compute_quality_metrics.
+
+Compara el bucle original valor a valor (isinstance / datetime.strptime por celda)
+con el motor columnar de scripts.metrics y verifica que ambos devuelven los
+mismos conteos.
+
+Uso:
+    python -m benchmarks.bench_type_mismatch            # 1M y 10M filas
+    python -m benchmarks.bench_type_mismatch --rows 100000
+"""
+import argparse
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+
+from scripts.column_profile import _type_mismatch_mask
+
+SCHEMA = {
+    'edad':    {'type': 'integer'},
+    'importe': {'type': 'number'},
+    'codigo':  {'type': 'integer'},
+    'alta':    {'type': 'date', 'format': '%Y-%m-%d'},
+}
+
+
+def legacy_type_mismatch(s: pd.Series, expected_type: str, date_format: str = None) -> int:
+    """Implementación original (bucle Python por valor)."""
+    n_type_mismatch = 0
+    for v in s.dropna():
+        if expected_type == 'integer' and not isinstance(v, int):
+            n_type_mismatch += 1
+        elif expected_type == 'number' and not isinstance(v, (int, float)):
+            n_type_mismatch += 1
+        elif expected_type == 'date':
+            try:
+                datetime.datetime.strptime(str(v), date_format)
+            except Exception:
+                n_type_mismatch += 1
+    return n_type_mismatch
+
+
+def make_frame(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    edad = rng.integers(18, 99, n_rows)
+    importe = rng.normal(100, 15, n_rows)
+    importe[rng.random(n_rows) < 0.05] = np.nan
+    # Columna object con ~1% de valores no numéricos
+    codigo = pd.Series(rng.integers(0, 10_000, n_rows), dtype=object)
+    codigo[rng.random(n_rows) < 0.01] = 'N/A'
+    dates = pd.date_range('2020-01-01', periods=1500, freq='D').strftime('%Y-%m-%d')
+    alta = pd.Series(dates[rng.integers(0, len(dates), n_rows)], dtype=object)
+    alta[rng.random(n_rows) < 0.01] = '31/02/2021'
+    return pd.DataFrame({'edad': edad, 'importe': importe, 'codigo': codigo, 'alta': alta})
+
+
+def run(n_rows: int):
+    df = make_frame(n_rows)
+    print(f"\n== {n_rows:,} filas ==")
+    for col, rules in SCHEMA.items():
+        t0 = time.perf_counter()
+        old = legacy_type_mismatch(df[col], rules['type'], rules.get('format'))
+        t_old = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        new = int(_type_mismatch_mask(df[col], rules['type'], rules.get('format')).sum())
+        t_new = time.perf_counter() - t0
+        assert old == new, f"{col}: legacy={old} columnar={new}"
+        print(f"{col:<8} {rules['type']:<8} legacy={t_old:8.3f}s  columnar={t_new:8.3f}s  "
+              f"x{t_old / max(t_new, 1e-9):7.1f}  ({new} desajustes)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+    for n in args.rows:
+        run(n)
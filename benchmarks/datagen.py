@@ -0,0 +1,180 @@
+"""
+Generador de datos sintéticos reproducible (semilla) para los benchmarks.
+
+Produce tablas estrechas (~10 columnas) o anchas (bloques de columnas
+repetidos), de cardinalidad baja o alta, con tasas configurables de nulos,
+violaciones de patrón/tipo y outliers. Los datos se generan por bloques con
+una semilla derivada de (seed, nº de bloque), así que un fichero de 50M filas
+se escribe sin tenerlo entero en memoria y siempre sale igual.
+
+Uso:
+    python -m benchmarks.datagen --rows 1000000 --out /tmp/bench.csv
+    python -m benchmarks.datagen --rows 50000000 --shape wide --out /tmp/big.parquet
+"""
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+import yaml
+
+BLOCK_ROWS = 1_000_000
+# Columnas que se replican (con sufijo) en las tablas anchas
+WIDE_BLOCKS = 6
+
+
+def _block(
+    n_rows: int,
+    total_rows: int,
+    cardinality: str,
+    null_rate: float,
+    violation_rate: float,
+    outlier_rate: float,
+    rng: np.random.Generator,
+    suffix: str = ''
+) -> dict:
+    high = cardinality == 'high'
+    n_customers = max(total_rows // 2, 1) if high else 50
+    n_categories = max(total_rows // 10, 1) if high else 8
+
+    age = rng.integers(18, 99, n_rows).astype(float)
+    outliers = rng.random(n_rows) < outlier_rate
+    age[outliers] = rng.choice([-5, 150, 400], outliers.sum())
+    amount = rng.lognormal(4, 0.5, n_rows)
+    outliers = rng.random(n_rows) < outlier_rate
+    amount[outliers] *= 100
+
+    customer = pd.Series(rng.integers(0, n_customers, n_rows)).astype(str)
+    email = 'user' + customer + '@mail.com'
+    email[rng.random(n_rows) < violation_rate] = 'sin-email'
+    zip_code = rng.integers(10000, 99999, n_rows)
+    bad = rng.random(n_rows) < violation_rate
+    zip_code[bad] = rng.integers(100, 9999, bad.sum())
+    days = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 1500, n_rows), unit='D')
+    signup = pd.Series(days.strftime('%Y-%m-%d'))
+    signup[rng.random(n_rows) < violation_rate] = '31/02/2021'
+
+    cols = {
+        f'customer{suffix}': 'C' + customer.str.zfill(8),
+        f'email{suffix}': email,
+        f'zip{suffix}': pd.Series(zip_code),
+        f'edad{suffix}': pd.Series(age),
+        f'amount{suffix}': pd.Series(amount),
+        f'category{suffix}': 'cat_' + pd.Series(rng.integers(0, n_categories, n_rows)).astype(str),
+        f'signup{suffix}': signup,
+    }
+    return {name: s.mask(rng.random(n_rows) < null_rate) for name, s in cols.items()}
+
+
+def generate(
+    n_rows: int,
+    shape: str = 'narrow',
+    cardinality: str = 'low',
+    null_rate: float = 0.05,
+    violation_rate: float = 0.02,
+    outlier_rate: float = 0.01,
+    seed: int = 0,
+    block_rows: int = BLOCK_ROWS
+):
+    """
+    Genera la tabla por bloques de hasta block_rows filas (iterador de DataFrames).
+    shape: 'narrow' (~10 columnas) o 'wide' (WIDE_BLOCKS bloques de columnas).
+    cardinality: 'low' (decenas de valores por columna de texto) o 'high'
+    (del orden de las filas).
+    """
+    blocks = WIDE_BLOCKS if shape == 'wide' else 1
+    for b, start in enumerate(range(0, n_rows, block_rows)):
+        rng = np.random.default_rng([seed, b])
+        n = min(block_rows, n_rows - start)
+        cols = {'id': np.arange(start, start + n)}
+        # ~0.1% de ids repetidos para la regla 'unique'
+        dup = rng.random(n) < 0.001
+        cols['id'][dup] = rng.integers(0, max(start + n, 1), dup.sum())
+        for i in range(blocks):
+            cols.update(_block(
+                n, n_rows, cardinality, null_rate, violation_rate, outlier_rate, rng,
+                suffix=f'_{i}' if blocks > 1 else ''
+            ))
+        cols['updated_at'] = pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(start, start + n), unit='s')
+        yield pd.DataFrame(cols)
+
+
+def make_config(shape: str = 'narrow') -> tuple:
+    """Esquema y reglas (formato de rules.yml) que corresponden a generate()."""
+    suffixes = [f'_{i}' for i in range(WIDE_BLOCKS)] if shape == 'wide' else ['']
+    schema = {'id': {'type': 'integer'}}
+    rules = [
+        {'name': 'no_nulos', 'column': 'any', 'type': 'not_null'},
+        {'name': 'id_unico', 'column': 'id', 'type': 'unique'},
+    ]
+    for sfx in suffixes:
+        schema.update({
+            f'email{sfx}': {'type': 'string', 'pattern': r'^[\w\.-]+@[\w\.-]+\.\w{2,}$'},
+            f'zip{sfx}': {'type': 'integer', 'pattern': r'^\d{5}$'},
+            f'edad{sfx}': {'type': 'number'},
+            f'amount{sfx}': {'type': 'number'},
+            f'signup{sfx}': {'type': 'date', 'format': '%Y-%m-%d'},
+        })
+        rules += [
+            {'name': f'edad_rango{sfx}', 'column': f'edad{sfx}', 'type': 'range', 'min': 18, 'max': 99},
+            {'name': f'email_no_vacio{sfx}', 'column': f'email{sfx}', 'type': 'non_empty_string'},
+        ]
+    return schema, rules
+
+
+def write_config(path: str, shape: str = 'narrow') -> str:
+    """Escribe un rules.yml (secciones 'columns' y 'rules') para generate()."""
+    schema, rules = make_config(shape)
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump({'columns': schema, 'rules': rules}, f, sort_keys=False)
+    return path
+
+
+def write_dataset(path: str, n_rows: int, **kwargs) -> str:
+    """
+    Escribe la tabla en CSV, Parquet o Arrow IPC (según la extensión) bloque a bloque.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    if ext == '.csv':
+        for i, block in enumerate(generate(n_rows, **kwargs)):
+            block.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        return path
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for block in generate(n_rows, **kwargs):
+            table = pa.Table.from_pandas(block, preserve_index=False)
+            if writer is None:
+                writer = (pq.ParquetWriter(path, table.schema) if ext in ('.parquet', '.pq')
+                          else pa.ipc.new_file(path, table.schema))
+            writer.write_table(table) if ext in ('.parquet', '.pq') else writer.write(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--out', required=True, help='Fichero de salida (.csv, .parquet o .arrow)')
+    parser.add_argument('--shape', choices=['narrow', 'wide'], default='narrow')
+    parser.add_argument('--cardinality', choices=['low', 'high'], default='low')
+    parser.add_argument('--null-rate', type=float, default=0.05)
+    parser.add_argument('--violation-rate', type=float, default=0.02)
+    parser.add_argument('--outlier-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rules-out', default=None, help='Escribe también el rules.yml correspondiente')
+    args = parser.parse_args()
+    write_dataset(
+        args.out, args.rows, shape=args.shape, cardinality=args.cardinality,
+        null_rate=args.null_rate, violation_rate=args.violation_rate,
+        outlier_rate=args.outlier_rate, seed=args.seed
+    )
+    if args.rules_out:
+        write_config(args.rules_out, args.shape)
@@ -0,0 +1,264 @@
+"""
+Alertas a Slack (webhooks entrantes) sin bloquear el audit.
+
+- AlertDispatcher acumula las alertas de la ejecución, descarta duplicadas
+  (misma clave en el mismo canal) y al hacer flush() envía un único mensaje
+  por canal desde un hilo en segundo plano, con timeout por petición y
+  reintentos con backoff exponencial (errores de red, 429 y 5xx).
+- Canales: SLACK_WEBHOOK_URL es el canal 'default'; SLACK_WEBHOOK_URL_<CANAL>
+  define otros. Un canal sin URL no envía nada (queda como 'skipped').
+- wait_pending(timeout) espera, como mucho timeout segundos en total, a los
+  envíos en curso; el CLI lo llama al terminar, cuando los informes ya están
+  escritos.
+- StubWebhookServer: webhook local para pruebas sin red
+  (python -m scripts.alerts --port 8099).
+"""
+import os
+import json
+import time
+import queue
+import threading
+
+# Mensajes por canal en un envío; el resto se resume en una línea
+MAX_BATCH = 50
+
+_DISPATCHERS = []
+_DISPATCHERS_LOCK = threading.Lock()
+
+
+def channels_from_env(environ=None) -> dict:
+    """{canal: url} a partir de SLACK_WEBHOOK_URL y SLACK_WEBHOOK_URL_<CANAL>."""
+    environ = os.environ if environ is None else environ
+    channels = {}
+    for name, url in environ.items():
+        if not url:
+            continue
+        if name == 'SLACK_WEBHOOK_URL':
+            channels['default'] = url
+        elif name.startswith('SLACK_WEBHOOK_URL_'):
+            channels[name[len('SLACK_WEBHOOK_URL_'):].lower()] = url
+    return channels
+
+
+def _post(url: str, payload: dict, timeout: float) -> int:
+    """POST JSON; devuelve el código HTTP (las respuestas de error no lanzan)."""
+    # urllib (y ssl) sólo se cargan si de verdad hay algo que enviar
+    import urllib.request
+    import urllib.error
+
+    req = urllib.request.Request(
+        url, data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}, method='POST'
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def send_slack(text: str, webhook_url: str = None, timeout: float = 5.0) -> bool:
+    """
+    Envío síncrono de un mensaje (sin reintentos). Usa SLACK_WEBHOOK_URL si no
+    se pasa webhook_url; sin URL no hace nada. Devuelve True si Slack lo aceptó.
+    """
+    url = webhook_url or os.environ.get('SLACK_WEBHOOK_URL')
+    if not url:
+        return False
+    try:
+        return 200 <= _post(url, {'text': text}, timeout) < 300
+    except OSError:
+        return False
+
+
+class AlertDispatcher:
+    """
+    Cola de alertas de una ejecución: add() no hace E/S, flush() agrupa por
+    canal y delega el envío en un hilo daemon; close() vacía y espera (acotado).
+    `results` guarda una entrada por mensaje enviado: canal, estado
+    ('sent', 'failed', 'skipped'), intentos, nº de alertas y error.
+    """
+
+    def __init__(
+        self,
+        channels: dict = None,
+        title: str = None,
+        timeout: float = 5.0,
+        retries: int = 3,
+        backoff: float = 0.5
+    ):
+        self.channels = channels_from_env() if channels is None else channels
+        self.title = title
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.results = []
+        self._seen = set()
+        self._pending = {}
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def add(self, message: str, channel: str = 'default', key=None) -> bool:
+        """Encola una alerta; False si ya se añadió una con la misma clave (o texto)."""
+        dedupe = (channel, message if key is None else key)
+        if dedupe in self._seen:
+            return False
+        self._seen.add(dedupe)
+        self._pending.setdefault(channel, []).append(message)
+        return True
+
+    def take(self) -> list:
+        """Devuelve y vacía las alertas pendientes como [(canal, mensaje)], sin enviarlas."""
+        out = [(channel, m) for channel, messages in self._pending.items() for m in messages]
+        self._pending = {}
+        return out
+
+    def flush(self) -> int:
+        """Un mensaje por canal con las alertas pendientes. No espera a la red."""
+        n = 0
+        for channel, messages in self._pending.items():
+            lines = messages[:MAX_BATCH]
+            if len(messages) > MAX_BATCH:
+                lines.append(f"… y {len(messages) - MAX_BATCH} alertas más")
+            if self.title:
+                lines.insert(0, f"*{self.title}* ({len(messages)} alertas)")
+            self._queue.put((channel, {'text': '\n'.join(lines)}, len(messages)))
+            n += 1
+        self._pending = {}
+        if n and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+            self._thread.start()
+            with _DISPATCHERS_LOCK:
+                _DISPATCHERS.append(self)
+        return n
+
+    def close(self, timeout: float = None) -> list:
+        """Envía lo pendiente y espera al hilo como mucho `timeout` segundos."""
+        self.flush()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+        return self.results
+
+    # --- Hilo de envío ----------------------------------------------------------
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self.results.append(self._deliver(*item))
+
+    def _deliver(self, channel: str, payload: dict, n_alerts: int) -> dict:
+        result = {'channel': channel, 'status': 'skipped', 'attempts': 0, 'n_alerts': n_alerts, 'error': None}
+        url = self.channels.get(channel)
+        if not url:
+            return result
+        for attempt in range(self.retries + 1):
+            result['attempts'] = attempt + 1
+            try:
+                code = _post(url, payload, self.timeout)
+                if 200 <= code < 300:
+                    result.update(status='sent', error=None)
+                    return result
+                result['error'] = f'HTTP {code}'
+                if code != 429 and code < 500:
+                    break
+            except OSError as e:  # incluye URLError y timeouts
+                result['error'] = f'{type(e).__name__}: {e}'
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2 ** attempt)
+        result['status'] = 'failed'
+        return result
+
+
+def wait_pending(timeout: float = 10.0) -> list:
+    """
+    Cierra los dispatchers con envíos en curso, con un plazo total de timeout
+    segundos. Devuelve los resultados de todos ellos.
+    """
+    deadline = time.monotonic() + timeout
+    with _DISPATCHERS_LOCK:
+        dispatchers = list(_DISPATCHERS)
+        _DISPATCHERS.clear()
+    results = []
+    for d in dispatchers:
+        results += d.close(max(deadline - time.monotonic(), 0))
+    return results
+
+
+class StubWebhookServer:
+    """
+    Webhook HTTP local para pruebas: guarda cada payload recibido en `received`.
+    `responses` es la lista de códigos a devolver en orden (después, 200) y
+    `delay` retrasa cada respuesta (para probar timeouts).
+
+        with StubWebhookServer(responses=[500]) as stub:
+            AlertDispatcher({'default': stub.url}).add('hola')
+    """
+
+    def __init__(self, responses: list = None, delay: float = 0.0, port: int = 0, verbose: bool = False):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        stub = self
+        self.responses = list(responses or [])
+        self.delay = delay
+        self.received = []
+        self.requests = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                stub.requests += 1
+                code = stub.responses.pop(0) if stub.responses else 200
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if code == 200:
+                    stub.received.append(json.loads(body or b'{}'))
+                    if verbose:
+                        print(json.loads(body or b'{}').get('text', ''), flush=True)
+                try:
+                    self.send_response(code)
+                    self.end_headers()
+                    self.wfile.write(b'ok' if code == 200 else b'error')
+                except (BrokenPipeError, ConnectionResetError):
+                    # El cliente ya se fue por timeout
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self._server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}/webhook'
+        self._thread = None
+
+    def start(self) -> 'StubWebhookServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Webhook de Slack local para pruebas sin red')
+    parser.add_argument('--port', type=int, default=8099)
+    args = parser.parse_args()
+    server = StubWebhookServer(port=args.port, verbose=True)
+    print(f'SLACK_WEBHOOK_URL={server.url}', flush=True)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,317 @@
+"""
+Archivo histórico de informes: almacén por contenido con índice SQLite.
+
+Estructura (root, por defecto <outdir>/archive):
+    index.sqlite            runs(run_id, created_at, ...) y artifacts(run_id, name, hash, ...)
+    objects/ab/<sha256>.zst cada contenido distinto una sola vez, comprimido
+
+- Cada ejecución es una entrada en el índice con sus ficheros; un informe
+  idéntico al de otra ejecución (mismo sha256) no se vuelve a escribir.
+- Compresión zstd (pyarrow) o gzip si pyarrow no está; con codec 'none' los
+  ficheros nuevos se enlazan (hard link, sin copiar bytes) en el almacén.
+- Los ficheros de outdir se borran sólo después de confirmar la transacción
+  del índice: si falla, los informes siguen en outdir.
+- Retención por nº de ejecuciones y/o antigüedad; los objetos que ya no
+  referencia ninguna ejecución se borran.
+- Listar ejecuciones o leer un informe pasado sólo consulta el índice y abre
+  el objeto correspondiente: no se recorre ningún directorio.
+
+Uso:
+    python -m scripts.archive reports/archive list
+    python -m scripts.archive reports/archive show 20240101_120000
+    python -m scripts.archive reports/archive extract 20240101_120000 /tmp/run
+"""
+import io
+import os
+import gzip
+import json
+import shutil
+import hashlib
+import sqlite3
+import datetime
+
+import pandas as pd
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id     TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    run_id      TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    hash        TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS objects (
+    hash        TEXT PRIMARY KEY,
+    codec       TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_hash ON artifacts (hash);
+"""
+
+_EXTENSIONS = {'zstd': '.zst', 'gzip': '.gz', 'none': ''}
+_BLOCK = 1 << 20
+
+
+def default_codec() -> str:
+    try:
+        import pyarrow as pa
+        if pa.Codec.is_available('zstd'):
+            return 'zstd'
+    except ImportError:  # pragma: no cover - pyarrow es opcional
+        pass
+    return 'gzip'
+
+
+def file_hash(path: str) -> str:
+    """sha256 del fichero, leído por bloques."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_BLOCK), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _compressed_writer(path: str, codec: str):
+    if codec == 'zstd':
+        import pyarrow as pa
+        return pa.CompressedOutputStream(path, 'zstd')
+    return gzip.open(path, 'wb', compresslevel=1)
+
+
+def _compressed_reader(path: str, codec: str):
+    if codec == 'zstd':
+        import pyarrow as pa
+        return pa.CompressedInputStream(pa.OSFile(path, 'rb'), 'zstd')
+    if codec == 'gzip':
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+class ReportArchive:
+    """
+    Archivo por contenido de los informes de cada ejecución.
+    keep_runs / keep_days: retención aplicada tras cada commit (None = sin límite).
+    """
+
+    def __init__(self, root: str, codec: str = None, keep_runs: int = None, keep_days: float = None):
+        self.root = root
+        self.codec = codec or default_codec()
+        if self.codec not in _EXTENSIONS:
+            raise ValueError(f"Códec de archivo no soportado: {self.codec}")
+        self.keep_runs = keep_runs
+        self.keep_days = keep_days
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, 'index.sqlite'))
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Objetos --------------------------------------------------------------
+    def _object_path(self, digest: str, codec: str) -> str:
+        return os.path.join(self.root, 'objects', digest[:2], digest + _EXTENSIONS[codec])
+
+    def _store(self, path: str) -> tuple:
+        """
+        Guarda el contenido de path (si no estaba) sin tocar path: commit lo
+        borra tras confirmar el índice. Devuelve (hash, tamaño original).
+        """
+        digest = file_hash(path)
+        size = os.path.getsize(path)
+        if self.conn.execute("SELECT 1 FROM objects WHERE hash = ?", (digest,)).fetchone():
+            return digest, size
+        dest = self._object_path(digest, self.codec)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        # Un objeto que quedó de una transacción fallida se sobrescribe
+        tmp = dest + '.tmp'
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        if self.codec == 'none':
+            try:
+                # Mismo sistema de ficheros: hard link, sin copiar bytes
+                os.link(path, tmp)
+            except OSError:
+                shutil.copyfile(path, tmp)
+        else:
+            with open(path, 'rb') as src, _compressed_writer(tmp, self.codec) as out:
+                for block in iter(lambda: src.read(_BLOCK), b''):
+                    out.write(block)
+        os.replace(tmp, dest)
+        self.conn.execute(
+            "INSERT INTO objects VALUES (?, ?, ?, ?)",
+            (digest, self.codec, size, os.path.getsize(dest))
+        )
+        return digest, size
+
+    # --- Ejecuciones ----------------------------------------------------------
+    def _new_run_id(self) -> str:
+        base = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+        run_id, n = base, 0
+        while self.conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone():
+            n += 1
+            run_id = f'{base}_{n}'
+        return run_id
+
+    def commit(self, outdir: str, run_id: str = None) -> str:
+        """
+        Archiva (y retira de outdir) todos los ficheros de outdir salvo la propia
+        carpeta del archivo. Con run_id de una ejecución existente, los añade a
+        ella (p.ej. run_metrics.json al final). Devuelve el run_id.
+        """
+        root = os.path.abspath(self.root)
+        paths = []
+        for dirpath, dirnames, filenames in os.walk(outdir):
+            dirnames[:] = [d for d in dirnames if os.path.abspath(os.path.join(dirpath, d)) != root]
+            for fname in filenames:
+                paths.append(os.path.join(dirpath, fname))
+        with self.conn:
+            if run_id is None:
+                run_id = self._new_run_id()
+                self.conn.execute(
+                    "INSERT INTO runs VALUES (?, ?)", (run_id, datetime.datetime.now().isoformat())
+                )
+            for path in sorted(paths):
+                name = os.path.relpath(path, outdir).replace(os.sep, '/')
+                digest, size = self._store(path)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?)", (run_id, name, digest, size)
+                )
+        # El índice ya apunta a los objetos: se retiran de outdir
+        for path in paths:
+            os.remove(path)
+        # Subcarpetas que quedaron vacías
+        for path in sorted({os.path.dirname(p) for p in paths}, key=len, reverse=True):
+            while (os.path.abspath(path) != os.path.abspath(outdir)
+                   and os.path.isdir(path) and not os.listdir(path)):
+                os.rmdir(path)
+                path = os.path.dirname(path)
+        self.apply_retention(keep=run_id)
+        return run_id
+
+    def runs(self) -> pd.DataFrame:
+        """Ejecuciones archivadas (más reciente primero) con nº de ficheros y bytes."""
+        return pd.read_sql_query(
+            "SELECT r.run_id, r.created_at, COUNT(a.name) AS n_files, "
+            "COALESCE(SUM(a.size), 0) AS bytes FROM runs r "
+            "LEFT JOIN artifacts a ON a.run_id = r.run_id "
+            "GROUP BY r.run_id ORDER BY r.created_at DESC, r.run_id DESC",
+            self.conn
+        )
+
+    def latest(self) -> str:
+        row = self.conn.execute(
+            "SELECT run_id FROM runs ORDER BY created_at DESC, run_id DESC LIMIT 1"
+        ).fetchone()
+        return row[0] if row else None
+
+    def files(self, run_id: str) -> pd.DataFrame:
+        """Ficheros de una ejecución con su hash, tamaño y tamaño almacenado."""
+        return pd.read_sql_query(
+            "SELECT a.name, a.hash, a.size, o.stored_size, o.codec FROM artifacts a "
+            "JOIN objects o ON o.hash = a.hash WHERE a.run_id = ? ORDER BY a.name",
+            self.conn, params=(run_id,)
+        )
+
+    def open(self, run_id: str, name: str):
+        """Fichero binario (descomprimido al leer) de un informe archivado."""
+        row = self.conn.execute(
+            "SELECT a.hash, o.codec FROM artifacts a JOIN objects o ON o.hash = a.hash "
+            "WHERE a.run_id = ? AND a.name = ?", (run_id, name)
+        ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"{name} no está archivado en la ejecución {run_id}")
+        return _compressed_reader(self._object_path(row[0], row[1]), row[1])
+
+    def read_bytes(self, run_id: str, name: str) -> bytes:
+        with self.open(run_id, name) as f:
+            return f.read()
+
+    def read_csv(self, run_id: str, name: str, **kwargs) -> pd.DataFrame:
+        return pd.read_csv(io.BytesIO(self.read_bytes(run_id, name)), **kwargs)
+
+    def read_json(self, run_id: str, name: str):
+        return json.loads(self.read_bytes(run_id, name))
+
+    def extract(self, run_id: str, dest: str) -> str:
+        """Restaura los ficheros de una ejecución en dest."""
+        for name in self.files(run_id)['name']:
+            path = os.path.join(dest, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with self.open(run_id, name) as src, open(path, 'wb') as out:
+                for block in iter(lambda: src.read(_BLOCK), b''):
+                    out.write(block)
+        return dest
+
+    # --- Retención ------------------------------------------------------------
+    def apply_retention(self, keep: str = None) -> list:
+        """
+        Borra las ejecuciones que exceden keep_runs o son más antiguas que
+        keep_days (nunca `keep`) y los objetos sin referencias.
+        Devuelve los run_id eliminados.
+        """
+        if self.keep_runs is None and self.keep_days is None:
+            return []
+        runs = self.conn.execute(
+            "SELECT run_id, created_at FROM runs ORDER BY created_at DESC, run_id DESC"
+        ).fetchall()
+        cutoff = None
+        if self.keep_days is not None:
+            cutoff = (datetime.datetime.now() - datetime.timedelta(days=self.keep_days)).isoformat()
+        drop = [
+            run_id for i, (run_id, created_at) in enumerate(runs)
+            if run_id != keep and (
+                (self.keep_runs is not None and i >= self.keep_runs)
+                or (cutoff is not None and created_at < cutoff)
+            )
+        ]
+        if not drop:
+            return []
+        with self.conn:
+            self.conn.executemany("DELETE FROM runs WHERE run_id = ?", [(r,) for r in drop])
+            self.conn.executemany("DELETE FROM artifacts WHERE run_id = ?", [(r,) for r in drop])
+            orphans = self.conn.execute(
+                "SELECT hash, codec FROM objects WHERE hash NOT IN (SELECT hash FROM artifacts)"
+            ).fetchall()
+            self.conn.executemany("DELETE FROM objects WHERE hash = ?", [(h,) for h, _ in orphans])
+        for digest, codec in orphans:
+            try:
+                os.remove(self._object_path(digest, codec))
+            except FileNotFoundError:
+                pass
+        return drop
+
+
+if __name__ == '__main__':
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Consulta del archivo de informes')
+    parser.add_argument('root', help='Carpeta del archivo (p.ej. reports/archive)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list')
+    show = sub.add_parser('show')
+    show.add_argument('run_id')
+    extract = sub.add_parser('extract')
+    extract.add_argument('run_id')
+    extract.add_argument('dest')
+    args = parser.parse_args()
+
+    with ReportArchive(args.root) as archive:
+        if args.command == 'list':
+            archive.runs().to_string(sys.stdout, index=False)
+        elif args.command == 'show':
+            archive.files(args.run_id).to_string(sys.stdout, index=False)
+        else:
+            print(archive.extract(args.run_id, args.dest))
+        print()
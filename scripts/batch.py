@@ -0,0 +1,179 @@
+"""
+Modo batch: muchos datasets en un solo proceso (opción --batch).
+
+- Entrada: un glob ('data/dt=*/part.parquet', admite **) o un manifest de
+  texto con una ruta por línea (# para comentarios; las rutas relativas son
+  relativas al manifest).
+- El esquema y las reglas se leen una vez y se pasan a cada dataset; el índice
+  de claves del padre (--parent) se construye una vez antes de repartir.
+- Pool acotado de `jobs` procesos: cada proceso audita datasets uno tras otro
+  (el entorno Jinja y los imports de las etapas se reutilizan entre datasets).
+- Informes por dataset en outdir/<dataset>/ (con su archivo y run_metrics.json;
+  la columna 'archive' del resumen es el run_id)
+  y resumen consolidado en outdir/batch_summary.csv y batch_summary.json.
+- Un dataset que falla queda como status='error' en el resumen y no detiene el resto.
+- Las alertas de todos los datasets se agrupan en un mensaje por canal.
+"""
+import os
+import glob
+import json
+import time
+import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from scripts.load import COLUMNAR_FORMATS, DATABASE_FORMATS
+from scripts.instrumentation import RunMetrics
+from scripts.io_utils import save_csv, save_json, archive_reports
+from scripts.archive import ReportArchive
+
+# Un fichero existente con otra extensión se lee como manifest
+DATA_EXTENSIONS = set(COLUMNAR_FORMATS) | set(DATABASE_FORMATS) | {'.csv', '.gz', '.zip', '.bz2'}
+
+
+def expand_inputs(spec: str) -> list:
+    """
+    Rutas de un glob o de un manifest (un fichero existente que no es de datos).
+    """
+    ext = os.path.splitext(spec)[1].lower()
+    if os.path.isfile(spec) and ext not in DATA_EXTENSIONS:
+        base = os.path.dirname(spec)
+        with open(spec, 'r', encoding='utf-8') as f:
+            lines = [line.strip() for line in f]
+        return [
+            line if os.path.isabs(line) else os.path.join(base, line)
+            for line in lines if line and not line.startswith('#')
+        ]
+    return sorted(glob.glob(spec, recursive=True))
+
+
+def dataset_names(paths: list) -> list:
+    """
+    Nombre de carpeta por dataset: la ruta relativa al directorio común, sin
+    extensión y con '__' en lugar de separadores (dt=2024-01-01/part.parquet
+    -> dt=2024-01-01__part). Los duplicados se numeran.
+    """
+    if not paths:
+        return []
+    dirs = [os.path.dirname(os.path.abspath(p)) for p in paths]
+    common = os.path.commonpath(dirs)
+    names, seen = [], {}
+    for p in paths:
+        rel = os.path.relpath(os.path.abspath(p), common)
+        name = os.path.splitext(rel)[0].replace(os.sep, '__')
+        n = seen.get(name, 0)
+        seen[name] = n + 1
+        names.append(name if n == 0 else f'{name}_{n}')
+    return names
+
+
+def _audit_one(task: dict) -> dict:
+    """Audita un dataset (en un proceso del pool) y devuelve su fila del resumen."""
+    from scripts.main import run_audit
+    from scripts.alerts import AlertDispatcher
+
+    # Las alertas se devuelven al proceso principal, que envía un mensaje por canal para todo el batch
+    collector = AlertDispatcher(channels={})
+    record = {'dataset': task['name'], 'input': task['input'], 'status': 'ok',
+              'rows': None, 'score_global': None, 'semaforo': None,
+              'wall_s': None, 'archive': None, 'error': None}
+    t0 = time.perf_counter()
+    try:
+        with RunMetrics() as run:
+            run_id = run_audit(task['input'], run=run, alerts=collector, **task['kwargs'])
+        outdir = task['kwargs']['outdir']
+        run.write(outdir)
+        archive_reports(outdir, run_id, **(task['kwargs'].get('archive_options') or {}))
+        with ReportArchive(os.path.join(outdir, 'archive')) as archive:
+            summary = archive.read_json(run_id, 'summary.json')
+        record.update(rows=run.rows, score_global=summary['score_global'],
+                      semaforo=summary['semaforo'], archive=run_id)
+    except Exception as e:
+        record.update(status='error', error=f'{type(e).__name__}: {e}')
+    record['wall_s'] = round(time.perf_counter() - t0, 4)
+    record['alerts'] = [(channel, f"[{task['name']}] {m}") for channel, m in collector.take()]
+    return record
+
+
+def run_batch(
+    spec: str,
+    rules_yml: str,
+    outdir: str = 'reports',
+    jobs: int = 1,
+    state_store: str = None,
+    parent_path: str = None,
+    parent_key: str = None,
+    **audit_kwargs
+) -> pd.DataFrame:
+    """
+    Audita todos los datasets de `spec` (glob o manifest) con `jobs` procesos.
+    audit_kwargs se pasan a run_audit (remediate, chunksize, profile_method, ...).
+    Devuelve el resumen consolidado (una fila por dataset, en el orden de entrada).
+    """
+    from scripts.rules import infer_schema, load_rules
+
+    paths = expand_inputs(spec)
+    if not paths:
+        raise FileNotFoundError(f'Ningún dataset coincide con {spec!r}')
+    started = time.perf_counter()
+    schema = infer_schema(rules_yml)
+    rules = load_rules(rules_yml)
+    if parent_path:
+        # Se construye aquí: los procesos sólo lo abren (meta.json coincide)
+        from scripts.integrity import parent_key_index
+        parent_key_index(parent_path, parent_key.split(','))
+
+    tasks = []
+    for name, path in zip(dataset_names(paths), paths):
+        kwargs = dict(
+            audit_kwargs,
+            rules_yml=rules_yml,
+            outdir=os.path.join(outdir, name),
+            schema=schema,
+            rules=rules,
+            parent_path=parent_path,
+            parent_key=parent_key,
+            # Carga incremental y estado persistente separados por dataset
+            state_file=os.path.join('.state', 'last_run', f'{name}.txt'),
+            state_store=os.path.join(state_store, name) if state_store else None
+        )
+        tasks.append({'name': name, 'input': path, 'kwargs': kwargs})
+
+    if jobs > 1 and len(tasks) > 1:
+        records = [None] * len(tasks)
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+            futures = {pool.submit(_audit_one, t): i for i, t in enumerate(tasks)}
+            for fut in as_completed(futures):
+                i = futures[fut]
+                try:
+                    records[i] = fut.result()
+                except Exception as e:  # el proceso murió (p.ej. sin memoria)
+                    records[i] = {'dataset': tasks[i]['name'], 'input': tasks[i]['input'],
+                                  'status': 'error', 'error': f'{type(e).__name__}: {e}'}
+    else:
+        records = [_audit_one(t) for t in tasks]
+
+    alerts = [a for r in records for a in r.pop('alerts', [])]
+    if alerts:
+        from scripts.alerts import AlertDispatcher
+        dispatcher = AlertDispatcher(title=f'Auditoría batch de {spec}')
+        for channel, message in alerts:
+            dispatcher.add(message, channel)
+        dispatcher.flush()
+
+    result = pd.DataFrame(records)
+    save_csv(result, os.path.join(outdir, 'batch_summary.csv'))
+    ok = result['status'] == 'ok'
+    save_json({
+        'timestamp': datetime.datetime.now().isoformat(),
+        'spec': spec,
+        'jobs': jobs,
+        'datasets': len(result),
+        'ok': int(ok.sum()),
+        'failed': int((~ok).sum()),
+        'wall_s': round(time.perf_counter() - started, 4),
+        'score_mean': round(float(result.loc[ok, 'score_global'].mean()), 3) if ok.any() else None,
+        'results': json.loads(result.to_json(orient='records'))
+    }, os.path.join(outdir, 'batch_summary.json'))
+    return result
@@ -0,0 +1,285 @@
+import datetime
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from scripts.instrumentation import instrumented
+from scripts.patterns import match_values
+from scripts.sketches import HyperLogLog
+
+def _python_types_ok(s: pd.Series, accepted: tuple) -> pd.Series:
+    """
+    Equivalente vectorizado de `isinstance(v, accepted)` sobre los valores no nulos.
+    Resuelve el tipo a nivel de dtype siempre que es posible y, para columnas
+    object, compara una sola vez cada tipo Python distinto presente.
+    Devuelve máscara booleana (True = tipo aceptado) alineada con s.
+    """
+    dtype = s.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind != 'O':
+        # Al iterar, numpy devuelve escalares Python nativos según el kind
+        native = {'b': bool, 'i': int, 'u': int, 'f': float, 'c': complex}.get(dtype.kind)
+        ok = native is not None and issubclass(native, accepted)
+        return pd.Series(ok, index=s.index)
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and hasattr(dtype, 'numpy_dtype'):
+        # Dtypes nullable (Int64, Float64, boolean...) iteran escalares numpy
+        return pd.Series(issubclass(dtype.numpy_dtype.type, accepted), index=s.index)
+    if isinstance(dtype, pd.StringDtype):
+        return pd.Series(issubclass(str, accepted), index=s.index)
+    if isinstance(dtype, pd.CategoricalDtype):
+        cat_ok = _python_types_ok(pd.Series(dtype.categories, dtype=object), accepted)
+        codes = s.cat.codes.to_numpy()
+        mask = np.where(codes >= 0, cat_ok.to_numpy()[codes], False)
+        return pd.Series(mask, index=s.index)
+    if dtype == object and pd.api.types.infer_dtype(s, skipna=True) == 'string':
+        return pd.Series(issubclass(str, accepted), index=s.index)
+    # object / extension: un test isinstance por tipo distinto, no por celda
+    kinds = s.map(type, na_action='ignore')
+    ok_types = [t for t in kinds.dropna().unique() if issubclass(t, accepted)]
+    return kinds.isin(ok_types)
+
+
+def _type_mismatch_mask(s: pd.Series, expected_type: str, date_format: str = None) -> pd.Series:
+    """
+    Motor columnar de validación de tipos. Devuelve una máscara booleana alineada
+    con s que marca los valores no nulos que no cumplen expected_type:
+      - integer: isinstance(v, int), también enteros numpy (int32, Int16 nullable...)
+      - number:  isinstance(v, (int, float)), también enteros y floats numpy
+      - date:    datetime.strptime(str(v), date_format) no falla
+    Cualquier otro tipo no genera desajustes.
+    """
+    notna = s.notna()
+    if expected_type == 'integer':
+        return notna & ~_python_types_ok(s, (int, np.integer))
+    if expected_type == 'number':
+        return notna & ~_python_types_ok(s, (int, float, np.integer, np.floating))
+    if expected_type == 'date':
+        if not date_format:
+            # strptime(..., None) siempre falla
+            return notna
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            # Se valida cada categoría una sola vez
+            bad = _type_mismatch_mask(pd.Series(s.dtype.categories), 'date', date_format).to_numpy()
+            codes = s.cat.codes.to_numpy()
+            return pd.Series(np.where(codes >= 0, bad[codes], False), index=s.index)
+        values = s[notna]
+        if pd.api.types.is_datetime64_any_dtype(values.dtype):
+            # str(Timestamp) incluye siempre la hora; astype(str) no
+            text = values.map(str)
+        else:
+            text = values.astype(str)
+        try:
+            # Con %z/%Z, utc=True admite offsets distintos (p.ej. +0100/+0200 por el horario de verano)
+            utc = '%z' in date_format or '%Z' in date_format
+            bad = pd.to_datetime(text, format=date_format, errors='coerce', utc=utc).isna()
+        except ValueError:
+            # Directivas que pandas no soporta (p.ej. %s): se valida todo con strptime
+            bad = pd.Series(True, index=text.index)
+        if bad.any():
+            # pandas rechaza algunas fechas que strptime acepta (p.ej. fuera de
+            # los límites de datetime64[ns]); se revisan sólo los distintos rechazados
+            rejected = text[bad]
+            recovered = set()
+            for v in rejected.unique():
+                try:
+                    datetime.datetime.strptime(v, date_format)
+                    recovered.add(v)
+                except Exception:
+                    pass
+            if recovered:
+                bad[bad] = ~rejected.isin(recovered)
+        mask = pd.Series(False, index=s.index)
+        mask[notna] = bad.to_numpy()
+        return mask
+    return pd.Series(False, index=s.index)
+
+
+def _lerp_percentiles(sorted_values: np.ndarray, qs) -> list:
+    """
+    Percentiles (método 'linear' de numpy) sobre un array ya ordenado, sin volver
+    a particionar los datos.
+    """
+    n = len(sorted_values)
+    out = []
+    for q in qs:
+        pos = q / 100 * (n - 1)
+        lo = int(np.floor(pos))
+        hi = min(lo + 1, n - 1)
+        t = pos - lo
+        a, b = sorted_values[lo], sorted_values[hi]
+        # Misma interpolación que numpy._lerp
+        out.append(float(b - (b - a) * (1 - t)) if t >= 0.5 else float(a + (b - a) * t))
+    return out
+
+
+class ColumnProfile:
+    """
+    Caché de los escaneos de una columna. Cada atributo se calcula la primera vez
+    que se pide y se reutiliza en todas las métricas de la ejecución:
+      - null_mask, n_nulls
+      - value_counts (conteo hash de valores distintos), n_distinct, n_duplicates
+        (o HyperLogLog si el esquema de la columna indica `sketch: hll`)
+      - sorted_numeric (valores no nulos como float, ordenados), mean, std
+      - pattern_counts, pattern_value_mask (match del 'pattern' del esquema sobre
+        los valores distintos no nulos; pattern_mask fila a fila bajo demanda)
+      - type_mismatch_mask (según 'type' / 'format' del esquema)
+    Los escaneos llevan @instrumented: con un RunMetrics activo su tiempo real y
+    de CPU, filas/s y memoria se registran por columna en run_metrics.json.
+    """
+
+    def __init__(self, series: pd.Series, col_schema: dict = None):
+        self.name = series.name
+        self.series = series
+        self.schema = col_schema or {}
+        self.total = len(series)
+
+    @cached_property
+    @instrumented
+    def null_mask(self) -> pd.Series:
+        return self.series.isnull()
+
+    @cached_property
+    def n_nulls(self) -> int:
+        return int(self.null_mask.sum())
+
+    @cached_property
+    @instrumented
+    def value_counts(self) -> pd.Series:
+        vc = self.series.value_counts(dropna=True, sort=False)
+        # Las categorías sin observaciones aparecen con conteo 0
+        return vc[vc > 0]
+
+    @cached_property
+    @instrumented
+    def hll(self):
+        """
+        HyperLogLog de los valores no nulos cuando el esquema lo pide
+        (`sketch: hll`, precisión opcional `hll_precision`); None en modo exacto.
+        """
+        if self.schema.get('sketch') != 'hll':
+            return None
+        sketch = HyperLogLog(self.schema.get('hll_precision', 14))
+        sketch.update(self.series[~self.null_mask])
+        return sketch
+
+    @cached_property
+    def n_distinct(self) -> int:
+        """Valores distintos contando el nulo como un valor más (igual que duplicated)."""
+        if self.hll is not None:
+            return int(round(self.hll.estimate())) + (1 if self.n_nulls else 0)
+        return len(self.value_counts) + (1 if self.n_nulls else 0)
+
+    @cached_property
+    def n_duplicates(self) -> int:
+        return max(self.total - self.n_distinct, 0)
+
+    @cached_property
+    def n_duplicates_error(self) -> int:
+        """Cota (~95%, dos errores estándar) de n_duplicates; 0 en modo exacto."""
+        if self.hll is None:
+            return 0
+        return int(np.ceil(2 * self.hll.relative_error * self.hll.estimate()))
+
+    @cached_property
+    def is_numeric(self) -> bool:
+        dtype = self.series.dtype
+        return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+    @cached_property
+    @instrumented
+    def sorted_numeric(self) -> np.ndarray:
+        if not self.is_numeric:
+            return np.array([], dtype=float)
+        return np.sort(self.series[~self.null_mask].to_numpy(dtype=float))
+
+    @cached_property
+    def mean(self) -> float:
+        return float(self.sorted_numeric.mean())
+
+    @cached_property
+    def std(self) -> float:
+        return float(self.sorted_numeric.std(ddof=0))
+
+    def percentiles(self, qs) -> list:
+        return _lerp_percentiles(self.sorted_numeric, qs)
+
+    def count_outside(self, lower: float, upper: float) -> int:
+        """Número de valores numéricos < lower o > upper (búsqueda binaria)."""
+        values = self.sorted_numeric
+        below = np.searchsorted(values, lower, side='left')
+        above = len(values) - np.searchsorted(values, upper, side='right')
+        return int(below + above)
+
+    @cached_property
+    def mixed_object(self) -> bool:
+        """Columna object con valores que no son texto (su texto no sale de value_counts)."""
+        s = self.series
+        return s.dtype == object and pd.api.types.infer_dtype(s, skipna=True) != 'string'
+
+    @cached_property
+    @instrumented
+    def pattern_counts(self) -> pd.Series:
+        """
+        Valores no nulos distintos como texto (índice) con su número de filas.
+        Reutiliza value_counts salvo en columnas object con tipos no texto, donde
+        valores iguales por hash (1, 1.0, True) tienen textos distintos.
+        """
+        if self.mixed_object:
+            return self.series[~self.null_mask].astype(str).value_counts(sort=False)
+        vc = self.value_counts
+        return pd.Series(vc.to_numpy(), index=vc.index.astype(str))
+
+    @cached_property
+    @instrumented
+    def pattern_value_mask(self):
+        """Match del 'pattern' sobre pattern_counts (None si no hay 'pattern')."""
+        pattern = self.schema.get('pattern')
+        if not pattern:
+            return None
+        return match_values(self.pattern_counts.index, pattern)
+
+    @cached_property
+    @instrumented
+    def pattern_mask(self):
+        """Máscara de match fila a fila sobre los valores no nulos (None si no hay 'pattern')."""
+        if self.pattern_value_mask is None:
+            return None
+        s = self.series[~self.null_mask]
+        if self.mixed_object:
+            return s.astype(str).isin(self.pattern_counts.index[self.pattern_value_mask])
+        # pattern_counts sigue el orden de value_counts: se buscan los valores
+        # originales que casan, sin pasar cada fila a texto
+        return s.isin(self.value_counts.index[self.pattern_value_mask])
+
+    @cached_property
+    def n_pattern_matches(self) -> int:
+        if self.pattern_value_mask is None:
+            return 0
+        return int(self.pattern_counts.to_numpy()[self.pattern_value_mask].sum())
+
+    @cached_property
+    def n_pattern_mismatches(self) -> int:
+        if self.pattern_value_mask is None:
+            return 0
+        return int(self.total - self.n_nulls - self.n_pattern_matches)
+
+    @cached_property
+    @instrumented
+    def type_mismatch_mask(self) -> pd.Series:
+        return _type_mismatch_mask(
+            self.series, self.schema.get('type'), self.schema.get('format')
+        )
+
+    @cached_property
+    def n_type_mismatch(self) -> int:
+        return int(self.type_mismatch_mask.sum())
+
+
+def build_profiles(df: pd.DataFrame, schema: dict = None) -> dict:
+    """
+    Crea un ColumnProfile por columna de df. Los escaneos se hacen de forma
+    perezosa, sólo para las métricas que se consulten.
+    Devuelve dict {columna: ColumnProfile}.
+    """
+    schema = schema or {}
+    return {col: ColumnProfile(df[col], schema.get(col)) for col in df.columns}
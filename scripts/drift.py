@@ -0,0 +1,272 @@
+"""
+Almacén de línea base para el drift (SQLite, un único fichero).
+
+- Bordes de bin fijos y versionados por columna: se fijan la primera vez que se
+  ve la columna (o al pedir rebaseline) y todas las ejecuciones siguientes
+  cuentan con los mismos bins, así que las distribuciones son comparables.
+  Los valores fuera del rango original caen en el primer/último bin.
+- Ventana de las últimas `window` ejecuciones por columna: la línea base es la
+  suma de sus histogramas (misma versión de bordes).
+- Columnas categóricas y de texto: un FrequencySketch (Count-Min + heavy
+  hitters) por ejecución, de tamaño fijo aunque haya millones de valores
+  distintos; la línea base es la fusión de los de la ventana.
+- JS y PSI se calculan para todas las columnas a la vez sobre matrices
+  (columnas x bins), y todas las escrituras de una ejecución van en una sola
+  transacción.
+"""
+import os
+import json
+import sqlite3
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from scripts.sketches import FrequencySketch
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bin_edges (
+    column     TEXT NOT NULL,
+    version    INTEGER NOT NULL,
+    edges      TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (column, version)
+);
+CREATE TABLE IF NOT EXISTS histograms (
+    run_id  INTEGER NOT NULL,
+    column  TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    counts  BLOB NOT NULL,
+    PRIMARY KEY (run_id, column)
+);
+CREATE TABLE IF NOT EXISTS frequencies (
+    run_id  INTEGER NOT NULL,
+    column  TEXT NOT NULL,
+    sketch  TEXT NOT NULL,
+    PRIMARY KEY (run_id, column)
+);
+"""
+
+# Evita log(0) en el PSI con bins vacíos
+PSI_EPSILON = 1e-6
+
+
+def _bin_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Conteos con bordes fijos; los valores fuera de rango van a los bins extremos."""
+    idx = np.searchsorted(edges[1:-1], values, side='right')
+    return np.bincount(idx, minlength=len(edges) - 1).astype(np.int64)
+
+
+def _to_matrix(rows: list) -> np.ndarray:
+    """Apila histogramas normalizados, rellenando con ceros si difieren en nº de bins."""
+    width = max(len(r) for r in rows)
+    out = np.zeros((len(rows), width))
+    for i, r in enumerate(rows):
+        total = r.sum()
+        out[i, :len(r)] = r / total if total else 0.0
+    return out
+
+
+def drift_scores(baseline: np.ndarray, current: np.ndarray) -> tuple:
+    """
+    JS distance y PSI fila a fila entre dos matrices de distribuciones (filas = columnas).
+    """
+    # scipy sólo se carga cuando hay drift que calcular
+    from scipy.spatial.distance import jensenshannon
+
+    js = jensenshannon(baseline, current, axis=1)
+    p = np.clip(baseline, PSI_EPSILON, None)
+    q = np.clip(current, PSI_EPSILON, None)
+    psi = ((q - p) * np.log(q / p)).sum(axis=1)
+    return js, psi
+
+
+class DriftStore:
+    """
+    Histogramas (numéricas) y FrequencySketch (categóricas/texto) por columna
+    en SQLite, con bordes fijos y ventana de N ejecuciones.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join('reports', 'drift.sqlite'),
+        bins: int = 10,
+        window: int = 10,
+        top_k: int = 20
+    ):
+        self.path = path
+        self.bins = bins
+        self.window = window
+        self.top_k = top_k
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Bordes -------------------------------------------------------------
+    def edges(self) -> dict:
+        """Bordes vigentes (última versión) por columna: {columna: (version, edges)}."""
+        rows = self.conn.execute(
+            "SELECT column, version, edges FROM bin_edges b WHERE version > 0 "
+            "AND version = (SELECT MAX(version) FROM bin_edges WHERE column = b.column)"
+        ).fetchall()
+        return {col: (version, np.array(json.loads(edges))) for col, version, edges in rows}
+
+    def rebaseline(self, columns: list = None) -> None:
+        """
+        Descarta los bordes vigentes: la próxima ejecución fija una nueva versión
+        con sus datos y la línea base empieza de cero para esas columnas.
+        """
+        with self.conn:
+            if columns is None:
+                self.conn.execute("UPDATE bin_edges SET version = -version WHERE version > 0")
+            else:
+                self.conn.executemany(
+                    "UPDATE bin_edges SET version = -version WHERE column = ? AND version > 0",
+                    [(c,) for c in columns]
+                )
+
+    # --- Ejecución ----------------------------------------------------------
+    def _baselines(self, current: dict) -> dict:
+        """
+        Suma de los histogramas de la ventana por columna (misma versión de bordes).
+        Devuelve {columna: (conteos, nº de ejecuciones)}. La tabla ya está recortada
+        a la ventana, así que se lee entera en una consulta.
+        """
+        out = {}
+        for col, version, counts in self.conn.execute("SELECT column, version, counts FROM histograms"):
+            if col in current and current[col][0] == version:
+                counts = np.frombuffer(counts, dtype=np.int64)
+                prev, n = out.get(col, (0, 0))
+                out[col] = (prev + counts, n + 1)
+        return out
+
+    def _frequency_baselines(self, current: dict) -> dict:
+        """FrequencySketch fusionado de la ventana por columna: {columna: (sketch, nº de ejecuciones)}."""
+        out = {}
+        for col, data in self.conn.execute("SELECT column, sketch FROM frequencies"):
+            if col in current:
+                sketch = FrequencySketch.from_dict(json.loads(data))
+                if col in out:
+                    out[col][0].merge(sketch)
+                    out[col] = (out[col][0], out[col][1] + 1)
+                else:
+                    out[col] = (sketch, 1)
+        return out
+
+    def record(self, df: pd.DataFrame, threshold: float = 0.0) -> dict:
+        """Equivalente a record_stream([df], threshold)."""
+        return self.record_stream([df], threshold)
+
+    def record_stream(self, chunks, threshold: float = 0.0) -> dict:
+        """
+        Acumula los chunks (p.ej. load_data(..., chunksize=N)) y guarda la ejecución:
+          - columnas numéricas: conteos con los bordes fijos (si la columna es
+            nueva, los bordes salen del primer chunk en que aparece);
+          - columnas categóricas/texto/bool: un FrequencySketch fusionado entre
+            chunks; la distribución comparada son los top_k valores de la línea
+            base y de la ejecución más un bin 'resto'.
+        Todas las columnas se comparan con la línea base en una sola operación.
+        Devuelve dict {columna: {'kind', 'js_distance', 'psi', 'drift', 'baseline_runs', 'edges_version'}}.
+        """
+        now = datetime.datetime.now().isoformat()
+        known = self.edges()
+        next_version = dict(self.conn.execute(
+            "SELECT column, MAX(ABS(version)) FROM bin_edges GROUP BY column"
+        ).fetchall())
+        new_edges, current, freqs = [], {}, {}
+        for df in chunks:
+            for col in df.select_dtypes(include=[np.number]).columns:
+                data = df[col].dropna().to_numpy(dtype=float)
+                if not len(data):
+                    continue
+                if col in current:
+                    version, counts = current[col]
+                    current[col] = (version, counts + _bin_counts(data, known[col][1]))
+                    continue
+                if col not in known:
+                    edges = np.histogram_bin_edges(data, bins=self.bins)
+                    known[col] = (next_version.get(col, 0) + 1, edges)
+                    new_edges.append((col, known[col][0], json.dumps(edges.tolist()), now))
+                version, edges = known[col]
+                current[col] = (version, _bin_counts(data, edges))
+            for col in df.select_dtypes(exclude=[np.number, 'datetime', 'datetimetz', 'timedelta']).columns:
+                freqs.setdefault(col, FrequencySketch()).update(df[col].dropna())
+
+        baselines = self._baselines(current)
+        freq_baselines = self._frequency_baselines(freqs)
+        rows = []
+        for col, (version, counts) in current.items():
+            if col in baselines:
+                rows.append((col, baselines[col][0], counts))
+        for col, sketch in freqs.items():
+            if col in freq_baselines and sketch.n:
+                base = freq_baselines[col][0]
+                keys = np.unique(np.concatenate([base.top(self.top_k), sketch.top(self.top_k)]))
+                p, q = base.estimate(keys), sketch.estimate(keys)
+                # Bin 'resto': lo que no cubren los valores frecuentes
+                rows.append((
+                    col,
+                    np.append(p, max(base.n - p.sum(), 0)),
+                    np.append(q, max(sketch.n - q.sum(), 0))
+                ))
+
+        report = {}
+        if rows:
+            js, psi = drift_scores(_to_matrix([r[1] for r in rows]), _to_matrix([r[2] for r in rows]))
+            for (c, _, _), j, p in zip(rows, js, psi):
+                report[c] = {
+                    'js_distance': round(float(j), 4),
+                    'psi': round(float(p), 4),
+                    # JS NaN (distribución vacía) se trata como drift
+                    'drift': bool(np.isnan(j) or j >= threshold)
+                }
+        for col, (version, _) in current.items():
+            report.setdefault(col, {'js_distance': None, 'psi': None, 'drift': False})
+            report[col].update({
+                'kind': 'numeric',
+                'baseline_runs': baselines.get(col, (None, 0))[1],
+                'edges_version': version
+            })
+        for col in freqs:
+            if col in current:
+                continue
+            report.setdefault(col, {'js_distance': None, 'psi': None, 'drift': False})
+            report[col].update({
+                'kind': 'categorical',
+                'baseline_runs': freq_baselines.get(col, (None, 0))[1],
+                'edges_version': None
+            })
+
+        # Una sola transacción: run, bordes nuevos, histogramas, sketches y recorte de la ventana
+        with self.conn:
+            run_id = self.conn.execute("INSERT INTO runs (created_at) VALUES (?)", (now,)).lastrowid
+            self.conn.executemany("INSERT INTO bin_edges VALUES (?, ?, ?, ?)", new_edges)
+            self.conn.executemany(
+                "INSERT INTO histograms VALUES (?, ?, ?, ?)",
+                [(run_id, col, version, counts.tobytes()) for col, (version, counts) in current.items()]
+            )
+            self.conn.executemany(
+                "INSERT INTO frequencies VALUES (?, ?, ?)",
+                [(run_id, col, json.dumps(sketch.to_dict())) for col, sketch in freqs.items() if sketch.n]
+            )
+            for table, cols in (('histograms', current), ('frequencies', freqs)):
+                self.conn.executemany(
+                    f"DELETE FROM {table} WHERE column = ? AND run_id NOT IN ("
+                    f"SELECT run_id FROM {table} WHERE column = ? ORDER BY run_id DESC LIMIT ?)",
+                    [(col, col, self.window) for col in cols]
+                )
+        return report
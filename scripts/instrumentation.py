@@ -0,0 +1,204 @@
+"""
+Instrumentación de una ejecución del audit (run_metrics.json).
+
+- Etapas: tiempo real, tiempo de CPU, filas/s y memoria (pico de RSS del
+  proceso al terminar la etapa y cuánto ha crecido ese pico durante ella).
+- Métricas por columna: los escaneos de ColumnProfile decorados con
+  @instrumented suman por (columna, métrica) tiempo real, tiempo de CPU, filas
+  (filas/s) y crecimiento del pico de RSS mientras haya un RunMetrics activo.
+  Los valores son exclusivos: si pattern_counts necesita value_counts, cada
+  uno cuenta sólo lo suyo. En los procesos de --workers no
+  hay RunMetrics activo y sólo se miden las etapas.
+- Perfilado opcional de toda la ejecución con pyinstrument (si está
+  instalado) o cProfile.
+"""
+import os
+import sys
+import json
+import time
+import datetime
+import resource
+from functools import wraps
+
+_ACTIVE = None
+
+
+def peak_rss_mb() -> float:
+    """Pico de RSS del proceso (ru_maxrss: KiB en Linux, bytes en macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def instrumented(func):
+    """Decorador para los escaneos por columna (métodos de ColumnProfile)."""
+    @wraps(func)
+    def wrapper(self):
+        if _ACTIVE is None:
+            return func(self)
+        return _ACTIVE.time_column(self.name, func.__name__, func, self, rows=self.total)
+    return wrapper
+
+
+def _column_entry(acc: dict) -> dict:
+    wall = acc['wall_s']
+    return {
+        'wall_s': round(wall, 6),
+        'cpu_s': round(acc['cpu_s'], 6),
+        'rows': acc['rows'],
+        'rows_per_s': round(acc['rows'] / wall, 1) if acc['rows'] and wall > 0 else None,
+        'peak_rss_growth_mb': round(acc['peak_rss_growth_mb'], 1)
+    }
+
+
+class RunMetrics:
+    """
+    Registro de etapas secuenciales: stage(nombre) cierra la etapa en curso y
+    abre la siguiente; finish() cierra la última.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.datetime.now().isoformat()
+        self.rows = None
+        self.stages = []
+        self.columns = {}
+        self._current = None
+        self._stack = []
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+
+    # --- Activación -----------------------------------------------------------
+    def __enter__(self):
+        global _ACTIVE
+        self._previous = _ACTIVE
+        _ACTIVE = self
+        return self
+
+    def __exit__(self, *exc):
+        global _ACTIVE
+        self.finish()
+        _ACTIVE = self._previous
+
+    # --- Etapas ---------------------------------------------------------------
+    def stage(self, name: str, rows: int = None) -> None:
+        """Empieza una etapa; rows por defecto es el nº de filas de la ejecución."""
+        self._close()
+        self._current = {
+            'name': name,
+            'rows': rows,
+            't0': time.perf_counter(),
+            'cpu0': time.process_time(),
+            'rss0': peak_rss_mb()
+        }
+
+    def _close(self) -> None:
+        cur = self._current
+        if cur is None:
+            return
+        wall = time.perf_counter() - cur['t0']
+        rows = cur['rows'] if cur['rows'] is not None else self.rows
+        rss = peak_rss_mb()
+        self.stages.append({
+            'stage': cur['name'],
+            'wall_s': round(wall, 4),
+            'cpu_s': round(time.process_time() - cur['cpu0'], 4),
+            'rows': rows,
+            'rows_per_s': round(rows / wall, 1) if rows and wall > 0 else None,
+            'peak_rss_mb': rss,
+            'peak_rss_growth_mb': round(rss - cur['rss0'], 1)
+        })
+        self._current = None
+
+    def finish(self) -> None:
+        self._close()
+
+    # --- Columnas -------------------------------------------------------------
+    def time_column(self, column, metric: str, func, *args, rows: int = None):
+        """
+        Ejecuta func(*args) y suma a (column, metric) su tiempo real, de CPU,
+        filas y crecimiento del pico de RSS, descontando los escaneos anidados.
+        """
+        start = (time.perf_counter(), time.process_time(), peak_rss_mb())
+        self._stack.append([0.0, 0.0, 0.0])
+        try:
+            return func(*args)
+        finally:
+            end = (time.perf_counter(), time.process_time(), peak_rss_mb())
+            spent = [b - a for a, b in zip(start, end)]
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] = [p + x for p, x in zip(self._stack[-1], spent)]
+            col = self.columns.setdefault(str(column), {})
+            acc = col.setdefault(metric, {'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0, 'peak_rss_growth_mb': 0.0})
+            acc['wall_s'] += spent[0] - children[0]
+            acc['cpu_s'] += spent[1] - children[1]
+            acc['peak_rss_growth_mb'] += spent[2] - children[2]
+            acc['rows'] += rows or 0
+
+    # --- Salida ---------------------------------------------------------------
+    def to_dict(self) -> dict:
+        wall = time.perf_counter() - self._t0
+        return {
+            'started_at': self.started_at,
+            'rows': self.rows,
+            'total': {
+                'wall_s': round(wall, 4),
+                'cpu_s': round(time.process_time() - self._cpu0, 4),
+                'rows_per_s': round(self.rows / wall, 1) if self.rows and wall > 0 else None,
+                'peak_rss_mb': peak_rss_mb()
+            },
+            'stages': self.stages,
+            'columns': {
+                col: {metric: _column_entry(acc) for metric, acc in metrics.items()}
+                for col, metrics in self.columns.items()
+            }
+        }
+
+    def write(self, directory: str) -> str:
+        """Escribe directory/run_metrics.json y devuelve la ruta."""
+        self.finish()
+        path = os.path.join(directory, 'run_metrics.json')
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+class RunProfiler:
+    """pyinstrument si está instalado (HTML); si no, cProfile (.prof + resumen .txt)."""
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+            self.kind = 'pyinstrument'
+            self._profiler = Profiler()
+        except ImportError:
+            import cProfile
+            self.kind = 'cprofile'
+            self._profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        if self.kind == 'pyinstrument':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self) -> None:
+        if self.kind == 'pyinstrument':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def dump(self, directory: str) -> str:
+        """Guarda el perfil en directory y devuelve la ruta principal."""
+        os.makedirs(directory, exist_ok=True)
+        if self.kind == 'pyinstrument':
+            path = os.path.join(directory, 'profile.html')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self._profiler.output_html())
+            return path
+        import pstats
+        path = os.path.join(directory, 'profile.prof')
+        self._profiler.dump_stats(path)
+        with open(os.path.join(directory, 'profile.txt'), 'w', encoding='utf-8') as f:
+            pstats.Stats(path, stream=f).sort_stats('cumulative').print_stats(50)
+        return path
@@ -0,0 +1,190 @@
+"""
+Integridad referencial a escala: la clave del padre se indexa en disco y la
+tabla hija se comprueba por chunks contra ese índice, sin cargar ninguna de
+las dos tablas completas.
+
+Índice (KeyIndex): hashes uint64 (ver sketches.hash_values) de las claves del
+padre, únicos y ordenados, en un fichero `keys.u64` que se abre con memmap; la
+búsqueda es binaria (np.searchsorted). Se construye con un reparto por los 8
+bits altos del hash en 256 ficheros temporales, así que la memoria necesaria es
+~1/256 de las claves. Las claves compuestas combinan el hash de cada columna.
+Con hashes de 64 bits una clave huérfana puede darse por válida sólo por
+colisión (probabilidad ~n_padre/2**64 por clave).
+
+El índice se guarda con el tamaño y mtime del fichero padre y se reutiliza entre
+ejecuciones hasta que el fichero cambia.
+"""
+import os
+import json
+import shutil
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from scripts.load import load_data
+from scripts.sketches import hash_values
+
+INDEX_VERSION = 1
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _as_keys(keys) -> list:
+    return [keys] if isinstance(keys, str) else list(keys)
+
+
+def key_hashes(df: pd.DataFrame, keys) -> tuple:
+    """
+    Hash uint64 por fila de la clave (simple o compuesta).
+    Devuelve (hashes, null_mask); null_mask marca filas con algún componente nulo.
+    """
+    keys = _as_keys(keys)
+    null_mask = df[keys].isnull().any(axis=1).to_numpy()
+    hashes = hash_values(df[keys[0]])
+    for col in keys[1:]:
+        with np.errstate(over='ignore'):
+            hashes = pd.util.hash_array(hashes ^ (hash_values(df[col]) * _MIX))
+    return hashes, null_mask
+
+
+class KeyIndex:
+    """Conjunto ordenado de hashes de clave del padre, abierto con memmap."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        path = os.path.join(directory, 'keys.u64')
+        if self.meta['n_keys']:
+            self.keys = np.memmap(path, dtype=np.uint64, mode='r')
+        else:
+            self.keys = np.empty(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return int(self.meta['n_keys'])
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """Máscara booleana: qué hashes están en el índice."""
+        if not len(self.keys):
+            return np.zeros(len(hashes), dtype=bool)
+        pos = np.searchsorted(self.keys, hashes)
+        pos[pos == len(self.keys)] = 0
+        return self.keys[pos] == hashes
+
+
+def _source_stat(path: str) -> dict:
+    st = os.stat(path)
+    return {'source': os.path.abspath(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def build_key_index(parent_path: str, keys, directory: str, chunksize: int = 1_000_000) -> KeyIndex:
+    """
+    Lee sólo las columnas clave del padre por chunks y escribe el índice en
+    `directory` (se reemplaza si ya existía).
+    """
+    keys = _as_keys(keys)
+    stat = _source_stat(parent_path)
+    tmp = f"{directory}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    # 1. Reparto por los 8 bits altos: cada cubo se ordena por separado
+    buckets = [open(os.path.join(tmp, f'bucket_{b:03d}.u64'), 'wb') for b in range(256)]
+    try:
+        for chunk in load_data(parent_path, chunksize=chunksize, columns=keys):
+            missing = [k for k in keys if k not in chunk.columns]
+            if missing:
+                raise KeyError(f"Columnas clave no encontradas en {parent_path}: {missing}")
+            hashes, null_mask = key_hashes(chunk, keys)
+            hashes = np.unique(hashes[~null_mask])
+            bounds = np.searchsorted(hashes >> np.uint64(56), np.arange(257, dtype=np.uint64))
+            for b in np.flatnonzero(np.diff(bounds)):
+                hashes[bounds[b]:bounds[b + 1]].tofile(buckets[b])
+    finally:
+        for f in buckets:
+            f.close()
+
+    # 2. Cubos en orden -> fichero global ordenado y sin repetidos
+    n_keys = 0
+    with open(os.path.join(tmp, 'keys.u64'), 'wb') as out:
+        for b in range(256):
+            path = os.path.join(tmp, f'bucket_{b:03d}.u64')
+            part = np.unique(np.fromfile(path, dtype=np.uint64))
+            part.tofile(out)
+            n_keys += len(part)
+            os.remove(path)
+
+    with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({**stat, 'keys': keys, 'n_keys': n_keys, 'version': INDEX_VERSION}, f, indent=2)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+    return KeyIndex(directory)
+
+
+def parent_key_index(
+    parent_path: str,
+    keys,
+    index_dir: str = os.path.join('.state', 'ri_index'),
+    chunksize: int = 1_000_000
+) -> KeyIndex:
+    """
+    Devuelve el índice de claves del padre, reutilizando el guardado en
+    index_dir si el fichero no ha cambiado (tamaño y mtime) y construyéndolo si no.
+    """
+    keys = _as_keys(keys)
+    ident = json.dumps([os.path.abspath(parent_path), keys])
+    directory = os.path.join(index_dir, hashlib.sha1(ident.encode('utf-8')).hexdigest()[:16])
+    meta_path = os.path.join(directory, 'meta.json')
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        expected = {**_source_stat(parent_path), 'keys': keys, 'version': INDEX_VERSION}
+        if all(meta.get(k) == v for k, v in expected.items()):
+            return KeyIndex(directory)
+    return build_key_index(parent_path, keys, directory, chunksize)
+
+
+def check_referential_integrity(chunks, index: KeyIndex, child_keys, sample_size: int = 20) -> pd.DataFrame:
+    """
+    Comprueba cada chunk de la tabla hija contra el índice del padre.
+    Las filas con algún componente de la clave nulo no se comprueban (como una
+    FK en SQL) y se cuentan aparte.
+    Devuelve un DataFrame de una fila con:
+      - key, n_total, n_missing, pct_missing, pct_valid, n_null_keys
+      - orphan_sample: hasta sample_size claves huérfanas distintas
+    """
+    child_keys = _as_keys(child_keys)
+    if len(child_keys) != len(index.meta['keys']):
+        raise ValueError(
+            f"La clave hija {child_keys} no tiene las mismas columnas que la del padre {index.meta['keys']}"
+        )
+    total, n_missing, n_null = 0, 0, 0
+    sample, seen = [], set()
+    for chunk in chunks:
+        hashes, null_mask = key_hashes(chunk, child_keys)
+        missing = ~index.contains(hashes) & ~null_mask
+        total += len(chunk)
+        n_null += int(null_mask.sum())
+        n_missing += int(missing.sum())
+        if len(sample) < sample_size and missing.any():
+            orphan_hashes = hashes[missing]
+            first = ~pd.Series(orphan_hashes).duplicated().to_numpy()
+            rows = chunk.loc[missing, child_keys][first].itertuples(index=False, name=None)
+            for h, row in zip(orphan_hashes[first], rows):
+                if h in seen:
+                    continue
+                seen.add(h)
+                sample.append(row[0] if len(child_keys) == 1 else row)
+                if len(sample) == sample_size:
+                    break
+
+    n_valid = total - n_missing - n_null
+    return pd.DataFrame([{
+        'key': ','.join(child_keys),
+        'n_total': total,
+        'n_missing': n_missing,
+        'pct_missing': round(n_missing / total * 100, 2) if total else 0.0,
+        'pct_valid': round(n_valid / total * 100, 2) if total else 0.0,
+        'n_null_keys': n_null,
+        'orphan_sample': sample
+    }])
@@ -1,6 +1,5 @@
 import os
 import json
-import shutil
 import datetime
 
 import pandas as pd
@@ -20,20 +19,17 @@ def save_json(data: dict, path: str):
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
-def archive_reports(outdir: str) -> str:
-    """
-    Mueve todo el contenido de outdir a una subcarpeta timestamped dentro de outdir/archive.
-    Devuelve la ruta destino.
-    """
-    ts = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-    dest = os.path.join(outdir, "archive", ts)
-    os.makedirs(dest, exist_ok=True)
-    for fname in os.listdir(outdir):
-        src = os.path.join(outdir, fname)
-        if src == dest or fname == "archive":
-            continue
-        shutil.move(src, dest)
-    return dest
+def archive_reports(outdir: str, run_id: str = None, **options) -> str:
+    """
+    Archiva todo el contenido de outdir (salvo outdir/archive) en el archivo por
+    contenido outdir/archive (ver scripts.archive.ReportArchive) y lo retira de outdir.
+    options: codec, keep_runs, keep_days. Con run_id añade los ficheros a esa ejecución.
+    Devuelve el run_id.
+    """
+    from scripts.archive import ReportArchive
+
+    with ReportArchive(os.path.join(outdir, "archive"), **options) as archive:
+        return archive.commit(outdir, run_id)
 
 def write_manifest(outdir: str, input_csv: str, schema_version: str, row_count: int):
     """
@@ -1,22 +1,359 @@
 import os
+import numpy as np
 import pandas as pd
 
-def load_data(path: str, since: str = None) -> pd.DataFrame:
+COLUMNAR_FORMATS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'ipc',
+    '.feather': 'ipc',
+    '.ipc': 'ipc',
+}
+
+# Bases de datos locales: sólo las lee el backend SQL (--backend duckdb)
+DATABASE_FORMATS = {
+    '.duckdb': 'duckdb',
+    '.db': 'duckdb',
+    '.sqlite': 'sqlite',
+    '.sqlite3': 'sqlite',
+}
+
+def input_format(path: str) -> str:
+    """
+    Formato de entrada según la extensión: 'parquet', 'ipc' (Arrow IPC/Feather),
+    'duckdb', 'sqlite' o 'csv'.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    return COLUMNAR_FORMATS.get(ext) or DATABASE_FORMATS.get(ext, 'csv')
+
+def input_columns(path: str) -> list:
+    """
+    Columnas de la entrada sin leer los datos (cabecera del CSV o esquema del
+    Parquet/IPC); None en bases de datos (dependen de la tabla).
+    """
+    fmt = input_format(path)
+    if fmt in DATABASE_FORMATS.values():
+        return None
+    if fmt != 'csv':
+        import pyarrow.dataset as ds
+        return ds.dataset(path, format=fmt).schema.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def _filter_since(df: pd.DataFrame, since: str = None) -> pd.DataFrame:
+    if since and "updated_at" in df.columns:
+        df = df[df["updated_at"] > since]
+    return df
+
+def _iter_chunks(reader, since: str = None, drop: list = None):
+    with reader:
+        for chunk in reader:
+            chunk = _filter_since(chunk, since)
+            yield chunk.drop(columns=drop) if drop else chunk
+
+def _since_expression(source, since: str):
+    """
+    Expresión `updated_at > since` con el tipo del campo (source: dataset o
+    tabla de pyarrow), para que pyarrow descarte row groups por sus
+    estadísticas (min/max) sin leerlos.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    field_type = source.schema.field('updated_at').type
+    if pa.types.is_timestamp(field_type):
+        ts = pd.Timestamp(since)
+        if field_type.tz is not None and ts.tz is None:
+            ts = ts.tz_localize(field_type.tz)
+        value = pa.scalar(ts.to_pydatetime(), type=pa.timestamp('us', tz=field_type.tz))
+    elif pa.types.is_date(field_type):
+        value = pa.scalar(pd.Timestamp(since).date())
+    else:
+        value = pa.scalar(since)
+    return ds.field('updated_at') > value
+
+def _load_columnar(path: str, fmt: str, since: str = None, chunksize: int = None, columns: list = None):
+    try:
+        import pyarrow.dataset as ds
+    except ImportError as exc:
+        raise ImportError("Leer Parquet/Arrow IPC requiere pyarrow (pip install pyarrow)") from exc
+
+    dataset = ds.dataset(path, format=fmt)
+    names = dataset.schema.names
+    if columns is not None:
+        columns = [c for c in names if c in set(columns)]
+    filter_expr = None
+    if since and 'updated_at' in names:
+        filter_expr = _since_expression(dataset, since)
+
+    if chunksize:
+        batches = dataset.to_batches(columns=columns, filter=filter_expr, batch_size=chunksize)
+        return (batch.to_pandas() for batch in batches if batch.num_rows)
+    return dataset.to_table(columns=columns, filter=filter_expr).to_pandas()
+
+# Lo que pd.read_csv lee por defecto como nulo o booleano: el motor pyarrow
+# usa lo mismo para que los informes no dependan del motor
+_NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+              '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+_TRUE_VALUES = ['True', 'TRUE', 'true']
+_FALSE_VALUES = ['False', 'FALSE', 'false']
+# Bloques de open_csv (modo streaming); los tipos se infieren en el primero
+_ARROW_BLOCK_SIZE = 16 << 20
+CSV_ENGINES = ('pandas', 'pyarrow')
+
+
+def _text_columns(columns: list, schema: dict) -> list:
+    """
+    Columnas de texto del esquema (tipo que no es integer/number): se leen como
+    str con los dos motores, sin inferencia, así que un código postal '08001' no
+    pasa a número y el tipo no cambia de un chunk a otro.
+    """
+    return [
+        col for col in columns
+        if col != 'updated_at' and (schema.get(col) or {}).get('type') not in (None, 'integer', 'number')
+    ]
+
+
+def _arrow_csv_options(columns: list, schema: dict, has_updated_at: bool, block_size: int = None) -> tuple:
+    """
+    (ReadOptions, ConvertOptions) de pyarrow.csv para leer `columns`:
+    - parseo por bloques en varios hilos;
+    - columnas de texto del esquema como string (ver _text_columns);
+    - sin inferir fechas (pandas tampoco lo hace): 'updated_at' se lee como
+      texto y se convierte después (ver _parse_updated_at).
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+
+    column_types = {col: pa.string() for col in _text_columns(columns, schema)}
+    if has_updated_at:
+        column_types['updated_at'] = pa.string()
+    read_options = pcsv.ReadOptions(use_threads=True, **({'block_size': block_size} if block_size else {}))
+    convert_options = pcsv.ConvertOptions(
+        include_columns=columns,
+        column_types=column_types,
+        null_values=_NA_VALUES,
+        true_values=_TRUE_VALUES,
+        false_values=_FALSE_VALUES,
+        strings_can_be_null=True,
+        timestamp_parsers=[]
+    )
+    return read_options, convert_options
+
+
+def _parse_updated_at(table):
+    """'updated_at' como timestamp; si algún valor no es fecha queda como texto (como parse_dates)."""
+    import pyarrow as pa
+
+    i = table.schema.get_field_index('updated_at')
+    if i < 0 or not pa.types.is_string(table.schema.field(i).type):
+        return table
+    try:
+        parsed = table.column(i).cast(pa.timestamp('us'))
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return table
+    return table.set_column(i, 'updated_at', parsed)
+
+
+def _arrow_to_pandas(table, since: str = None, drop: list = None) -> pd.DataFrame:
+    table = _parse_updated_at(table)
+    if since and 'updated_at' in table.schema.names:
+        # Se filtra en Arrow: sólo se convierten a pandas las filas nuevas
+        table = table.filter(_since_expression(table, since))
+    if drop:
+        table = table.drop_columns(drop)
+    return table.to_pandas()
+
+
+def _rebatch(reader, chunksize: int):
+    """Tablas de chunksize filas (la última, el resto) a partir de los bloques de open_csv."""
+    import pyarrow as pa
+
+    pending, n = [], 0
+    for batch in reader:
+        pending.append(batch)
+        n += batch.num_rows
+        if n < chunksize:
+            continue
+        table = pa.Table.from_batches(pending)
+        while table.num_rows >= chunksize:
+            yield table.slice(0, chunksize)
+            table = table.slice(chunksize)
+        pending, n = table.to_batches(), table.num_rows
+    if n:
+        yield pa.Table.from_batches(pending)
+
+
+def _iter_arrow_chunks(path: str, reader, chunksize: int, usecols: list, text_columns: list,
+                       has_updated_at: bool, since: str = None, drop: list = None):
+    import pyarrow as pa
+
+    done = 0
+    try:
+        for table in _rebatch(reader, chunksize):
+            done += table.num_rows
+            # Como con pandas, también los chunks que el filtro deja vacíos
+            yield _arrow_to_pandas(table, since, drop)
+        return
+    except pa.ArrowInvalid:
+        # open_csv fija los tipos con el primer bloque: un valor posterior que no
+        # encaja (texto o 1.5 en una columna entera) no se puede convertir. El
+        # resto del fichero, desde la primera fila no entregada, se lee con pandas.
+        pass
+    finally:
+        reader.close()
+    rest = pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype={col: str for col in text_columns},
+        parse_dates=["updated_at"] if has_updated_at else None,
+        chunksize=chunksize
+    )
+    # Se descartan por registros, no por líneas: un campo entre comillas puede
+    # ocupar varias líneas
+    while done:
+        done -= len(rest.get_chunk(min(done, chunksize)))
+    yield from _iter_chunks(rest, since, drop)
+
+
+def _load_csv_arrow(path: str, usecols: list, schema: dict, has_updated_at: bool,
+                    since: str = None, chunksize: int = None, drop: list = None):
+    try:
+        import pyarrow.csv as pcsv
+    except ImportError as exc:
+        raise ImportError("El motor CSV pyarrow requiere pyarrow (pip install pyarrow)") from exc
+
+    if chunksize:
+        read_options, convert_options = _arrow_csv_options(usecols, schema, has_updated_at, _ARROW_BLOCK_SIZE)
+        reader = pcsv.open_csv(path, read_options=read_options, convert_options=convert_options)
+        return _iter_arrow_chunks(
+            path, reader, chunksize, usecols, _text_columns(usecols, schema), has_updated_at, since, drop
+        )
+    read_options, convert_options = _arrow_csv_options(usecols, schema, has_updated_at)
+    table = pcsv.read_csv(path, read_options=read_options, convert_options=convert_options)
+    return _arrow_to_pandas(table, since, drop)
+
+
+def load_data(path: str, since: str = None, chunksize: int = None, columns: list = None,
+              engine: str = 'pandas', schema: dict = None):
     """
-    Lee un CSV desde la ruta dada y devuelve un DataFrame.
-    Si existe columna 'updated_at' y se pasa 'since', filtra filas posteriores.
+    Lee un CSV, Parquet o Arrow IPC (según la extensión) y devuelve un DataFrame.
+    Si existe columna 'updated_at' y se pasa 'since', filtra filas posteriores;
+    en Parquet/IPC el filtro se empuja al lector y sólo se leen los row groups
+    que pueden contener filas nuevas.
+    Con 'columns' sólo se leen esas columnas (las inexistentes se ignoran).
+    Con 'chunksize' devuelve un iterador de DataFrames de hasta chunksize filas
+    (modo streaming), ya filtrados por 'since'.
+    engine: motor de los CSV, 'pandas' (pd.read_csv, un hilo) o 'pyarrow'
+    (pyarrow.csv en varios hilos). Con los dos, las columnas de texto del
+    esquema `schema` se leen como str (ver _text_columns); con pyarrow en
+    streaming los demás tipos se infieren en el primer bloque de 16 MB y, si
+    un bloque posterior no encaja, el resto del fichero se lee con pandas.
     Lanza FileNotFoundError si el archivo no existe.
     """
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Motor CSV no soportado: {engine} (opciones: {', '.join(CSV_ENGINES)})")
     if not os.path.exists(path):
         raise FileNotFoundError(f"Archivo no encontrado: {path}")
 
-    # Intentamos parsear 'updated_at' si existe
-    try:
-        df = pd.read_csv(path, parse_dates=["updated_at"])
-    except ValueError:
-        df = pd.read_csv(path)
+    fmt = input_format(path)
+    if fmt in DATABASE_FORMATS.values():
+        raise ValueError(f"{path} es una base de datos {fmt}: se audita con --backend duckdb")
+    if fmt != 'csv':
+        return _load_columnar(path, fmt, since, chunksize, columns)
+
+    # La cabecera decide si hay que parsear 'updated_at': el fichero se lee una sola vez
+    header = input_columns(path)
+    has_updated_at = "updated_at" in header
+    usecols, drop = None, None
+    if columns is not None:
+        usecols = [c for c in header if c in set(columns)]
+        if since and has_updated_at and "updated_at" not in usecols:
+            # Se necesita para filtrar, pero no se devuelve
+            usecols.append("updated_at")
+            drop = ["updated_at"]
+        has_updated_at = "updated_at" in usecols
+
+    if engine == 'pyarrow':
+        return _load_csv_arrow(path, usecols or header, schema or {}, has_updated_at, since, chunksize, drop)
+
+    df = pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype={col: str for col in _text_columns(usecols or header, schema or {})},
+        parse_dates=["updated_at"] if has_updated_at else None,
+        chunksize=chunksize
+    )
+
+    if chunksize:
+        return _iter_chunks(df, since, drop)
 
     # Filtrado incremental si updated_at y since proporcionados
-    if since and "updated_at" in df.columns:
-        df = df[df["updated_at"] > since]
-    return df
+    df = _filter_since(df, since)
+    return df.drop(columns=drop) if drop else df
+
+def _integer_dtype(s: pd.Series):
+    """Entero más pequeño (8/16/32/64 bits) que contiene todos los valores de una columna entera."""
+    values = s.to_numpy()
+    lo, hi = (values.min(), values.max()) if len(values) else (0, 0)
+    for bits in (8, 16, 32, 64):
+        info = np.iinfo(f'int{bits}')
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(f'int{bits}')
+    return None
+
+def compact_dtypes(df: pd.DataFrame, schema: dict, category_ratio: float = 0.5) -> tuple:
+    """
+    Convierte las columnas a dtypes compactos según el 'type' del esquema, sin
+    cambiar ningún valor:
+      - integer: el entero más pequeño que los contiene (int8..int64). Un float
+        con valores enteros (el que deja pandas al leer enteros con huecos) se
+        deja como está: pasarlo a IntN cambiaría los desajustes de tipo y de
+        patrón que se reportan.
+      - number: enteros reducidos igual; float64 -> float32 sólo si ningún valor
+        cambia (y la columna no tiene 'pattern', porque el texto del float32 difiere).
+      - texto (cualquier tipo no numérico, fechas incluidas): category si hay pocos
+        distintos (distintos/no nulos <= category_ratio); si no, cadenas pyarrow.
+    Las columnas con valores que no encajan en el tipo se dejan como están: los
+    informes son los mismos con y sin compactar.
+    Devuelve (df convertido, informe por columna con dtype y bytes antes/después).
+    """
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        col_type = (schema.get(col) or {}).get('type')
+        dtype = s.dtype
+        new = None
+        if isinstance(dtype, np.dtype) and dtype.kind in 'iu' and col_type in (None, 'integer', 'number'):
+            new = _integer_dtype(s)
+        elif isinstance(dtype, np.dtype) and dtype.kind == 'f':
+            if col_type == 'number' and dtype.itemsize > 4 and not (schema.get(col) or {}).get('pattern'):
+                values = s.to_numpy()
+                if np.array_equal(values.astype(np.float32).astype(dtype), values, equal_nan=True):
+                    new = np.dtype('float32')
+        elif (col_type not in ('integer', 'number')
+              and (isinstance(dtype, pd.StringDtype)
+                   or (dtype == object and pd.api.types.infer_dtype(s, skipna=True) == 'string'))):
+            n_valid = int(s.notna().sum())
+            if n_valid and s.nunique(dropna=True) <= category_ratio * n_valid:
+                new = 'category'
+            elif dtype == object:
+                try:
+                    new = pd.StringDtype('pyarrow')
+                except ImportError:  # pragma: no cover - pyarrow es opcional
+                    new = None
+        if new is not None and new != dtype:
+            out[col] = s.astype(new)
+
+    before = df.memory_usage(deep=True, index=False)
+    compact = df.copy(deep=False) if out else df
+    for col, s in out.items():
+        compact[col] = s
+    after = compact.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'column': df.columns,
+        'dtype_before': [str(t) for t in df.dtypes],
+        'dtype_after': [str(t) for t in compact.dtypes],
+        'bytes_before': before.to_numpy(),
+        'bytes_after': after.to_numpy(),
+    })
+    return compact, report
@@ -1,22 +1,36 @@
 import os
+import sys
+import json
 import subprocess
 import datetime
 import click
-import pandas as pd
 
-from scripts.load import load_data
-from scripts.rules import infer_schema, load_rules, apply_business_rules
+from scripts.load import load_data, input_format, input_columns, compact_dtypes
+from scripts.rules import infer_schema, load_rules, apply_business_rules, referenced_columns
+from scripts.column_profile import build_profiles
+from scripts.instrumentation import RunMetrics, RunProfiler
 from scripts.metrics import (
     compute_quality_metrics,
     compute_statistical_profile,
     validate_patterns,
 )
+from scripts.score import build_summary, parse_weights
 from scripts.io_utils import save_csv, save_json, archive_reports, write_manifest
-from scripts.alerts import send_slack
-from scripts.remediation import apply_remediation
+# Los módulos de etapas opcionales (streaming, --workers, --state-store, --parent,
+# remediación, alertas, HTML) se importan dentro de su etapa: una ejecución
+# simple no paga su coste de arranque (scipy, jinja2, pyarrow...).
+
+def _weights_option(ctx, param, value: str) -> dict:
+    if value is None:
+        return None
+    try:
+        return parse_weights(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
 
 @click.command()
-@click.option('--input',  'input_csv',  required=True, help='Ruta al CSV de datos')
+@click.option('--input',  'input_csv',  default=None, help='Ruta al CSV, Parquet o Arrow IPC de datos')
 @click.option('--rules',  'rules_yml',  required=True, help='Ruta a rules.yml')
 @click.option('--outdir','outdir',      default='reports', help='Carpeta de salida')
 @click.option(
@@ -24,100 +38,511 @@ from scripts.remediation import apply_remediation
     is_flag=True,
     help='Aplicar correcciones automáticas según reglas configuradas'
 )
-def main(input_csv, rules_yml, outdir, remediate):
+@click.option(
+    '--chunksize',
+    type=int,
+    default=None,
+    help='Procesar el CSV en streaming, en bloques de N filas (no carga el fichero completo)'
+)
+@click.option(
+    '--csv-engine',
+    type=click.Choice(['pandas', 'pyarrow']),
+    default='pandas',
+    help='Lector de CSV: pandas (un hilo) o pyarrow.csv (por bloques en varios hilos, tipos de texto del esquema)'
+)
+@click.option(
+    '--profile-method',
+    type=click.Choice(['exact', 'sketch']),
+    default='exact',
+    help='Perfil estadístico exacto o con sketches KLL (una pasada, memoria acotada)'
+)
+@click.option(
+    '--workers',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Procesos para repartir el trabajo por columnas (resultado idéntico al modo serie)'
+)
+@click.option(
+    '--state-store',
+    'state_store',
+    default=None,
+    help='Carpeta del estado de métricas persistente: informes de tabla completa procesando sólo el delta'
+)
+@click.option(
+    '--rebuild-state',
+    is_flag=True,
+    help='Recalcular el estado de --state-store desde cero con el fichero completo'
+)
+@click.option(
+    '--parent',
+    'parent_path',
+    default=None,
+    help='Tabla padre (CSV, Parquet o Arrow IPC) para validar integridad referencial'
+)
+@click.option(
+    '--parent-key',
+    default=None,
+    help='Clave del padre; varias columnas separadas por comas para claves compuestas'
+)
+@click.option(
+    '--child-key',
+    default=None,
+    help='Clave de la tabla auditada (por defecto, las mismas columnas que --parent-key)'
+)
+@click.option(
+    '--compact-dtypes',
+    'compact',
+    is_flag=True,
+    help='Convertir al cargar a dtypes compactos según el esquema (enteros pequeños, category, float32 sin pérdida)'
+)
+@click.option(
+    '--archive-codec',
+    type=click.Choice(['zstd', 'gzip', 'none']),
+    default=None,
+    help='Compresión del archivo de informes (por defecto zstd si pyarrow lo soporta, si no gzip)'
+)
+@click.option(
+    '--keep-runs',
+    type=click.IntRange(min=1),
+    default=None,
+    help='Retención: ejecuciones que se conservan en outdir/archive'
+)
+@click.option(
+    '--keep-days',
+    type=click.FloatRange(min=0),
+    default=None,
+    help='Retención: días que se conservan las ejecuciones archivadas'
+)
+@click.option(
+    '--batch',
+    'batch_spec',
+    default=None,
+    help='Glob o manifest (una ruta por línea) de datasets a auditar en un solo proceso (en lugar de --input)'
+)
+@click.option(
+    '--jobs',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Con --batch: nº de datasets auditados a la vez (procesos del pool)'
+)
+@click.option(
+    '--backend',
+    type=click.Choice(['pandas', 'duckdb']),
+    default='pandas',
+    help='Motor de las métricas: pandas en memoria o una única consulta SQL en DuckDB (fuera de memoria)'
+)
+@click.option(
+    '--table',
+    default=None,
+    help='Con --backend duckdb y una base de datos (.duckdb, .sqlite): tabla a auditar'
+)
+@click.option(
+    '--weights',
+    default=None,
+    callback=_weights_option,
+    help='Pesos del score: dimension=peso separados por comas (completitud, duplicados, consistencia, outliers)'
+)
+@click.option(
+    '--no-cache',
+    is_flag=True,
+    help='No usar la caché de etapas (.state/stage_cache en el directorio actual): '
+         'recalcular los informes aunque la entrada no cambie'
+)
+@click.option(
+    '--profile',
+    is_flag=True,
+    help='Perfilar la ejecución (pyinstrument si está instalado, si no cProfile)'
+)
+def main(input_csv, rules_yml, outdir, remediate, chunksize, csv_engine, profile_method, workers, state_store, rebuild_state,
+         parent_path, parent_key, child_key, compact, archive_codec, keep_runs, keep_days, batch_spec, jobs,
+         backend, table, weights, no_cache, profile):
+    if bool(input_csv) == bool(batch_spec):
+        raise click.UsageError('Indicar --input o --batch (sólo uno de los dos)')
+    if batch_spec and workers > 1:
+        raise click.UsageError('--batch reparte datasets entre procesos (--jobs); no es compatible con --workers')
+    if chunksize and remediate:
+        raise click.UsageError('--remediate no está disponible en modo streaming (--chunksize)')
+    if chunksize and workers > 1:
+        raise click.UsageError('--workers no está disponible en modo streaming (--chunksize)')
+    if state_store and (remediate or workers > 1):
+        raise click.UsageError('--state-store no es compatible con --remediate ni --workers')
+    if rebuild_state and not state_store:
+        raise click.UsageError('--rebuild-state requiere --state-store')
+    if parent_path and not parent_key:
+        raise click.UsageError('--parent requiere --parent-key')
+    if compact and (chunksize or state_store):
+        raise click.UsageError('--compact-dtypes sólo está disponible con la carga completa en memoria')
+    if backend == 'duckdb' and (chunksize or state_store or remediate or compact or workers > 1):
+        raise click.UsageError('--backend duckdb no es compatible con --chunksize, --state-store, --remediate, '
+                               '--compact-dtypes ni --workers (DuckDB ya usa todos los núcleos)')
+    if table and backend != 'duckdb':
+        raise click.UsageError('--table requiere --backend duckdb')
+    if input_csv and input_format(input_csv) in ('duckdb', 'sqlite'):
+        if backend != 'duckdb':
+            raise click.UsageError(f'{input_csv} es una base de datos: usar --backend duckdb')
+        if parent_path:
+            raise click.UsageError('--parent necesita la tabla auditada en un fichero (CSV, Parquet o Arrow IPC)')
+
+    archive_options = {'codec': archive_codec, 'keep_runs': keep_runs, 'keep_days': keep_days}
+    stage_cache = None if no_cache else os.path.join('.state', 'stage_cache')
+    if batch_spec:
+        from scripts.batch import run_batch
+        result = run_batch(
+            batch_spec, rules_yml, outdir, jobs, state_store=state_store,
+            parent_path=parent_path, parent_key=parent_key, child_key=child_key,
+            remediate=remediate, chunksize=chunksize, profile_method=profile_method,
+            rebuild_state=rebuild_state, compact=compact, archive_options=archive_options,
+            backend=backend, table=table, csv_engine=csv_engine, weights=weights, stage_cache=stage_cache
+        )
+        _wait_alerts()
+        failed = result[result['status'] != 'ok']
+        for _, row in failed.iterrows():
+            click.echo(f"❌ {row['dataset']}: {row['error']}", err=True)
+        click.echo(f"📦 Batch: {len(result) - len(failed)}/{len(result)} datasets auditados; "
+                   f"resumen en {os.path.join(outdir, 'batch_summary.csv')}")
+        if len(failed):
+            sys.exit(1)
+        return
+
+    run = RunMetrics()
+    profiler = RunProfiler() if profile else None
+    if profiler:
+        profiler.start()
+    try:
+        with run:
+            run_id = run_audit(
+                input_csv, rules_yml, outdir, remediate, chunksize, profile_method, workers,
+                state_store, rebuild_state, parent_path, parent_key, child_key, run=run,
+                compact=compact, archive_options=archive_options, backend=backend, table=table,
+                csv_engine=csv_engine, weights=weights, stage_cache=stage_cache
+            )
+    finally:
+        if profiler:
+            profiler.stop()
+
+    # Junto a history_manifest.json, en la ejecución archivada
+    run.write(outdir)
+    click.echo("⏱️ Métricas de ejecución: run_metrics.json")
+    if profiler:
+        click.echo(f"🔬 Perfil ({profiler.kind}): {os.path.basename(profiler.dump(outdir))}")
+    archive_reports(outdir, run_id, **archive_options)
+    _wait_alerts()
+
+
+def _wait_alerts(timeout: float = 10.0) -> None:
+    """Espera (acotado) a las alertas en segundo plano y resume su entrega."""
+    from scripts.alerts import wait_pending
+
+    for r in wait_pending(timeout):
+        if r['status'] == 'sent':
+            click.echo(f"📣 Alertas enviadas a '{r['channel']}' ({r['n_alerts']})")
+        elif r['status'] == 'failed':
+            click.echo(f"⚠️ No se pudieron enviar las alertas a '{r['channel']}': {r['error']}", err=True)
+
+
+def run_audit(
+    input_csv: str,
+    rules_yml: str,
+    outdir: str = 'reports',
+    remediate: bool = False,
+    chunksize: int = None,
+    profile_method: str = 'exact',
+    workers: int = 1,
+    state_store: str = None,
+    rebuild_state: bool = False,
+    parent_path: str = None,
+    parent_key: str = None,
+    child_key: str = None,
+    run: RunMetrics = None,
+    schema: dict = None,
+    rules: list = None,
+    state_file: str = os.path.join('.state', 'last_run.txt'),
+    compact: bool = False,
+    alerts=None,
+    archive_options: dict = None,
+    backend: str = 'pandas',
+    table: str = None,
+    csv_engine: str = 'pandas',
+    weights: dict = None,
+    stage_cache: str = os.path.join('.state', 'stage_cache')
+) -> str:
+    """
+    Etapas 0-12 del audit (ver main). Cada etapa se registra en `run`.
+    - schema/rules: ya cargados (modo batch); si no, se leen de rules_yml.
+    - state_file: fichero del timestamp de la última ejecución (carga incremental).
+    - compact: dtypes compactos tras la carga (ver compact_dtypes).
+    - alerts: AlertDispatcher donde acumular las alertas sin enviarlas (modo
+      batch); si no se pasa, se envían al terminar la etapa 7.
+    - archive_options: codec, keep_runs, keep_days del archivo (ver archive_reports).
+    - backend: 'pandas' o 'duckdb' (una consulta SQL por tabla, ver scripts.sql_backend);
+      table es la tabla a auditar si input_csv es una base de datos.
+    - csv_engine: lector de CSV de load_data ('pandas' o 'pyarrow').
+    - weights: pesos de las dimensiones del score (ver scripts.score).
+    - stage_cache: carpeta de la caché de etapas (None: sin caché). Con la misma
+      entrada, esquema, reglas y opciones, los informes 3-6 se copian de ella
+      sin leer los datos (no se usa con state_store ni remediate).
+    Devuelve el run_id de la ejecución en outdir/archive.
+    """
+    run = run or RunMetrics()
+
     # 0. Prepara directorios
+    run.stage('0_setup')
     os.makedirs(outdir, exist_ok=True)
 
     # 0.1 Estado incremental
-    state_file = os.path.join('.state', 'last_run.txt')
     last_run = None
     if os.path.exists(state_file):
         with open(state_file, 'r') as f:
             last_run = f.read().strip()
 
-    # 1. Carga datos incremental
-    df = load_data(input_csv, since=last_run)
+    # 1-2. Carga esquema y reglas
+    run.stage('1-2_schema_rules')
+    if schema is None:
+        schema = infer_schema(rules_yml)
+    if rules is None:
+        rules = load_rules(rules_yml)
+
+    # En Parquet/Arrow IPC sólo se leen las columnas que usan esquema y reglas
+    columns = None
+    if input_format(input_csv) != 'csv':
+        columns = referenced_columns(schema, rules)
+    child_keys = None
+    if parent_path:
+        child_keys = (child_key or parent_key).split(',')
+        if columns is not None:
+            columns = columns + [c for c in child_keys if c not in columns]
+
+    # 2.1 Caché de etapas: clave = huella del contenido de la entrada + esquema,
+    #     reglas y opciones que cambian los informes
+    cache, cache_key, cached = None, None, None
+    if stage_cache and not (state_store or remediate):
+        run.stage('2.1_stage_cache')
+        from scripts.stage_cache import StageCache, stage_cache_key
+        cache = StageCache(stage_cache)
+        fingerprint = cache.fingerprint(input_csv)
+        if fingerprint is not None:
+            header = input_columns(input_csv)
+            cache_key = stage_cache_key(
+                fingerprint, schema, rules,
+                # El filtro incremental sólo cambia algo si hay columna updated_at
+                since=last_run if header is None or 'updated_at' in header else None,
+                columns=columns, profile_method=profile_method, backend=backend, table=table,
+                streaming=bool(chunksize), compact=compact,
+                csv_engine=csv_engine if input_format(input_csv) == 'csv' else None
+            )
+            cached = cache.restore(cache_key, outdir)
+
+    df = None
+    if cached is not None:
+        # 3-6. Entrada sin cambios: informes de la caché, sin leer los datos
+        run.stage('3-6_cached')
+        from scripts.stage_cache import read_reports
+        reports = read_reports(outdir)
+        mdf, rdf, spf = reports['quality'], reports['rules'], reports['profile']
+        row_count = run.rows = cached['row_count']
+        click.echo(f"♻️ Informes de las etapas 3-6 desde la caché ({cache_key[:12]}, {row_count} filas)")
+    elif chunksize or state_store or backend == 'duckdb':
+        if backend == 'duckdb':
+            # 3-6. Backend SQL: todas las comprobaciones en una consulta de DuckDB
+            run.stage('3-6_sql_audit')
+            from scripts.sql_backend import sql_audit
+            audit = sql_audit(
+                input_csv, schema, rules, table=table, since=last_run,
+                columns=columns, profile_method=profile_method
+            )
+            click.echo(f"🦆 Métricas calculadas en DuckDB ({audit.row_count} filas, una consulta)")
+        elif state_store:
+            # 3-6. Estado persistente: sólo se lee el delta (desde el watermark del
+            #      store) y se fusiona con los agregados guardados
+            run.stage('3-6_state_store_audit')
+            from scripts.state import MetricStore, incremental_audit
+            audit = incremental_audit(
+                MetricStore(state_store), input_csv, schema, rules,
+                chunksize=chunksize, columns=columns, rebuild=rebuild_state, engine=csv_engine
+            )
+            click.echo(f"🗃️ Estado de métricas actualizado en {state_store} ({audit.row_count} filas)")
+        else:
+            # 3-6. Modo streaming: agregados parciales por chunk, sin DataFrame completo
+            run.stage('3-6_stream_audit')
+            from scripts.streaming import audit_stream
+            chunks = load_data(
+                input_csv, since=last_run, chunksize=chunksize, columns=columns, engine=csv_engine, schema=schema
+            )
+            audit = audit_stream(chunks, schema, rules)
+        run.rows = audit.row_count
+        run.stage('3-6_reports')
+        mdf = audit.quality_metrics()
+        rdf = audit.business_rules()
+        spf = audit.statistical_profile()
+        pvf = audit.pattern_validation()
+        row_count = audit.row_count
+        save_csv(mdf, os.path.join(outdir, 'quality_metrics.csv'))
+        save_csv(rdf, os.path.join(outdir, 'business_rules.csv'))
+        save_csv(spf, os.path.join(outdir, 'statistical_profile.csv'))
+        save_csv(pvf, os.path.join(outdir, 'pattern_validation.csv'))
+    else:
+        # 1. Carga datos incremental
+        run.stage('1_load_data')
+        df = load_data(input_csv, since=last_run, columns=columns, engine=csv_engine, schema=schema)
+        run.rows = len(df)
+
+        # 1.1 Dtypes compactos según el esquema (mismos valores, menos memoria)
+        if compact:
+            run.stage('1.1_compact_dtypes')
+            df, mem = compact_dtypes(df, schema)
+            save_csv(mem, os.path.join(outdir, 'memory_report.csv'))
+            before, after = mem['bytes_before'].sum() / 2**20, mem['bytes_after'].sum() / 2**20
+            click.echo(f"💾 Dtypes compactos: {before:.1f} MB -> {after:.1f} MB "
+                       f"({before / after if after else 1:.1f}x menos memoria)")
+
+        # 3. Métricas de calidad básicas (un único perfil por columna para toda la ejecución,
+        #    o un proceso por columna con --workers)
+        run.stage('3_quality_metrics')
+        if workers > 1:
+            from scripts.parallel import parallel_audit
+            stages = ('quality',) if remediate else ('quality', 'rules', 'profile', 'patterns')
+            par = parallel_audit(df, schema, rules, workers, stages, profile_method)
+            mdf = par['quality']
+        else:
+            profiles = build_profiles(df, schema)
+            mdf = compute_quality_metrics(df, schema, profiles)
+        save_csv(mdf, os.path.join(outdir, 'quality_metrics.csv'))
+
+        # 3.1 Remediación automática
+        if remediate:
+            run.stage('3.1_remediation')
+            from scripts.remediation import apply_remediation, write_log
+            # Reutiliza las máscaras de los perfiles de las métricas y corrige en sitio
+            df, log_df, changed = apply_remediation(df, schema, None if workers > 1 else profiles, rules)
+            save_csv(df, os.path.join(outdir, 'cleaned_data.csv'))
+            log_path = write_log(log_df, outdir)
+            click.echo(f"🧹 Remediación aplicada: {len(log_df)} celdas en {len(changed)} columnas "
+                       f"(cleaned_data.csv y {os.path.basename(log_path)})")
+            # Métricas tras la remediación: sólo las columnas cambiadas tienen perfil nuevo
+            if workers > 1:
+                par = parallel_audit(df, schema, rules, workers, profile_method=profile_method)
+                mdf = par['quality']
+            elif changed:
+                mdf = compute_quality_metrics(df, schema, profiles)
 
-    # 2. Carga esquema y reglas
-    schema = infer_schema(rules_yml)
-    rules = load_rules(rules_yml)
+        # 4. Validaciones de negocio
+        run.stage('4_business_rules')
+        if workers > 1:
+            rdf = par['rules']
+        else:
+            rdf = apply_business_rules(df, rules, schema, profiles)
+        save_csv(rdf, os.path.join(outdir, 'business_rules.csv'))
 
-    # 3. Métricas de calidad básicas
-    mdf = compute_quality_metrics(df, schema)
-    save_csv(mdf, os.path.join(outdir, 'quality_metrics.csv'))
+        # 5. Perfil estadístico
+        run.stage('5_statistical_profile')
+        if workers > 1:
+            spf = par['profile']
+        else:
+            spf = compute_statistical_profile(df, profiles, method=profile_method)
+        save_csv(spf, os.path.join(outdir, 'statistical_profile.csv'))
 
-    # 3.1 Remediación automática
-    if remediate:
-        df_clean, log_df = apply_remediation(df, schema)
-        save_csv(df_clean, os.path.join(outdir, 'cleaned_data.csv'))
-        save_csv(log_df, os.path.join(outdir, 'remediation_log.csv'))
-        click.echo('🧹 Remediación aplicada: cleaned_data.csv y remediation_log.csv generados')
-        df = df_clean
-        # (Opcional) Recalcular métricas
-        mdf = compute_quality_metrics(df, schema)
+        # 6. Validación de patrones
+        run.stage('6_pattern_validation')
+        if workers > 1:
+            pvf = par['patterns']
+        else:
+            pvf = validate_patterns(df, schema, profiles)
+        save_csv(pvf, os.path.join(outdir, 'pattern_validation.csv'))
+        row_count = len(df)
 
-    # 4. Validaciones de negocio
-    rdf = apply_business_rules(df, rules)
-    save_csv(rdf, os.path.join(outdir, 'business_rules.csv'))
+        # 6.2 Índice de violaciones: bitmaps por comprobación/columna y ejemplos
+        #     (reservoir) sin copiar filas; sólo se escanean las que fallan
+        run.stage('6.2_violation_index')
+        from scripts.violations import build_violation_index
+        vindex = build_violation_index(df, schema, rules, None if workers > 1 else profiles, mdf, rdf)
+        vindex.save(os.path.join(outdir, 'violations.npz'))
+        save_csv(vindex.samples(df), os.path.join(outdir, 'violation_samples.csv'))
 
-    # 5. Perfil estadístico
-    spf = compute_statistical_profile(df)
-    save_csv(spf, os.path.join(outdir, 'statistical_profile.csv'))
+    if cache_key is not None and cached is None:
+        run.stage('6.3_stage_cache')
+        cache.put(cache_key, outdir, input=os.path.abspath(input_csv), row_count=row_count)
 
-    # 6. Validación de patrones
-    pvf = validate_patterns(df, schema)
-    save_csv(pvf, os.path.join(outdir, 'pattern_validation.csv'))
+    # 6.1 Integridad referencial: índice de claves del padre en disco (reutilizado
+    #     mientras el fichero no cambie) y la tabla hija por chunks
+    if parent_path:
+        run.stage('6.1_referential_integrity')
+        from scripts.integrity import parent_key_index, check_referential_integrity
+        index = parent_key_index(parent_path, parent_key.split(','))
+        if df is None:
+            # El estado persistente describe la tabla completa: se comprueba entera
+            since = None if state_store else last_run
+            child_chunks = load_data(
+                input_csv, since=since, chunksize=chunksize or 1_000_000, columns=child_keys,
+                engine=csv_engine, schema=schema
+            )
+        else:
+            child_chunks = [df]
+        ri = check_referential_integrity(child_chunks, index, child_keys)
+        ri['orphan_sample'] = ri['orphan_sample'].map(lambda v: json.dumps(v, default=str))
+        save_csv(ri, os.path.join(outdir, 'referential_integrity.csv'))
+        click.echo(f"🔗 Integridad referencial: {ri.iloc[0]['pct_missing']}% de claves huérfanas")
 
-    # 7. Alertas Slack
-    for _, row in rdf.iterrows():
-        if row.get('issue') == 'null_rate' and row.get('value', 0) > 20:
-            send_slack(f":warning: Null Rate alto en '{row['column']}': {row['value']}%")
+    # 7. Alertas Slack: un mensaje por canal, enviado en segundo plano (el audit
+    #    no espera a la red; main espera acotadamente al terminar)
+    run.stage('7_alerts')
+    high_nulls = mdf[mdf['pct_nulls'] > 20]
+    if len(high_nulls):
+        own_alerts = alerts is None
+        if own_alerts:
+            from scripts.alerts import AlertDispatcher
+            alerts = AlertDispatcher(title=f'Auditoría de {input_csv}')
+        for _, row in high_nulls.iterrows():
+            alerts.add(
+                f":warning: Null Rate alto en '{row['column']}': {row['pct_nulls']}%",
+                key=('null_rate', row['column'])
+            )
+        if own_alerts:
+            alerts.flush()
 
     # 8. Versionado y linaje
+    run.stage('8_manifest')
     try:
         schema_version = subprocess.check_output(
             ['git', 'describe', '--tags'], cwd=os.getcwd()
         ).strip().decode()
     except Exception:
         schema_version = 'unknown'
-    write_manifest(outdir, input_csv, schema_version, row_count=len(df))
+    write_manifest(outdir, input_csv, schema_version, row_count=row_count)
     click.echo(f"🔖 Manifest generado con version: {schema_version}")
 
-    # 9. Generar summary y semáforo
-    avg_null = mdf['pct_nulls'].mean()
-    score = round(100 - avg_null, 2)
-    semaforo = 'VERDE' if score >= 85 else 'AMBAR' if score >= 70 else 'ROJO'
-    summary = {
-        'dimensions': {},          # opcional: compute_dimensions(mdf, rdf, ...)
-        'score_global': score,
-        'semaforo': semaforo
-    }
+    # 9. Generar summary y semáforo: dimensiones y score ponderado [0–1]
+    run.stage('9_summary')
+    summary = build_summary(mdf, rdf, spf, weights)
+    score, semaforo = summary['score_global'], summary['semaforo']
     save_json(summary, os.path.join(outdir, 'summary.json'))
 
     # 10. Render HTML (si existe)
+    run.stage('10_render_html')
     try:
-        from scripts.render_report import render_html
+        from scripts.render_report import render_html, TEMPLATE_DIR
         render_html(
             json_path=os.path.join(outdir, 'summary.json'),
-            template_dir=os.path.abspath(
-                os.path.join(os.path.dirname(__file__), os.pardir, 'templates')
-            ),
+            template_dir=TEMPLATE_DIR,
             output_path=os.path.join(outdir, 'index.html')
         )
     except ImportError:
         pass
 
     # 11. Archivado histórico
-    archive_dest = archive_reports(outdir)
-    click.echo(f"🔖 Reports archived to: {archive_dest}")
+    run.stage('11_archive')
+    run_id = archive_reports(outdir, **(archive_options or {}))
+    click.echo(f"🔖 Reports archived to: {os.path.join(outdir, 'archive')} (run {run_id})")
     click.echo(f"✅ Reportes generados en {outdir}/ (Score: {score}, Semáforo: {semaforo})")
 
     # 12. Actualizar last_run timestamp
+    run.stage('12_last_run')
     new_run = datetime.datetime.now().isoformat()
     os.makedirs(os.path.dirname(state_file), exist_ok=True)
     with open(state_file, 'w') as f:
         f.write(new_run)
     click.echo(f"🕒 Updated last_run to {new_run}")
+    run.finish()
+    return run_id
 
 
 if __name__ == '__main__':
@@ -1,136 +1,166 @@
 import os
-import re
-import datetime
-import json
 import pandas as pd
 import numpy as np
-from scipy.spatial.distance import jensenshannon
 from scripts.rules import infer_schema
+from scripts.column_profile import ColumnProfile, build_profiles
+from scripts.sketches import NumericSketch
 
-def compute_quality_metrics(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+def _pct(n: int, total: int) -> float:
+    return round(n/total*100, 2) if total else 0.0
+
+
+def _ensure_profiles(df: pd.DataFrame, schema: dict, profiles: dict = None) -> dict:
+    """Reutiliza los perfiles ya calculados o los crea para df."""
+    if profiles is None:
+        profiles = build_profiles(df, schema)
+    return profiles
+
+
+def _quality_record(prof: ColumnProfile) -> dict:
+    total = prof.total
+    return {
+        'column': prof.name,
+        'n_nulls': prof.n_nulls,
+        'pct_nulls': _pct(prof.n_nulls, total),
+        'n_duplicates': prof.n_duplicates,
+        'pct_duplicates': _pct(prof.n_duplicates, total),
+        'pct_duplicates_error': _pct(prof.n_duplicates_error, total),
+        'n_type_mismatch': prof.n_type_mismatch,
+        'pct_type_mismatch': _pct(prof.n_type_mismatch, total),
+        'n_pattern_mismatch': prof.n_pattern_mismatches,
+        'pct_pattern_mismatch': _pct(prof.n_pattern_mismatches, total)
+    }
+
+
+def _format_profile(name: str, stats: dict, total: int) -> dict:
+    mean, std = stats['mean'], stats['std']
+    return {
+        'column': name,
+        'mean': round(mean, 2),
+        'median': round(stats['median'], 2),
+        'pct10': round(stats['pct10'], 2),
+        'pct25': round(stats['pct25'], 2),
+        'pct75': round(stats['pct75'], 2),
+        'pct90': round(stats['pct90'], 2),
+        'std': round(std, 2),
+        'coef_var': round(std / mean if mean else 0, 2),
+        'n_outliers': stats['n_outliers'],
+        'pct_outliers': _pct(stats['n_outliers'], total)
+    }
+
+
+def _profile_record(prof: ColumnProfile) -> dict:
+    q10, q25, median, q75, q90 = prof.percentiles([10, 25, 50, 75, 90])
+    iqr = q75 - q25
+    stats = {
+        'mean': prof.mean, 'std': prof.std, 'median': median,
+        'pct10': q10, 'pct25': q25, 'pct75': q75, 'pct90': q90,
+        'n_outliers': prof.count_outside(q25 - 1.5*iqr, q75 + 1.5*iqr)
+    }
+    return _format_profile(prof.name, stats, prof.total)
+
+
+def _pattern_record(prof: ColumnProfile) -> dict:
+    return {
+        'column': prof.name,
+        'n_matches': prof.n_pattern_matches,
+        'pct_matches': _pct(prof.n_pattern_matches, prof.total),
+        'n_mismatches': prof.n_pattern_mismatches,
+        'pct_mismatches': _pct(prof.n_pattern_mismatches, prof.total)
+    }
+
+
+def compute_quality_metrics(df: pd.DataFrame, schema: dict, profiles: dict = None) -> pd.DataFrame:
     """
     Calcula métricas de calidad por columna según el esquema:
       - n_nulls, pct_nulls
       - n_duplicates, pct_duplicates
+      - pct_duplicates_error (cota de error si la columna usa `sketch: hll`, si no 0)
       - n_type_mismatch, pct_type_mismatch
       - n_pattern_mismatch, pct_pattern_mismatch
+    Si se pasa `profiles` (ver build_profiles) reutiliza sus escaneos.
     Devuelve un DataFrame de pandas.
     """
-    total = len(df)
-    records = []
-    for col in df.columns:
-        s = df[col]
-        # Básicas
-        n_null = int(s.isnull().sum())
-        n_dup  = int(s.duplicated().sum())
-        pct_null  = round(n_null/total*100, 2) if total else 0.0
-        pct_dup   = round(n_dup/total*100, 2)  if total else 0.0
-
-        # Esquema para esta columna
-        col_schema   = schema.get(col, {})
-        expected_type = col_schema.get('type')
-        pattern       = col_schema.get('pattern')
-        date_format   = col_schema.get('format')
-
-        # Desajustes de tipo
-        n_type_mismatch = 0
-        for v in s.dropna():
-            if expected_type == 'integer' and not isinstance(v, int):
-                n_type_mismatch += 1
-            elif expected_type == 'number' and not isinstance(v, (int, float)):
-                n_type_mismatch += 1
-            elif expected_type == 'date':
-                try:
-                    datetime.datetime.strptime(str(v), date_format)
-                except Exception:
-                    n_type_mismatch += 1
-        pct_type_mismatch = round(n_type_mismatch/total*100, 2) if total else 0.0
-
-        # Desajustes de patrón
-        n_pattern_mismatch = 0
-        if pattern:
-            regex = re.compile(pattern)
-            for v in s.dropna().astype(str):
-                if not regex.match(v):
-                    n_pattern_mismatch += 1
-        pct_pattern_mismatch = round(n_pattern_mismatch/total*100, 2) if total else 0.0
-
-        records.append({
-            'column': col,
-            'n_nulls': n_null,
-            'pct_nulls': pct_null,
-            'n_duplicates': n_dup,
-            'pct_duplicates': pct_dup,
-            'n_type_mismatch': n_type_mismatch,
-            'pct_type_mismatch': pct_type_mismatch,
-            'n_pattern_mismatch': n_pattern_mismatch,
-            'pct_pattern_mismatch': pct_pattern_mismatch
-        })
+    profiles = _ensure_profiles(df, schema, profiles)
+    records = [_quality_record(profiles[col]) for col in df.columns]
     return pd.DataFrame(records)
 
 
-def compute_statistical_profile(df: pd.DataFrame) -> pd.DataFrame:
+def build_numeric_sketches(df: pd.DataFrame, k: int = 200, block_size: int = 1_000_000) -> dict:
+    """
+    Recorre una sola vez cada columna numérica de df (en bloques de block_size
+    filas) y devuelve {columna: NumericSketch}. Los sketches se pueden guardar con
+    scripts.sketches.dump_sketches y fusionar (merge_sketches) con los de otras
+    particiones o ejecuciones.
+    """
+    sketches = {}
+    for col in df.select_dtypes(include=[np.number]).columns:
+        sketch = NumericSketch(k)
+        values = df[col]
+        for start in range(0, len(values), block_size):
+            sketch.update(values.iloc[start:start + block_size].to_numpy(dtype=float, na_value=np.nan))
+        sketches[col] = sketch
+    return sketches
+
+
+def profile_from_sketches(sketches: dict) -> pd.DataFrame:
+    """
+    Perfil estadístico (mismas columnas que compute_statistical_profile) a partir
+    de NumericSketch, p.ej. fusionados de varias particiones.
+    """
+    records = [
+        _format_profile(col, sketch.stats(), sketch.n_rows)
+        for col, sketch in sketches.items() if sketch.n
+    ]
+    return pd.DataFrame(records)
+
+
+def compute_statistical_profile(
+    df: pd.DataFrame,
+    profiles: dict = None,
+    method: str = 'exact',
+    k: int = 200
+) -> pd.DataFrame:
     """
     Para cada columna numérica de df calcula:
       - mean, median
       - pct10, pct25, pct75, pct90
       - std, coef_var
       - n_outliers (IQR 1.5×), pct_outliers
+    method='exact' ordena cada columna (reutilizando `profiles` si se pasa).
+    method='sketch' hace una única pasada con memoria acotada (NumericSketch/KLL):
+    exacto con <= k valores y, por encima, error de rango normalizado
+    KLLSketch.normalized_rank_error(k) en percentiles y outliers.
     Devuelve un DataFrame con estas métricas.
     """
-    total = len(df)
+    if method == 'sketch':
+        return profile_from_sketches(build_numeric_sketches(df, k))
+    if method != 'exact':
+        raise ValueError(f"method desconocido: {method}")
+    profiles = _ensure_profiles(df, None, profiles)
     records = []
     for col in df.select_dtypes(include=[np.number]).columns:
-        s = df[col].dropna().astype(float)
-        if s.empty:
+        prof = profiles[col]
+        if len(prof.sorted_numeric) == 0:
             continue
-        q10, q25, q75, q90 = np.percentile(s, [10, 25, 75, 90])
-        iqr = q75 - q25
-        lower, upper = q25 - 1.5*iqr, q75 + 1.5*iqr
-        outliers = s[(s < lower) | (s > upper)]
-        n_outliers = int(len(outliers))
-        records.append({
-            'column': col,
-            'mean': round(s.mean(), 2),
-            'median': round(s.median(), 2),
-            'pct10': round(q10, 2),
-            'pct25': round(q25, 2),
-            'pct75': round(q75, 2),
-            'pct90': round(q90, 2),
-            'std': round(s.std(ddof=0), 2),
-            'coef_var': round(s.std(ddof=0) / s.mean() if s.mean() else 0, 2),
-            'n_outliers': n_outliers,
-            'pct_outliers': round(n_outliers/total*100, 2) if total else 0.0
-        })
+        records.append(_profile_record(prof))
     return pd.DataFrame(records)
 
 
-def validate_patterns(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+def validate_patterns(df: pd.DataFrame, schema: dict, profiles: dict = None) -> pd.DataFrame:
     """
     Para cada columna que tenga 'pattern' en el esquema:
       - n_matches, pct_matches
       - n_mismatches, pct_mismatches
+    Si se pasa `profiles` (ver build_profiles) reutiliza sus escaneos.
     Devuelve un DataFrame con estas métricas.
     """
-    total = len(df)
+    profiles = _ensure_profiles(df, schema, profiles)
     records = []
     for col, rules in schema.items():
-        pattern = rules.get('pattern')
-        if not pattern or col not in df.columns:
+        if not rules.get('pattern') or col not in df.columns:
             continue
-        s = df[col].dropna().astype(str)
-        regex = re.compile(pattern)
-        n_matches = int(s.str.match(regex).sum())
-        n_mismatches = int(len(s) - n_matches)
-        pct_matches = round(n_matches/total*100, 2) if total else 0.0
-        pct_mismatches = round(n_mismatches/total*100, 2) if total else 0.0
-        records.append({
-            'column': col,
-            'n_matches': n_matches,
-            'pct_matches': pct_matches,
-            'n_mismatches': n_mismatches,
-            'pct_mismatches': pct_mismatches
-        })
+        records.append(_pattern_record(profiles[col]))
     return pd.DataFrame(records)
 
 
@@ -142,6 +172,7 @@ def validate_referential_integrity(
 ) -> pd.DataFrame:
     """
     Valida que todos los valores de key_child en child_df existan en key_parent de parent_df.
+    Para tablas que no caben en memoria o claves compuestas, ver scripts.integrity.
     Devuelve un DataFrame con:
       - key, n_total, n_missing, pct_missing, pct_valid
     """
@@ -165,68 +196,43 @@ def compute_drift(
     df: pd.DataFrame,
     hist_dir: str = "reports/histograms",
     bins: int = 10,
-    threshold: float = 0.0
+    threshold: float = 0.0,
+    window: int = 10
 ) -> dict:
     """
-    - Calcula histograma para cada columna numérica actual.
-    - Carga histograma previo de hist_dir/columna.json (si existe).
-    - Calcula JS distance entre ellos.
-    - Guarda histograma actual en hist_dir/columna.json.
-    - Devuelve dict con { columna: {'js_distance', 'drift'} }.
+    - Cuenta cada columna numérica con los bordes de bin fijados para ella en
+      hist_dir/drift.sqlite, y resume las categóricas/texto con un
+      FrequencySketch (ver scripts.drift.DriftStore).
+    - Compara con la línea base (últimas `window` ejecuciones): JS distance y PSI.
+    - Guarda el histograma actual.
+    - Devuelve dict con { columna: {'js_distance', 'psi', 'drift', ...} };
+      js_distance es None en la primera ejecución de cada columna.
     """
-    os.makedirs(hist_dir, exist_ok=True)
-    drift_report = {}
-    for col in df.select_dtypes(include=[np.number]).columns:
-        data = df[col].dropna().astype(float)
-        if data.empty:
-            continue
+    from scripts.drift import DriftStore
+
+    with DriftStore(os.path.join(hist_dir, 'drift.sqlite'), bins=bins, window=window) as store:
+        return store.record(df, threshold=threshold)
+
 
-        counts, edges = np.histogram(data, bins=bins, density=True)
-        prev_path = os.path.join(hist_dir, f"{col}.json")
-
-        if os.path.exists(prev_path):
-            with open(prev_path, 'r') as f:
-                prev = json.load(f)
-            prev_counts = np.array(prev['counts'])
-            if len(prev_counts) == len(counts):
-                js = jensenshannon(prev_counts, counts)
-            else:
-                js = None
-        else:
-            js = None
-
-        with open(prev_path, 'w') as f:
-            json.dump({'counts': counts.tolist(), 'edges': edges.tolist()}, f)
-
-        # Si js es None => no drift; si js es NaN => tratamos como drift cuando threshold=0
-        if js is None:
-            drift_flag = False
-        elif np.isnan(js):
-            drift_flag = True
-        else:
-            drift_flag = js >= threshold
-
-        drift_report[col] = {
-            'js_distance': round(js, 4) if js is not None else None,
-            'drift': drift_flag
-        }
-    return drift_report
 def generate_diagnostics(
     df: pd.DataFrame,
     schema: dict,
     drift_report: dict = None,
     parent_df: pd.DataFrame = None,
     key_child: str = None,
-    key_parent: str = None
+    key_parent: str = None,
+    profiles: dict = None
 ) -> pd.DataFrame:
     """
     Combina todas las métricas y devuelve un DataFrame con diagnósticos:
       - column, issue, value, message
+    Todas las métricas comparten un único ColumnProfile por columna.
     """
     diag = []
+    profiles = _ensure_profiles(df, schema, profiles)
 
     # 1. Calidad básica
-    qm = compute_quality_metrics(df, schema)
+    qm = compute_quality_metrics(df, schema, profiles)
     for _, row in qm.iterrows():
         col = row['column']
         if row['pct_nulls'] > 0:
@@ -245,7 +251,7 @@ def generate_diagnostics(
             })
 
     # 2. Perfil estadístico
-    sp = compute_statistical_profile(df)
+    sp = compute_statistical_profile(df, profiles)
     for _, row in sp.iterrows():
         if row['pct_outliers'] > 0:
             diag.append({
@@ -256,7 +262,7 @@ def generate_diagnostics(
             })
 
     # 3. Patrones
-    pt = validate_patterns(df, schema)
+    pt = validate_patterns(df, schema, profiles)
     for _, row in pt.iterrows():
         if row['pct_mismatches'] > 0:
             diag.append({
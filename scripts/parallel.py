@@ -0,0 +1,207 @@
+"""
+Ejecución paralela por columnas del audit (opción --workers N).
+
+Cada columna se publica una sola vez en memoria compartida y los procesos del
+pool la leen sin copiarla ni deserializarla:
+  - dtypes numpy (numéricos, bool, fechas): el buffer del array en un
+    SharedMemory, reconstruido en el worker como vista numpy.
+  - texto/categorías/nullable: un stream Arrow IPC en un SharedMemory
+    (si pyarrow está instalado).
+  - object que no es sólo texto (enteros con None, números mezclados...): se
+    envía sólo esa Serie serializada, porque Arrow convertiría sus valores
+    (p.ej. enteros con nulos a float) y cambiarían los desajustes de tipo.
+Nunca se serializa el DataFrame completo. Los resultados se reensamblan en el
+orden de columnas y reglas de la ejecución serie, así que la salida es idéntica.
+"""
+import gc
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from scripts.column_profile import ColumnProfile
+from scripts.metrics import (
+    _quality_record,
+    _profile_record,
+    _pattern_record,
+    compute_statistical_profile,
+)
+from scripts.rules import _rule_counts, _rule_record, _shared_key
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow es opcional
+    pa = None
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Abre un bloque existente sin adueñarse de él: lo libera (unlink) el proceso
+    principal. En Python < 3.13 el worker comparte el resource_tracker del padre,
+    así que el registro duplicado es inocuo.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        return shared_memory.SharedMemory(name=name)
+
+
+def _to_shared(view: memoryview) -> shared_memory.SharedMemory:
+    view = view.cast('B')
+    shm = shared_memory.SharedMemory(create=True, size=max(view.nbytes, 1))
+    shm.buf[:view.nbytes] = view
+    return shm
+
+
+def _share_column(s: pd.Series, blocks: list) -> tuple:
+    """
+    Publica una columna y devuelve un handle pequeño y serializable.
+    Los SharedMemory creados se añaden a `blocks` para liberarlos al final.
+    """
+    dtype = s.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+        values = np.ascontiguousarray(s.to_numpy())
+        shm = _to_shared(memoryview(values.view(np.uint8)))
+        blocks.append(shm)
+        return ('numpy', shm.name, dtype.str, len(values))
+    if dtype == object and pd.api.types.infer_dtype(s, skipna=True) not in ('string', 'empty'):
+        return ('pickle', pickle.dumps(s.reset_index(drop=True)))
+    if pa is not None:
+        try:
+            batch = pa.RecordBatch.from_pandas(pd.DataFrame({'v': s}), preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            batch = None
+        if batch is not None:
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_stream(sink, batch.schema) as writer:
+                writer.write_batch(batch)
+            buf = sink.getvalue()
+            shm = _to_shared(memoryview(buf))
+            blocks.append(shm)
+            return ('arrow', shm.name, buf.size, dtype == object)
+    return ('pickle', pickle.dumps(s.reset_index(drop=True)))
+
+
+def _open_column(handle: tuple):
+    """Reconstruye la Serie en el worker. Devuelve (serie, shm o None)."""
+    kind = handle[0]
+    if kind == 'numpy':
+        _, name, dtype, length = handle
+        shm = _attach(name)
+        values = np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf)
+        return pd.Series(values, copy=False), shm
+    if kind == 'arrow':
+        _, name, size, as_object = handle
+        shm = _attach(name)
+        reader = pa.ipc.open_stream(pa.py_buffer(shm.buf[:size]))
+        # A nivel de tabla se aplican los metadatos pandas (Int32, category...)
+        s = reader.read_all().to_pandas()['v']
+        del reader
+        if as_object:
+            s = s.astype(object)
+        return s, shm
+    return pickle.loads(handle[1]), None
+
+
+def _audit_column(task: dict) -> dict:
+    """Trabajo de un worker: todas las métricas y reglas de una columna."""
+    s, shm = _open_column(task['handle'])
+    s.name = task['column']
+    prof = ColumnProfile(s, task['schema'])
+    result = {'column': task['column']}
+    try:
+        stages = task['stages']
+        if 'quality' in stages:
+            result['quality'] = _quality_record(prof)
+        if 'profile' in stages and task['numeric']:
+            if task['profile_method'] == 'sketch':
+                spf = compute_statistical_profile(s.to_frame(), method='sketch')
+                result['profile'] = spf.iloc[0].to_dict() if len(spf) else None
+            elif len(prof.sorted_numeric):
+                result['profile'] = _profile_record(prof)
+        if 'patterns' in stages and task['schema'].get('pattern'):
+            result['patterns'] = _pattern_record(prof)
+        if 'rules' in stages:
+            shared = {}
+            result['rules'] = {}
+            for i, rule in task['rules']:
+                key = _shared_key(rule) or ('rule', i)
+                if key not in shared:
+                    shared[key] = _rule_counts(rule, s, task['schema'], prof)
+                result['rules'][i] = shared[key]
+        return result
+    finally:
+        # Las vistas sobre el bloque compartido deben desaparecer antes de cerrarlo
+        del s, prof
+        gc.collect()
+        if shm is not None:
+            try:
+                shm.close()
+            except BufferError:
+                pass
+
+
+def parallel_audit(
+    df: pd.DataFrame,
+    schema: dict,
+    rules: list,
+    workers: int,
+    stages=('quality', 'rules', 'profile', 'patterns'),
+    profile_method: str = 'exact'
+) -> dict:
+    """
+    Ejecuta las etapas pedidas repartiendo las columnas entre `workers` procesos.
+    Devuelve dict {'quality', 'rules', 'profile', 'patterns'} con los mismos
+    DataFrames (y en el mismo orden) que la ejecución serie.
+    """
+    schema = schema or {}
+    rules = rules or []
+    numeric = set(df.select_dtypes(include=[np.number]).columns)
+    rules_by_col = {c: [] for c in df.columns}
+    if 'rules' in stages:
+        for i, rule in enumerate(rules):
+            cols = df.columns if rule['column'] == 'any' else [rule['column']]
+            for c in cols:
+                df[c]  # KeyError igual que en la ejecución serie
+                rules_by_col[c].append((i, rule))
+
+    blocks = []
+    try:
+        tasks = [{
+            'column': col,
+            'handle': _share_column(df[col], blocks),
+            'schema': schema.get(col) or {},
+            'rules': rules_by_col[col],
+            'numeric': col in numeric,
+            'stages': tuple(stages),
+            'profile_method': profile_method
+        } for col in df.columns]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = {r['column']: r for r in pool.map(_audit_column, tasks)}
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    out = {}
+    if 'quality' in stages:
+        out['quality'] = pd.DataFrame([results[c]['quality'] for c in df.columns])
+    if 'rules' in stages:
+        records = []
+        for i, rule in enumerate(rules):
+            cols = df.columns if rule['column'] == 'any' else [rule['column']]
+            for c in cols:
+                records.append(_rule_record(rule, c, results[c]['rules'][i]))
+        out['rules'] = pd.DataFrame(records)
+    if 'profile' in stages:
+        out['profile'] = pd.DataFrame([
+            results[c]['profile'] for c in df.columns if results[c].get('profile') is not None
+        ])
+    if 'patterns' in stages:
+        out['patterns'] = pd.DataFrame([
+            results[col]['patterns'] for col, rules_ in schema.items()
+            if rules_.get('pattern') and col in results
+        ])
+    return out
@@ -0,0 +1,85 @@
+"""
+Validación de los 'pattern' del esquema.
+
+- Cada patrón se compila una sola vez por proceso (caché por texto del patrón),
+  sea cual sea el número de columnas, chunks o llamadas que lo usen.
+- Se evalúa sobre valores distintos con sus conteos (ColumnProfile.pattern_counts):
+  una columna de baja cardinalidad cuesta O(distintos), no O(filas).
+- Motor: kernels regex de pyarrow.compute (RE2) si pyarrow está instalado y el
+  patrón es compatible con RE2; si no, Series.str.match con el patrón compilado.
+  RE2 y `re` difieren en las clases Unicode (\\d, \\w, \\s), en los caracteres de
+  control que cuentan como espacio (\\s de `re` incluye \\x0b y \\x1c-\\x1f) y en
+  '$' ante un '\\n' final, así que los valores no ASCII o con caracteres de control
+  se reevalúan con `re`. Las clases POSIX ([[:digit:]]) sólo existen en RE2 (`re`
+  las lee como un conjunto de caracteres): esos patrones se evalúan con `re`.
+  El resultado es siempre el de `re.match`.
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - pyarrow es opcional
+    pa = None
+
+
+@lru_cache(maxsize=None)
+def compile_pattern(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+
+@lru_cache(maxsize=None)
+def _arrow_pattern(pattern: str):
+    """
+    Patrón anclado al inicio (semántica de re.match) o None si RE2 no lo acepta
+    o lo interpreta de otra forma que `re` (clases POSIX).
+    """
+    if pa is None or '[:' in pattern:
+        return None
+    anchored = f'^(?:{pattern})'
+    try:
+        pc.match_substring_regex(pa.array([''], type=pa.string()), anchored)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+    return anchored
+
+
+def _match_python(values, pattern: str) -> np.ndarray:
+    values = pd.Series(np.asarray(values, dtype=object), dtype=object)
+    return values.str.match(compile_pattern(pattern)).to_numpy(dtype=bool)
+
+
+def _to_arrow(values: pd.Index):
+    if isinstance(values.dtype, pd.StringDtype):
+        # Texto ya respaldado por Arrow (str de pandas >= 3): sin copia
+        return pa.array(values.array)
+    return pa.array(values.to_numpy(dtype=object), type=pa.string())
+
+
+def match_values(values, pattern: str) -> np.ndarray:
+    """
+    Máscara booleana de `re.match(pattern, v)` para una secuencia de textos.
+    """
+    values = pd.Index(values)
+    anchored = _arrow_pattern(pattern)
+    if anchored is None or not len(values):
+        return _match_python(values, pattern)
+
+    arr = _to_arrow(values)
+    out = pc.match_substring_regex(arr, anchored).to_numpy(zero_copy_only=False).astype(bool)
+    control = pc.match_substring_regex(arr, '[\\x00-\\x1f\\x7f]')
+    recheck = pc.or_(pc.invert(pc.string_is_ascii(arr)), control)
+    recheck = recheck.to_numpy(zero_copy_only=False).astype(bool)
+    if recheck.any():
+        out[recheck] = _match_python(values[recheck], pattern)
+    return out
+
+
+def count_matches(values, counts, pattern: str) -> int:
+    """Filas que cumplen el patrón dados valores distintos y su número de apariciones."""
+    mask = match_values(values, pattern)
+    return int(np.asarray(counts)[mask].sum())
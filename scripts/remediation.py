@@ -0,0 +1,245 @@
+"""
+Remediación automática (opción --remediate), columna a columna y en sitio.
+
+Cada columna del esquema puede declarar sus correcciones:
+
+    edad:
+      type: integer
+      range: [18, 99]
+      remediation:
+        type_mismatch: null      # null | coerce (to_numeric / to_datetime)
+        out_of_range: clip       # clip | null
+        fill_null: 0             # valor para los nulos (también los que dejen los pasos anteriores)
+    email:
+      pattern: '^\\S+@\\S+$'
+      remediation:
+        strip: true              # quita espacios al principio y al final (antes de validar)
+        pattern_mismatch: null
+
+`null` (None en YAML) o 'null' anula las celdas afectadas; una acción sólo
+se omite si su clave no aparece (o con strip: false). Un valor no soportado
+lanza ValueError antes de tocar ningún dato.
+
+Las máscaras salen del ColumnProfile que ya usaron las métricas (nulos, tipo,
+patrón), así que no se vuelven a calcular (salvo en las columnas a las que
+strip les cambia algún valor); el rango se toma de `range` en el
+esquema o de las reglas 'range' de la columna. Sólo se reemplazan las columnas
+que cambian (el resto del DataFrame no se copia) y sus perfiles se recalculan;
+los de las demás columnas siguen valiendo.
+
+El log tiene una fila por celda corregida (row, column, action, old_value,
+new_value) con column/action como categorías; se escribe en Parquet si
+pyarrow está instalado y si no en CSV.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from scripts.column_profile import ColumnProfile
+
+# Orden de aplicación: strip normaliza antes de validar y fill_null va al final
+# para rellenar también lo anulado antes
+ACTIONS = ('strip', 'type_mismatch', 'pattern_mismatch', 'out_of_range', 'fill_null')
+LOG_COLUMNS = ['row', 'column', 'action', 'old_value', 'new_value']
+# Valores admitidos por acción (fill_null admite cualquier valor de relleno)
+OPTIONS = {
+    'strip': (True, False),
+    'type_mismatch': (None, 'null', 'coerce'),
+    'pattern_mismatch': (None, 'null'),
+    'out_of_range': (None, 'null', 'clip'),
+}
+
+
+def validate_config(column: str, config: dict) -> None:
+    """ValueError si `remediation` tiene acciones o valores no soportados."""
+    for action, option in config.items():
+        if action not in ACTIONS:
+            raise ValueError(f"Remediación de '{column}': acción desconocida {action!r} "
+                             f"(acciones: {', '.join(ACTIONS)})")
+        allowed = OPTIONS.get(action)
+        if allowed is not None and option not in allowed:
+            raise ValueError(f"Remediación de '{column}': {action}={option!r} no soportado "
+                             f"(valores: {', '.join(map(str, allowed))})")
+
+
+def _range_bounds(column: str, col_schema: dict, rules) -> tuple:
+    """(min, max) de `range` en el esquema o de la primera regla 'range' de la columna."""
+    if col_schema.get('range'):
+        lo, hi = col_schema['range']
+        return lo, hi
+    for rule in rules or []:
+        if rule.get('type') == 'range' and rule.get('column') == column:
+            return rule['min'], rule['max']
+    return None
+
+
+def _set_null(s: pd.Series, mask: np.ndarray) -> pd.Series:
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in 'iub':
+        # Con dtypes numpy, los enteros pasarían a float: se usa el dtype nullable
+        nullable = {'b': 'boolean', 'i': f'Int{s.dtype.itemsize * 8}', 'u': f'UInt{s.dtype.itemsize * 8}'}
+        s = s.astype(nullable[s.dtype.kind])
+    return s.mask(mask)
+
+
+def _fill(s: pd.Series, mask: np.ndarray, value) -> pd.Series:
+    if isinstance(s.dtype, pd.CategoricalDtype) and value not in s.cat.categories:
+        s = s.cat.add_categories([value])
+    return s.mask(mask, value)
+
+
+def _strip(s: pd.Series) -> tuple:
+    """(máscara de valores con espacios sobrantes, serie sin ellos) o (None, None)."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        cats = s.cat.categories
+        if cats.inferred_type != 'string':
+            return None, None
+        # Sobre las categorías, no fila a fila
+        new_cats = cats.str.strip()
+        codes = s.cat.codes.to_numpy()
+        mask = (codes >= 0) & np.asarray(new_cats != cats)[codes]
+        new = pd.Series(new_cats.to_numpy(dtype=object)[codes], index=s.index).where(codes >= 0)
+        return mask, new.astype('category')
+    if isinstance(s.dtype, pd.StringDtype):
+        new = s.str.strip()
+    elif s.dtype == object:
+        new = s.map(lambda v: v.strip() if isinstance(v, str) else v, na_action='ignore')
+    else:
+        return None, None
+    # En object, None != None: sólo cuentan los valores no nulos
+    mask = ((new != s) & s.notna()).fillna(False).to_numpy(dtype=bool)
+    return mask, new
+
+
+def _remediate_column(s: pd.Series, prof: ColumnProfile, config: dict, bounds: tuple) -> tuple:
+    """
+    Aplica las correcciones de una columna sobre las máscaras de su perfil.
+    Devuelve (serie corregida o None si no cambia, [(acción, posiciones, antes, después)]).
+    """
+    log = []
+    nulls = prof.null_mask.to_numpy()
+    for action in ACTIONS:
+        if action not in config:
+            continue
+        option = config[action]
+        # fill_null: null no rellena nada; strip: false desactiva
+        if option is False or (action == 'fill_null' and option is None):
+            continue
+        if action == 'type_mismatch':
+            mask = prof.type_mismatch_mask.to_numpy() & ~nulls
+            if option == 'coerce' and mask.any():
+                if prof.schema.get('type') == 'date':
+                    coerced = pd.to_datetime(s, format=prof.schema.get('format'), errors='coerce')
+                else:
+                    coerced = pd.to_numeric(s, errors='coerce')
+                new = s.mask(mask, coerced) if s.dtype == object else coerced
+            else:
+                new = _set_null(s, mask)
+        elif action == 'pattern_mismatch':
+            if prof.pattern_mask is None:
+                continue
+            # pattern_mask está alineada con los valores no nulos
+            mask = np.zeros(len(s), dtype=bool)
+            mask[~nulls] = ~prof.pattern_mask.to_numpy()
+            new = _set_null(s, mask)
+        elif action == 'out_of_range':
+            if bounds is None:
+                continue
+            lo, hi = bounds
+            if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+                numeric = s
+            elif s.dtype == object:
+                # Columnas mixtas: sólo se comparan los valores que ya son números
+                numeric = pd.to_numeric(s.map(
+                    lambda v: v if isinstance(v, (int, float, np.number)) and not isinstance(v, bool) else None,
+                    na_action='ignore'
+                ))
+            else:
+                continue
+            mask = ((numeric < lo) | (numeric > hi)).fillna(False).to_numpy(dtype=bool)
+            if option == 'clip' and numeric is s:
+                new = s.clip(lo, hi)
+            elif option == 'clip':
+                clipped = numeric[mask].clip(lo, hi)
+                if prof.schema.get('type') == 'integer':
+                    # to_numeric deja float64; en columnas integer se mantienen enteros
+                    clipped = clipped.astype('int64').astype(object)
+                new = s.mask(mask, clipped)
+            else:
+                new = _set_null(s, mask)
+        elif action == 'strip':
+            mask, new = _strip(s)
+            if mask is None:
+                continue
+        else:  # fill_null
+            mask = nulls
+            new = _fill(s, mask, option)
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            continue
+        log.append((action, rows, s.iloc[rows], new.iloc[rows]))
+        s = new
+        if action == 'strip':
+            # Los valores cambiaron: las máscaras de tipo y patrón se recalculan
+            prof = ColumnProfile(s, prof.schema)
+        # Las máscaras de los pasos siguientes ven los nulos nuevos
+        nulls = s.isna().to_numpy()
+
+    return (s if log else None), log
+
+
+def apply_remediation(df: pd.DataFrame, schema: dict, profiles: dict = None, rules=None) -> tuple:
+    """
+    Corrige en sitio las columnas con `remediation` en el esquema.
+    - profiles: perfiles de las métricas (se reutilizan sus máscaras); los de
+      las columnas corregidas se sustituyen por perfiles nuevos.
+    - rules: reglas de negocio, para tomar los límites de las reglas 'range'.
+    Devuelve (df, log, columnas cambiadas). df es el mismo objeto recibido.
+    """
+    profiles = profiles if profiles is not None else {}
+    for col in df.columns:
+        validate_config(col, (schema.get(col) or {}).get('remediation') or {})
+    chunks, changed = [], []
+    for col in df.columns:
+        col_schema = schema.get(col) or {}
+        config = col_schema.get('remediation')
+        if not config:
+            continue
+        prof = profiles.get(col)
+        if prof is None:
+            prof = profiles[col] = ColumnProfile(df[col], col_schema)
+        new, log = _remediate_column(df[col], prof, config, _range_bounds(col, col_schema, rules))
+        if new is None:
+            continue
+        # Sólo se reemplaza esta columna; el resto del DataFrame no se toca
+        df[col] = new
+        profiles[col] = ColumnProfile(df[col], col_schema)
+        changed.append(col)
+        for action, rows, old, new_values in log:
+            chunks.append(pd.DataFrame({
+                # Etiqueta de índice: fila del fichero de entrada
+                'row': df.index[rows],
+                'column': col,
+                'action': action,
+                'old_value': old.astype(str).to_numpy(),
+                'new_value': new_values.astype(str).to_numpy(),
+            }))
+
+    log = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=LOG_COLUMNS)
+    log['column'] = log['column'].astype('category')
+    log['action'] = log['action'].astype('category')
+    return df, log, changed
+
+
+def write_log(log: pd.DataFrame, outdir: str) -> str:
+    """Escribe el log en outdir/remediation_log.parquet (o .csv sin pyarrow)."""
+    os.makedirs(outdir, exist_ok=True)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:  # pragma: no cover - pyarrow es opcional
+        path = os.path.join(outdir, 'remediation_log.csv')
+        log.to_csv(path, index=False)
+        return path
+    path = os.path.join(outdir, 'remediation_log.parquet')
+    log.to_parquet(path, index=False, compression='zstd')
+    return path
@@ -1,7 +1,16 @@
 import json
 import os
+from functools import lru_cache
 from jinja2 import Environment, FileSystemLoader
 
+# Plantillas del paquete (templates/ en la raíz del repositorio)
+TEMPLATE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'templates'))
+
+@lru_cache(maxsize=None)
+def _environment(template_dir: str) -> Environment:
+    # Un entorno por carpeta y proceso: en modo batch la plantilla se compila una vez
+    return Environment(loader=FileSystemLoader(template_dir))
+
 def render_html(json_path: str, template_dir: str, output_path: str):
     # 1. Carga el summary
     with open(json_path, 'r', encoding='utf-8') as f:
@@ -28,8 +37,7 @@ def render_html(json_path: str, template_dir: str, output_path: str):
     }
 
     # 4. Monta el entorno Jinja
-    env = Environment(loader=FileSystemLoader(template_dir))
-    tpl = env.get_template('index.html')
+    tpl = _environment(template_dir).get_template('index.html')
 
     # 5. Genera el HTML
     html = tpl.render(
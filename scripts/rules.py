@@ -1,7 +1,11 @@
 import os
+import time
 import yaml
+import numpy as np
 import pandas as pd
 
+from scripts.column_profile import ColumnProfile
+
 def load_rules(path: str):
     """
     Lee el fichero YAML de reglas y devuelve la lista de reglas.
@@ -10,40 +14,189 @@ def load_rules(path: str):
         cfg = yaml.safe_load(f)
     return cfg.get('rules', [])
 
-def apply_business_rules(df: pd.DataFrame, rules) -> pd.DataFrame:
+def _shared_key(rule: dict):
     """
-    Aplica cada regla configurada:
-      - not_null, unique, range, non_empty_string
-    Devuelve un DataFrame con columnas: rule, column, success, observed.
+    Cálculo intermedio que resuelve la regla; dos reglas con la misma clave sobre
+    la misma columna comparten el resultado.
     """
-    records = []
-    for rule in rules:
-        col = rule['column']
-        cols = df.columns if col == 'any' else [col]
-        for c in cols:
-            s = df[c]
-            t = rule['type']
-            if t == 'not_null':
-                n = s.isnull().sum(); ok = (n==0); obs = f"{n} nulls"
-            elif t == 'unique':
-                n = s.duplicated().sum(); ok = (n==0); obs = f"{n} duplicates"
-            elif t == 'range':
-                lo, hi = rule['min'], rule['max']
-                below = (s < lo).sum(); above = (s > hi).sum()
-                ok = (below==0 and above==0)
-                obs = f"{below}<{lo}, {above}>{hi}"
-            elif t == 'non_empty_string':
-                empty = s.astype(str).str.strip().eq('').sum()
-                ok = (empty==0); obs = f"{empty} empty"
-            else:
-                ok, obs = True, ''
+    t = rule['type']
+    if t == 'range':
+        return ('range', rule['min'], rule['max'])
+    if t in ('not_null', 'unique', 'non_empty_string'):
+        return (t,)
+    return None
+
+def _rule_counts(rule: dict, s: pd.Series, col_schema: dict = None, prof: ColumnProfile = None) -> dict:
+    """
+    Conteos parciales (sumables entre chunks) de una regla sobre una columna.
+    Si se pasa el ColumnProfile de la columna se reutilizan su máscara de nulos,
+    su conteo de distintos y su vista numérica ordenada.
+    Con `sketch: hll` en el esquema, 'unique' se estima con HyperLogLog y
+    devuelve también la cota de error.
+    """
+    if prof is None:
+        prof = ColumnProfile(s, col_schema)
+    t = rule['type']
+    if t == 'not_null':
+        return {'nulls': prof.n_nulls}
+    if t == 'unique':
+        if prof.hll is not None:
+            return {'duplicates': prof.n_duplicates, 'error': prof.n_duplicates_error}
+        return {'duplicates': prof.n_duplicates}
+    if t == 'range':
+        lo, hi = rule['min'], rule['max']
+        numeric_bounds = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (lo, hi))
+        if prof.is_numeric and numeric_bounds:
+            # Búsqueda binaria sobre la vista ordenada que ya usa el perfil
+            values = prof.sorted_numeric
+            below = int(np.searchsorted(values, lo, side='left'))
+            above = int(len(values) - np.searchsorted(values, hi, side='right'))
+            return {'below': below, 'above': above}
+        return {'below': int((s < lo).sum()), 'above': int((s > hi).sum())}
+    if t == 'non_empty_string':
+        # Sobre los valores distintos (como texto) del perfil, no fila a fila
+        counts = prof.pattern_counts
+        empty = counts.index.str.strip() == ''
+        return {'empty': int(counts.to_numpy()[empty].sum())}
+    return {}
+
+def _rule_record(rule: dict, column: str, counts: dict) -> dict:
+    """
+    Convierte los conteos de una regla en el registro rule/column/success/observed.
+    """
+    t = rule['type']
+    if t == 'not_null':
+        n = counts['nulls']; ok = (n==0); obs = f"{n} nulls"
+    elif t == 'unique' and 'error' in counts:
+        # Estimación HyperLogLog: sólo se puede afirmar dentro de la cota de error
+        n, err = counts['duplicates'], counts['error']
+        ok = (n <= err); obs = f"~{n} duplicates (±{err})"
+    elif t == 'unique':
+        n = counts['duplicates']; ok = (n==0); obs = f"{n} duplicates"
+    elif t == 'range':
+        lo, hi = rule['min'], rule['max']
+        below, above = counts['below'], counts['above']
+        ok = (below==0 and above==0)
+        obs = f"{below}<{lo}, {above}>{hi}"
+    elif t == 'non_empty_string':
+        empty = counts['empty']
+        ok = (empty==0); obs = f"{empty} empty"
+    else:
+        ok, obs = True, ''
+    return {
+        'rule': rule['name'],
+        'column': column,
+        'success': ok,
+        'observed': obs
+    }
+
+class RulePlan:
+    """
+    Plan de ejecución compilado a partir de load_rules():
+      - expande `column: any` una sola vez, al compilar
+      - agrupa las reglas por columna y evalúa cada columna en una pasada
+      - comparte entre reglas los cálculos intermedios (máscara de nulos,
+        conteo de duplicados, astype(str).str.strip(), comparaciones de rango)
+        a través del ColumnProfile de la columna
+    execute() devuelve el mismo DataFrame que apply_business_rules y explain()
+    describe el coste de cada regla.
+    """
+
+    def __init__(self, rules, columns, schema: dict = None):
+        self.rules = list(rules or [])
+        self.schema = schema or {}
+        self.columns = list(columns)
+        # Pasos en el orden del informe: (índice de regla, regla, columna)
+        self.steps = []
+        self.by_column = {}
+        for i, rule in enumerate(self.rules):
+            cols = self.columns if rule['column'] == 'any' else [rule['column']]
+            for c in cols:
+                self.steps.append((i, rule, c))
+                self.by_column.setdefault(c, []).append((i, rule))
+        self._stats = {}
+
+    def execute(self, df: pd.DataFrame, profiles: dict = None) -> pd.DataFrame:
+        """
+        Evalúa el plan sobre df. Reutiliza `profiles` (ver build_profiles) si se
+        pasa; si no, crea un ColumnProfile por columna afectada.
+        """
+        counts = {}
+        self._stats = {}
+        for col, col_rules in self.by_column.items():
+            s = df[col]
+            prof = profiles[col] if profiles is not None else ColumnProfile(s, self.schema.get(col))
+            shared = {}
+            for i, rule in col_rules:
+                key = _shared_key(rule)
+                start = time.perf_counter()
+                reused = key is not None and key in shared
+                if not reused:
+                    result = _rule_counts(rule, s, self.schema.get(col), prof)
+                    if key is not None:
+                        shared[key] = result
+                else:
+                    result = shared[key]
+                counts[(i, col)] = result
+                self._stats[(i, col)] = {
+                    'rows': len(s),
+                    'reused': reused,
+                    'time_ms': round((time.perf_counter() - start) * 1000, 3)
+                }
+        return pd.DataFrame([_rule_record(rule, c, counts[(i, c)]) for i, rule, c in self.steps])
+
+    def explain(self) -> pd.DataFrame:
+        """
+        Una fila por (regla, columna) con:
+          - rule, column, type
+          - shared: cálculo intermedio que usa la regla
+          - reused: True si lo calculó antes otra regla de la misma columna
+          - rows, time_ms: filas y tiempo de la última ejecución (None si no se ejecutó)
+        """
+        records = []
+        for i, rule, c in self.steps:
+            key = _shared_key(rule)
+            stats = self._stats.get((i, c), {})
             records.append({
                 'rule': rule['name'],
                 'column': c,
-                'success': ok,
-                'observed': obs
+                'type': rule['type'],
+                'shared': ':'.join(str(k) for k in key) if key else None,
+                'reused': stats.get('reused'),
+                'rows': stats.get('rows'),
+                'time_ms': stats.get('time_ms')
             })
-    return pd.DataFrame(records)
+        return pd.DataFrame(records)
+
+def compile_rules(rules, columns, schema: dict = None) -> RulePlan:
+    """
+    Compila la lista de reglas (load_rules) para las columnas dadas.
+    """
+    return RulePlan(rules, columns, schema)
+
+def apply_business_rules(df: pd.DataFrame, rules, schema: dict = None, profiles: dict = None) -> pd.DataFrame:
+    """
+    Aplica cada regla configurada:
+      - not_null, unique, range, non_empty_string
+    Si se pasa el esquema, las columnas con `sketch: hll` resuelven 'unique'
+    de forma aproximada. Con `profiles` (ver build_profiles) reutiliza los
+    escaneos ya hechos por las métricas de calidad.
+    Devuelve un DataFrame con columnas: rule, column, success, observed.
+    """
+    return compile_rules(rules, df.columns, schema).execute(df, profiles)
+
+def referenced_columns(schema: dict, rules) -> list:
+    """
+    Columnas que usan schema.yml y rules.yml, para leer sólo esas.
+    Devuelve None si alguna regla aplica a `column: any` (hacen falta todas).
+    """
+    columns = list(schema or {})
+    for rule in rules or []:
+        if rule['column'] == 'any':
+            return None
+        if rule['column'] not in columns:
+            columns.append(rule['column'])
+    return columns
 
 def infer_schema(schema_path: str) -> dict:
     """
@@ -1,3 +1,6 @@
+DIMENSIONS = ('completitud', 'duplicados', 'consistencia', 'outliers')
+DEFAULT_WEIGHTS = {dim: 0.25 for dim in DIMENSIONS}
+
 def normalize(value: float, best: float = 0.0, worst: float = 100.0) -> float:
     """
     Mapea `value` en el rango [best, worst] a un float en [1.0, 0.0].
@@ -16,6 +19,8 @@ def compute_dimensions(metrics_df, rules_df, outliers_df=None) -> dict:
       - duplicados:   1 - avg(pct_duplicates)
       - consistencia: avg(success)
       - outliers:     1 - pct_outliers/100  (si outliers_df proporcionado)
+    outliers_df puede ser el perfil estadístico (columna pct_outliers: se usa
+    la media de las columnas numéricas) o una tabla con una fila por outlier.
     """
     # Completitud
     avg_null = metrics_df['pct_nulls'].mean() if not metrics_df.empty else 100.0
@@ -35,7 +40,11 @@ def compute_dimensions(metrics_df, rules_df, outliers_df=None) -> dict:
     }
 
     # Outliers (opcional)
-    if outliers_df is not None:
+    if outliers_df is not None and 'pct_outliers' in outliers_df.columns:
+        pct = outliers_df['pct_outliers'].dropna()
+        if len(pct):
+            dims['outliers'] = normalize(pct.mean(), best=0.0, worst=10.0)
+    elif outliers_df is not None:
         pct_out = (len(outliers_df) / len(metrics_df)) * 100 if len(metrics_df) else 100.0
         dims['outliers'] = normalize(pct_out, best=0.0, worst=10.0)
 
@@ -44,15 +53,50 @@ def compute_dimensions(metrics_df, rules_df, outliers_df=None) -> dict:
 def compute_overall_score(dims: dict, weights: dict = None) -> float:
     """
     dims: dict de {dimension: valor [0–1]}
-    weights: dict de {dimension: peso}, suma de pesos = 1.0
-    Devuelve score_global = sum(dims[dim]*peso)
+    weights: dict de {dimension: peso}; se normalizan sobre las dimensiones
+    presentes (sin outliers, las otras tres reparten todo el peso)
+    Devuelve score_global = sum(dims[dim]*peso) en [0, 1]
     """
     if weights is None:
-        weights = {
-            'completitud': 0.25,
-            'duplicados':   0.25,
-            'consistencia': 0.25,
-            'outliers':     0.25
-        }
-    score = sum(dims.get(k, 0.0) * weights.get(k, 0.0) for k in dims)
+        weights = DEFAULT_WEIGHTS
+    total = sum(weights.get(k, 0.0) for k in dims)
+    if not total:
+        return 0.0
+    score = sum(dims.get(k, 0.0) * weights.get(k, 0.0) for k in dims) / total
     return round(score, 3)
+
+def semaforo(score: float) -> str:
+    """VERDE desde 0.85, AMBAR desde 0.70, ROJO por debajo."""
+    return 'VERDE' if score >= 0.85 else 'AMBAR' if score >= 0.70 else 'ROJO'
+
+def build_summary(metrics_df, rules_df, profile_df=None, weights: dict = None) -> dict:
+    """
+    summary.json de una ejecución a partir de los informes de las etapas 3-5:
+    dimensiones, pesos, score_global [0–1] y semáforo.
+    """
+    dims = compute_dimensions(metrics_df, rules_df, profile_df)
+    if rules_df.empty:
+        # Sin reglas de negocio no hay consistencia que medir
+        del dims['consistencia']
+    score = compute_overall_score(dims, weights)
+    return {
+        'dimensions': dims,
+        'weights': weights or DEFAULT_WEIGHTS,
+        'score_global': score,
+        'semaforo': semaforo(score)
+    }
+
+def parse_weights(text: str) -> dict:
+    """
+    'completitud=0.4,consistencia=0.4,...' -> {dimension: peso}; las
+    dimensiones que no aparecen pesan 0.
+    """
+    weights = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        name, sep, value = item.partition('=')
+        if not sep or name.strip() not in DIMENSIONS:
+            raise ValueError(f"Peso no válido: {item!r} (formato dimension=peso; dimensiones: {', '.join(DIMENSIONS)})")
+        weights[name.strip()] = float(value)
+    if any(w < 0 for w in weights.values()) or not sum(weights.values()):
+        raise ValueError("Los pesos deben ser >= 0 y no todos 0")
+    return weights
@@ -0,0 +1,462 @@
+import base64
+import math
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+class KLLSketch:
+    """
+    Sketch de cuantiles KLL (Karnin, Lang, Liberty 2016) fusionable.
+    Mantiene O(k) valores en compactadores por niveles; un valor en el nivel h
+    representa 2**h observaciones.
+    Mientras no se ha compactado nada (n <= k) los cuantiles y rangos son exactos.
+    Error de rango normalizado ~ normalized_rank_error(k) (≈1.33% con k=200,
+    99% de confianza).
+    """
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = int(k)
+        self.n = 0
+        self.levels = [np.empty(0, dtype=float)]
+        self._rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def normalized_rank_error(k: int = 200) -> float:
+        """Cota empírica del error de rango (apache datasketches, un solo lado)."""
+        return 2.296 / k ** 0.9723
+
+    @property
+    def is_exact(self) -> bool:
+        return len(self.levels) == 1
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values) -> None:
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: 'KLLSketch') -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=float))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+
+    def _compress(self) -> None:
+        while sum(len(items) for items in self.levels) > sum(
+            self._capacity(h) for h in range(len(self.levels))
+        ):
+            for h in range(len(self.levels)):
+                if len(self.levels[h]) >= self._capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append(np.empty(0, dtype=float))
+                    items = np.sort(self.levels[h])
+                    # Con tamaño impar un elemento se queda en el nivel
+                    keep = items[-1:] if len(items) % 2 else items[:0]
+                    pairs = items[:len(items) - len(keep)]
+                    offset = int(self._rng.integers(0, 2))
+                    self.levels[h + 1] = np.concatenate([self.levels[h + 1], pairs[offset::2]])
+                    self.levels[h] = keep
+                    break
+
+    def _weighted(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(items), 2 ** h, dtype=np.int64) for h, items in enumerate(self.levels)
+        ])
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+    def rank(self, x: float, inclusive: bool = False) -> int:
+        """Número (estimado) de observaciones < x (<= x si inclusive)."""
+        side = 'right' if inclusive else 'left'
+        total = 0
+        for h, items in enumerate(self.levels):
+            items = np.sort(items)
+            total += int(np.searchsorted(items, x, side=side)) * 2 ** h
+        return total
+
+    def quantiles(self, qs) -> list:
+        """
+        Percentiles (0–100). Con el sketch exacto coincide con np.percentile
+        (interpolación lineal); tras compactar, error de rango acotado.
+        """
+        if self.n == 0:
+            return [float('nan')] * len(qs)
+        if self.is_exact:
+            return [float(v) for v in np.percentile(self.levels[0], qs)]
+        values, weights = self._weighted()
+        cum = np.cumsum(weights)
+        out = []
+        for q in qs:
+            target = q / 100 * (self.n - 1)
+            idx = min(int(np.searchsorted(cum, target, side='right')), len(values) - 1)
+            out.append(float(values[idx]))
+        return out
+
+
+def hash_values(values) -> np.ndarray:
+    """
+    Hash uint64 estable (entre chunks y ejecuciones) de valores no nulos.
+    Los float enteros se hashean como int para que 5 y 5.0 coincidan, igual
+    que en duplicated().
+    """
+    values = pd.Series(values) if not isinstance(values, pd.Series) else values
+    dtype = values.dtype
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return pd.util.hash_array(values.to_numpy(dtype=np.int64))
+    if pd.api.types.is_float_dtype(dtype):
+        arr = values.to_numpy(dtype=float)
+        integral = np.isfinite(arr) & (arr == np.floor(arr)) & (np.abs(arr) < 2 ** 63)
+        as_int = pd.util.hash_array(np.where(integral, arr, 0).astype(np.int64))
+        return np.where(integral, as_int, pd.util.hash_array(arr))
+    return pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """bit_length vectorizado para uint64 (exacto: trabaja en mitades de 32 bits)."""
+    hi = (x >> np.uint64(32)).astype(float)
+    lo = (x & np.uint64(0xFFFFFFFF)).astype(float)
+    return np.where(hi > 0, 32 + np.frexp(hi)[1], np.frexp(lo)[1])
+
+
+class HyperLogLog:
+    """
+    Estimador HyperLogLog (Flajolet et al. 2007) del número de valores distintos.
+    Usa 2**p registros de un byte (16 KiB con p=14) y es fusionable: el máximo
+    registro a registro de dos sketches equivale al sketch de la unión.
+    Error estándar relativo: 1.04 / sqrt(2**p) (0.81% con p=14).
+    """
+
+    def __init__(self, p: int = 14):
+        if not 4 <= p <= 18:
+            raise ValueError("hll_precision debe estar entre 4 y 18")
+        self.p = int(p)
+        self.m = 1 << self.p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / np.sqrt(self.m)
+
+    def update(self, values) -> None:
+        hashes = hash_values(values)
+        if not len(hashes):
+            return
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes << np.uint64(self.p)
+        # rho = posición del primer bit a 1 en los 64-p bits restantes
+        rho = np.minimum(64 - _bit_length(rest) + 1, 64 - self.p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rho)
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        if other.p != self.p:
+            raise ValueError("No se pueden fusionar HyperLogLog de distinta precisión")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Corrección de rango pequeño (linear counting)
+            return float(m * np.log(m / zeros))
+        return float(raw)
+
+    def to_dict(self) -> dict:
+        return {
+            'type': 'hll',
+            'p': self.p,
+            'registers': base64.b64encode(zlib.compress(self.registers.tobytes())).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'HyperLogLog':
+        sketch = cls(data['p'])
+        raw = zlib.decompress(base64.b64decode(data['registers']))
+        sketch.registers = np.frombuffer(raw, dtype=np.uint8).copy()
+        return sketch
+
+
+def _encode_array(values: np.ndarray, dtype=float) -> str:
+    return base64.b64encode(zlib.compress(np.ascontiguousarray(values, dtype=dtype).tobytes())).decode('ascii')
+
+
+def _decode_array(data: str, dtype=float) -> np.ndarray:
+    return np.frombuffer(zlib.decompress(base64.b64decode(data)), dtype=dtype).copy()
+
+
+class NumericSketch:
+    """
+    Resumen fusionable de una columna numérica en una sola pasada y memoria
+    acotada: filas totales, momentos (media y M2, combinados con Chan et al.)
+    y un KLLSketch para los cuantiles. Los outliers IQR se estiman con
+    consultas de rango sobre el mismo sketch.
+    Serializable con to_dict/from_dict para fusionar particiones o días previos.
+    """
+
+    def __init__(self, k: int = 200):
+        self.n_rows = 0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.kll = KLLSketch(k)
+
+    def update(self, values, n_rows: int = None) -> None:
+        """Añade un bloque de valores (los NaN cuentan como filas, no como valores)."""
+        arr = np.asarray(values, dtype=float)
+        valid = arr[~np.isnan(arr)]
+        self.n_rows += len(arr) if n_rows is None else n_rows
+        if len(valid):
+            mean = float(valid.mean())
+            self._merge_moments(len(valid), mean, float(((valid - mean) ** 2).sum()))
+            self.kll.update(valid)
+
+    def _merge_moments(self, n: int, mean: float, m2: float) -> None:
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.n * n / total
+        self.n = total
+
+    def merge(self, other: 'NumericSketch') -> None:
+        self.n_rows += other.n_rows
+        if other.n:
+            self._merge_moments(other.n, other.mean, other.m2)
+            self.kll.merge(other.kll)
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / self.n)) if self.n else float('nan')
+
+    def stats(self) -> dict:
+        """mean, std, percentiles y n_outliers (IQR 1.5×) estimados."""
+        q10, q25, median, q75, q90 = self.kll.quantiles([10, 25, 50, 75, 90])
+        iqr = q75 - q25
+        lower, upper = q25 - 1.5*iqr, q75 + 1.5*iqr
+        n_outliers = self.kll.rank(lower) + (self.n - self.kll.rank(upper, inclusive=True))
+        return {
+            'mean': self.mean, 'std': self.std, 'median': median,
+            'pct10': q10, 'pct25': q25, 'pct75': q75, 'pct90': q90,
+            'n_outliers': int(n_outliers)
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            'type': 'numeric',
+            'n_rows': self.n_rows,
+            'n': self.n,
+            'mean': self.mean,
+            'm2': self.m2,
+            'k': self.kll.k,
+            'kll_n': self.kll.n,
+            'kll_levels': [_encode_array(items) for items in self.kll.levels]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'NumericSketch':
+        sketch = cls(data['k'])
+        sketch.n_rows = data['n_rows']
+        sketch.n = data['n']
+        sketch.mean = data['mean']
+        sketch.m2 = data['m2']
+        sketch.kll.n = data['kll_n']
+        sketch.kll.levels = [_decode_array(items) for items in data['kll_levels']]
+        return sketch
+
+
+class KeySet:
+    """
+    Conjunto exacto de valores distintos guardado como hashes uint64 ordenados
+    (8 bytes por clave, ver hash_values). Fusionable y serializable como
+    HyperLogLog; exacto salvo colisiones de 64 bits (probabilidad ~n²/2**65).
+    """
+
+    def __init__(self):
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._pending = []
+        self._pending_size = 0
+
+    def update(self, values) -> None:
+        """Añade valores no nulos."""
+        self._add(np.unique(hash_values(values)))
+
+    def _add(self, hashes: np.ndarray) -> None:
+        if not len(hashes):
+            return
+        self._pending.append(hashes)
+        self._pending_size += len(hashes)
+        # Se consolida cuando lo pendiente supera a lo ya consolidado: coste amortizado lineal
+        if self._pending_size > len(self._keys):
+            self._consolidate()
+
+    def _consolidate(self) -> None:
+        if self._pending:
+            self._keys = np.unique(np.concatenate([self._keys] + self._pending))
+            self._pending = []
+            self._pending_size = 0
+
+    def merge(self, other: 'KeySet') -> None:
+        other._consolidate()
+        self._add(other._keys)
+
+    def __len__(self) -> int:
+        self._consolidate()
+        return len(self._keys)
+
+    def to_dict(self) -> dict:
+        self._consolidate()
+        return {
+            'type': 'keys',
+            'keys': base64.b64encode(zlib.compress(self._keys.tobytes())).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'KeySet':
+        keys = cls()
+        raw = zlib.decompress(base64.b64decode(data['keys']))
+        keys._keys = np.frombuffer(raw, dtype=np.uint64).copy()
+        return keys
+
+
+class FrequencySketch:
+    """
+    Frecuencias aproximadas de una columna categórica o de texto en memoria
+    acotada, sea cual sea su cardinalidad:
+      - Count-Min (Cormode y Muthukrishnan 2005) de depth x width contadores:
+        estima la frecuencia de cualquier valor por exceso, con error
+        <= e/width · n con probabilidad 1 - exp(-depth).
+      - Resumen Misra-Gries de `capacity` contadores con los valores más
+        frecuentes (heavy hitters) y su etiqueta legible.
+    Ambos son fusionables (suma de tablas; Misra-Gries según Agarwal et al. 2012)
+    si comparten parámetros y semilla.
+    """
+
+    def __init__(self, capacity: int = 64, width: int = 2048, depth: int = 4, seed: int = 0):
+        if width & (width - 1):
+            raise ValueError("width debe ser potencia de 2")
+        self.capacity = capacity
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.n = 0
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        # Multiplicadores impares: hash multiplicativo por fila sobre el hash de 64 bits
+        self._mult = rng.integers(0, 2 ** 63, depth, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._shift = np.uint64(64 - int(np.log2(width)))
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.labels = {}
+
+    def _rows(self, hashes: np.ndarray) -> np.ndarray:
+        with np.errstate(over='ignore'):
+            return ((hashes[None, :] * self._mult[:, None]) >> self._shift).astype(np.intp)
+
+    def update(self, values) -> None:
+        """Añade valores no nulos."""
+        vc = pd.Series(values).value_counts(sort=False)
+        if not len(vc):
+            return
+        hashes = hash_values(pd.Series(vc.index))
+        counts = vc.to_numpy(dtype=np.int64)
+        self.n += int(counts.sum())
+        for row, idx in enumerate(self._rows(hashes)):
+            np.add.at(self.table[row], idx, counts)
+        labels = dict(zip(hashes.tolist(), vc.index.astype(str)))
+        self._merge_summary(hashes, counts, labels)
+
+    def _merge_summary(self, keys: np.ndarray, counts: np.ndarray, labels: dict) -> None:
+        keys, inverse = np.unique(np.concatenate([self.keys, keys]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([self.counts, counts])).astype(np.int64)
+        if len(keys) > self.capacity:
+            # Reducción de Misra-Gries: se resta el (capacity+1)-ésimo mayor contador
+            cut = np.partition(counts, len(counts) - self.capacity - 1)[len(counts) - self.capacity - 1]
+            counts = counts - cut
+            keep = counts > 0
+            keys, counts = keys[keep], counts[keep]
+        merged = {**labels, **self.labels}
+        self.keys, self.counts = keys, counts
+        self.labels = {k: merged[k] for k in keys.tolist()}
+
+    def merge(self, other: 'FrequencySketch') -> None:
+        if (other.width, other.depth, other.seed) != (self.width, self.depth, self.seed):
+            raise ValueError("Sólo se fusionan FrequencySketch con los mismos parámetros")
+        self.n += other.n
+        self.table += other.table
+        self._merge_summary(other.keys, other.counts, other.labels)
+
+    def estimate(self, hashes: np.ndarray) -> np.ndarray:
+        """Frecuencia estimada (por exceso) de cada hash."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(hashes):
+            return np.empty(0, dtype=np.int64)
+        rows = self._rows(hashes)
+        return np.min(self.table[np.arange(self.depth)[:, None], rows], axis=0)
+
+    def top(self, n: int = 20) -> np.ndarray:
+        """Hashes de los n valores más frecuentes según el resumen Misra-Gries."""
+        order = np.argsort(-self.counts, kind='stable')[:n]
+        return self.keys[order]
+
+    def to_dict(self) -> dict:
+        return {
+            'type': 'frequency',
+            'capacity': self.capacity,
+            'width': self.width,
+            'depth': self.depth,
+            'seed': self.seed,
+            'n': self.n,
+            'table': _encode_array(self.table, np.int64),
+            'keys': _encode_array(self.keys, np.uint64),
+            'counts': _encode_array(self.counts, np.int64),
+            'labels': [self.labels[k] for k in self.keys.tolist()]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'FrequencySketch':
+        sketch = cls(data['capacity'], data['width'], data['depth'], data['seed'])
+        sketch.n = data['n']
+        sketch.table = _decode_array(data['table'], np.int64).reshape(sketch.depth, sketch.width)
+        sketch.keys = _decode_array(data['keys'], np.uint64)
+        sketch.counts = _decode_array(data['counts'], np.int64)
+        sketch.labels = dict(zip(sketch.keys.tolist(), data['labels']))
+        return sketch
+
+
+_SKETCH_TYPES = {'numeric': NumericSketch, 'hll': HyperLogLog, 'keys': KeySet, 'frequency': FrequencySketch}
+
+
+def dump_sketches(sketches: dict) -> dict:
+    """{columna: sketch} -> dict serializable a JSON (ver io_utils.save_json)."""
+    return {col: sketch.to_dict() for col, sketch in sketches.items()}
+
+
+def load_sketches(data: dict) -> dict:
+    """Inversa de dump_sketches."""
+    return {col: _SKETCH_TYPES[state['type']].from_dict(state) for col, state in data.items()}
+
+
+def merge_sketches(base: dict, other: dict) -> dict:
+    """
+    Fusiona dos dicts {columna: sketch} (p.ej. histórico + partición nueva) sin
+    modificar los originales.
+    """
+    merged = load_sketches(dump_sketches(base))
+    for col, sketch in other.items():
+        if col in merged:
+            merged[col].merge(sketch)
+        else:
+            merged[col] = load_sketches({col: sketch.to_dict()})[col]
+    return merged
@@ -0,0 +1,378 @@
+"""
+Backend SQL (--backend duckdb): las comprobaciones de schema.yml y rules.yml se
+traducen a una única consulta agregada por tabla que DuckDB ejecuta en paralelo
+y fuera de memoria; los datos nunca se cargan en pandas.
+
+Fuentes: Parquet, CSV y Arrow IPC (los escanea DuckDB), una tabla de un
+fichero .duckdb/.db y, si la extensión sqlite de DuckDB está instalada, de un
+fichero .sqlite.
+
+Los informes tienen las mismas columnas que los del camino pandas y, con
+Parquet, Arrow o tablas DuckDB, los mismos valores. Los tipos se interpretan
+como quedarían tras cargarlos en pandas: un entero con nulos llega como float,
+un booleano cuenta como entero y DECIMAL, fecha y texto no son números. Los
+patrones y las fechas se comprueban sobre el texto que daría str(valor).
+Diferencias conocidas:
+- Los patrones se evalúan con RE2 (regexp_matches anclado al inicio, como
+  re.match), donde \\d, \\w y \\s son ASCII. Un patrón que RE2 no acepta da error.
+- En CSV los tipos los infiere DuckDB (read_csv), no pandas.
+- `sketch: hll` usa approx_count_distinct de DuckDB (64 registros, error
+  estándar ~13%); pct_duplicates_error refleja esa cota.
+- Con --profile-method sketch los percentiles salen de approx_quantile
+  (t-digest) en lugar de KLL.
+
+Uso:
+    audit = sql_audit('data/ventas.duckdb', schema, rules, table='ventas')
+    audit.quality_metrics(); audit.business_rules(); print(audit.sql)
+"""
+import numpy as np
+import pandas as pd
+
+from scripts.load import input_format
+from scripts.metrics import _quality_record, _pattern_record, _format_profile
+from scripts.rules import _rule_record
+
+_INTEGER_TYPES = {
+    'TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT',
+    'UTINYINT', 'USMALLINT', 'UINTEGER', 'UBIGINT', 'UHUGEINT',
+}
+_FLOAT_TYPES = {'FLOAT', 'DOUBLE'}
+_PERCENTILES = [10, 25, 50, 75, 90]
+# approx_count_distinct de DuckDB: HyperLogLog de 2**6 registros
+DUCKDB_HLL_ERROR = 1.04 / 8
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _literal(value) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    return repr(value)
+
+
+def _kind(sql_type: str) -> str:
+    """Clase del tipo SQL: 'i' entero, 'f' float, 'b' booleano, 'O' el resto."""
+    if sql_type in _INTEGER_TYPES:
+        return 'i'
+    if sql_type in _FLOAT_TYPES:
+        return 'f'
+    if sql_type == 'BOOLEAN':
+        return 'b'
+    return 'O'
+
+
+class _SqlColumn:
+    """
+    Resultados de una columna con los atributos de ColumnProfile que usan los
+    registros de scripts.metrics (_quality_record, _pattern_record).
+    """
+
+    def __init__(self, name: str, sql_type: str, col_schema: dict = None):
+        self.name = name
+        self.sql_type = sql_type
+        self.schema = col_schema or {}
+        self.kind = _kind(sql_type)
+        self.hll = self.schema.get('sketch') == 'hll'
+        self.total = 0
+        self.n_nulls = 0
+        self.n_distinct_values = 0
+        # Conteos sobre el texto de cada variante: {'raw'|'float': {'type_ok', 'pattern_ok'}}
+        self.texts = {}
+        self.profile = {}
+
+    @property
+    def pandas_kind(self) -> str:
+        # Como en la carga con pandas: un nulo convierte la columna entera en float
+        return 'f' if self.kind == 'i' and self.n_nulls else self.kind
+
+    @property
+    def text(self) -> dict:
+        return self.texts.get('float' if self.pandas_kind == 'f' and self.kind == 'i' else 'raw', {})
+
+    @property
+    def n_valid(self) -> int:
+        return self.total - self.n_nulls
+
+    @property
+    def n_duplicates(self) -> int:
+        return max(self.total - self.n_distinct_values - (1 if self.n_nulls else 0), 0)
+
+    @property
+    def n_duplicates_error(self) -> int:
+        if not self.hll:
+            return 0
+        return int(np.ceil(2 * DUCKDB_HLL_ERROR * self.n_distinct_values))
+
+    @property
+    def n_type_mismatch(self) -> int:
+        expected_type = self.schema.get('type')
+        if expected_type == 'integer':
+            return 0 if self.pandas_kind in ('i', 'b') else self.n_valid
+        if expected_type == 'number':
+            return 0 if self.pandas_kind in ('i', 'f', 'b') else self.n_valid
+        if expected_type == 'date':
+            if not self.schema.get('format'):
+                return self.n_valid
+            return self.n_valid - self.text['type_ok']
+        return 0
+
+    @property
+    def n_pattern_matches(self) -> int:
+        return self.text['pattern_ok'] if self.schema.get('pattern') else 0
+
+    @property
+    def n_pattern_mismatches(self) -> int:
+        if not self.schema.get('pattern'):
+            return 0
+        return self.n_valid - self.n_pattern_matches
+
+
+class SqlAudit:
+    """
+    Traduce esquema y reglas a una consulta sobre las columnas {nombre: tipo SQL}
+    y guarda sus resultados; expone los mismos informes que StreamingAudit.
+        audit = SqlAudit(schema, rules, {'edad': 'BIGINT', ...})
+        audit.collect(con.execute(audit.query('read_parquet(...)')))
+    """
+
+    def __init__(self, schema: dict, rules: list, column_types: dict, profile_method: str = 'exact'):
+        if profile_method not in ('exact', 'sketch'):
+            raise ValueError(f"method desconocido: {profile_method}")
+        self.schema = schema or {}
+        self.rules = rules or []
+        self.profile_method = profile_method
+        self.columns = {
+            c: _SqlColumn(c, t, self.schema.get(c)) for c, t in column_types.items()
+        }
+        self.steps = [
+            (i, rule, c) for i, rule in enumerate(self.rules)
+            for c in (list(self.columns) if rule['column'] == 'any' else [rule['column']])
+        ]
+        self.rule_counts = {}
+        self.row_count = 0
+        self.sql = None
+        self._targets = {}
+
+    # --- Traducción a SQL -----------------------------------------------------
+    def _add(self, exprs: dict, target: tuple, expr: str) -> str:
+        alias = f'a{len(self._targets)}'
+        exprs[alias] = expr
+        self._targets[alias] = target
+        return alias
+
+    @staticmethod
+    def _text_variants(col: _SqlColumn, q: str) -> dict:
+        """Texto de cada valor como str() en pandas (también como float si es entero)."""
+        if col.kind == 'b':
+            return {'raw': f"CASE WHEN {q} THEN 'True' ELSE 'False' END"}
+        variants = {'raw': f'CAST({q} AS VARCHAR)'}
+        if col.kind == 'i':
+            variants['float'] = f'CAST(CAST({q} AS DOUBLE) AS VARCHAR)'
+        return variants
+
+    def query(self, relation: str, where: str = '') -> str:
+        """Una sentencia: agregados de todas las columnas y reglas (+ outliers IQR)."""
+        self._targets = {}
+        agg, outliers = {}, {}
+        quantile = 'quantile_cont' if self.profile_method == 'exact' else 'approx_quantile'
+        fractions = '[' + ', '.join(str(p / 100) for p in _PERCENTILES) + ']'
+
+        # NaN cuenta como nulo (como en pandas): se convierte a NULL una vez en la
+        # proyección y los agregados ya ignoran los nulos sin FILTER por columna
+        projection = []
+        for name, col in self.columns.items():
+            q = _quote(name)
+            projection.append(f'CASE WHEN isnan({q}) THEN NULL ELSE {q} END AS {q}' if col.kind == 'f' else q)
+
+        for name, col in self.columns.items():
+            q = _quote(name)
+            self._add(agg, ('col', name, 'n_valid'), f'count({q})')
+            distinct = f'approx_count_distinct({q})' if col.hll else f'count(DISTINCT {q})'
+            self._add(agg, ('col', name, 'n_distinct_values'), distinct)
+
+            fmt, pattern = col.schema.get('format'), col.schema.get('pattern')
+            for variant, text in self._text_variants(col, q).items():
+                if col.schema.get('type') == 'date' and fmt:
+                    self._add(agg, ('text', name, variant, 'type_ok'), f'count(try_strptime({text}, {_literal(fmt)}))')
+                if pattern:
+                    # Anclado al inicio: misma semántica que re.match
+                    self._add(agg, ('text', name, variant, 'pattern_ok'),
+                              f"count(*) FILTER (WHERE regexp_matches({text}, {_literal(f'^(?:{pattern})')}))")
+
+            if col.kind in ('i', 'f'):
+                x = f'CAST({q} AS DOUBLE)'
+                self._add(agg, ('profile', name, 'mean'), f'avg({x})')
+                self._add(agg, ('profile', name, 'std'), f'stddev_pop({x})')
+                qs = self._add(agg, ('profile', name, 'percentiles'), f'{quantile}({x}, {fractions})')
+                # Segunda pasada: necesita los cuartiles de la primera
+                q25, q75 = f'agg.{qs}[2]', f'agg.{qs}[4]'
+                self._add(outliers, ('profile', name, 'n_outliers'),
+                          f'count(*) FILTER (WHERE {x} < {q25} - 1.5 * ({q75} - {q25}) '
+                          f'OR {x} > {q75} + 1.5 * ({q75} - {q25}))')
+
+        for i, rule, c in self.steps:
+            col = self.columns[c]
+            q = _quote(c)
+            t = rule['type']
+            if t == 'range':
+                lo, hi = rule['min'], rule['max']
+                numeric_bounds = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (lo, hi))
+                if not numeric_bounds and col.kind in ('i', 'f'):
+                    raise ValueError(f"Regla {rule['name']}: límites no numéricos sobre la columna numérica {c}")
+                x = f'CAST({q} AS INTEGER)' if col.kind == 'b' else q
+                self._add(agg, ('rule', i, c, 'below'), f'count(*) FILTER (WHERE {x} < {_literal(lo)})')
+                self._add(agg, ('rule', i, c, 'above'), f'count(*) FILTER (WHERE {x} > {_literal(hi)})')
+            elif t == 'non_empty_string':
+                text = self._text_variants(col, q)['raw']
+                self._add(agg, ('rule', i, c, 'empty'), f"count(*) FILTER (WHERE regexp_matches({text}, '^\\s*$'))")
+
+        select = ',\n    '.join(['count(*) AS n_rows'] + [f'{e} AS {a}' for a, e in agg.items()])
+        sql = (f"WITH src AS (\n  SELECT {', '.join(projection)}\n  FROM {relation}{where}\n),\n"
+               f"agg AS (\n  SELECT\n    {select}\n  FROM src\n)\n")
+        if outliers:
+            inner = ',\n    '.join(f'{e} AS {a}' for a, e in outliers.items())
+            sql += f'SELECT * FROM agg, (\n  SELECT\n    {inner}\n  FROM src, agg\n) AS o'
+        else:
+            sql += 'SELECT * FROM agg'
+        self.sql = sql
+        return sql
+
+    def collect(self, result) -> 'SqlAudit':
+        """Reparte la fila de resultados (cursor de DuckDB) entre columnas y reglas."""
+        names = [d[0] for d in result.description]
+        values = dict(zip(names, result.fetchone()))
+        self.row_count = int(values['n_rows'])
+        for col in self.columns.values():
+            col.total = self.row_count
+        for alias, target in self._targets.items():
+            value = values[alias]
+            kind, name = target[0], target[1]
+            if kind == 'col' and target[2] == 'n_valid':
+                self.columns[name].n_nulls = self.row_count - int(value)
+            elif kind == 'col':
+                setattr(self.columns[name], target[2], int(value or 0))
+            elif kind == 'text':
+                self.columns[name].texts.setdefault(target[2], {})[target[3]] = int(value or 0)
+            elif kind == 'profile':
+                self.columns[name].profile[target[2]] = value
+            else:
+                self.rule_counts.setdefault((name, target[2]), {})[target[3]] = int(value or 0)
+        return self
+
+    # --- Informes ---------------------------------------------------------------
+    def quality_metrics(self) -> pd.DataFrame:
+        return pd.DataFrame([_quality_record(col) for col in self.columns.values()])
+
+    def business_rules(self) -> pd.DataFrame:
+        records = []
+        for i, rule, c in self.steps:
+            col = self.columns[c]
+            t = rule['type']
+            if t == 'not_null':
+                counts = {'nulls': col.n_nulls}
+            elif t == 'unique':
+                counts = {'duplicates': col.n_duplicates}
+                if col.hll:
+                    counts['error'] = col.n_duplicates_error
+            else:
+                counts = self.rule_counts.get((i, c), {})
+            records.append(_rule_record(rule, c, counts))
+        return pd.DataFrame(records)
+
+    def statistical_profile(self) -> pd.DataFrame:
+        records = []
+        for name, col in self.columns.items():
+            prof = col.profile
+            if not prof or not col.n_valid:
+                continue
+            q10, q25, median, q75, q90 = prof['percentiles']
+            stats = {
+                'mean': prof['mean'], 'std': prof['std'], 'median': median,
+                'pct10': q10, 'pct25': q25, 'pct75': q75, 'pct90': q90,
+                'n_outliers': int(prof['n_outliers'])
+            }
+            records.append(_format_profile(name, stats, col.total))
+        return pd.DataFrame(records)
+
+    def pattern_validation(self) -> pd.DataFrame:
+        return pd.DataFrame([
+            _pattern_record(self.columns[col]) for col, rules in self.schema.items()
+            if rules and rules.get('pattern') and col in self.columns
+        ])
+
+
+def _relation(con, path: str, table: str = None) -> str:
+    """Expresión FROM de la fuente (registra o adjunta lo necesario en con)."""
+    import duckdb
+
+    fmt = input_format(path)
+    if fmt == 'parquet':
+        return f'read_parquet({_literal(path)})'
+    if fmt == 'csv':
+        return f'read_csv({_literal(path)})'
+    if fmt == 'ipc':
+        # DuckDB escanea el dataset de pyarrow por lotes, sin cargarlo entero
+        import pyarrow.dataset as ds
+        con.register('ipc_source', ds.dataset(path, format='ipc'))
+        return 'ipc_source'
+    options = '(READ_ONLY)' if fmt == 'duckdb' else '(TYPE sqlite, READ_ONLY)'
+    try:
+        con.execute(f'ATTACH {_literal(path)} AS src {options}')
+    except duckdb.Error as exc:
+        if fmt == 'sqlite':
+            raise RuntimeError(
+                f"Leer {path} requiere la extensión sqlite de DuckDB (INSTALL sqlite): {exc}"
+            ) from exc
+        raise
+    if table is None:
+        tables = [r[0] for r in con.execute(
+            "SELECT table_name FROM information_schema.tables WHERE table_catalog = 'src'"
+        ).fetchall()]
+        if len(tables) != 1:
+            raise ValueError(f"{path} tiene {len(tables)} tablas ({', '.join(tables)}): indicar --table")
+        table = tables[0]
+    return 'src.' + '.'.join(_quote(part) for part in table.split('.'))
+
+
+def sql_audit(
+    path: str,
+    schema: dict,
+    rules: list,
+    table: str = None,
+    since: str = None,
+    columns: list = None,
+    profile_method: str = 'exact',
+    threads: int = None
+) -> SqlAudit:
+    """
+    Audita `path` (o su tabla `table`) con una única consulta en DuckDB.
+    - since: sólo filas con updated_at posterior (carga incremental).
+    - columns: columnas a auditar (None = todas).
+    - threads: hilos de DuckDB (por defecto, todos los núcleos).
+    Devuelve el SqlAudit con los informes.
+    """
+    try:
+        import duckdb
+    except ImportError as exc:
+        raise ImportError("El backend SQL requiere duckdb (pip install duckdb)") from exc
+
+    con = duckdb.connect()
+    try:
+        if threads:
+            con.execute(f'SET threads = {int(threads)}')
+        relation = _relation(con, path, table)
+        types = dict(con.execute(f'SELECT column_name, column_type FROM (DESCRIBE SELECT * FROM {relation})').fetchall())
+        where = ''
+        if since and 'updated_at' in types:
+            where = f" WHERE \"updated_at\" > TRY_CAST({_literal(since)} AS {types['updated_at']})"
+        if columns is not None:
+            wanted = set(columns)
+            types = {c: t for c, t in types.items() if c in wanted}
+        audit = SqlAudit(schema, rules, types, profile_method)
+        return audit.collect(con.execute(audit.query(relation, where)))
+    finally:
+        con.close()
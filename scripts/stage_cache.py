@@ -0,0 +1,252 @@
+"""
+Caché por contenido de los informes de las etapas 3-6 (métricas de calidad,
+reglas, perfil, patrones e índice de violaciones).
+
+Clave: sha256 de la huella del fichero de entrada (sha256 de su contenido),
+del esquema, las reglas, las opciones que cambian los informes (filtro
+incremental, motor, método del perfil...) y del código del audit (hash de los
+.py de scripts/): tras cualquier cambio en métricas, reglas o patrones las
+entradas anteriores dejan de usarse. Con la misma clave los informes son
+los mismos, así que una ejecución sobre una entrada sin cambios los copia de la
+caché sin leer los datos; el score, las dimensiones y el HTML se recalculan
+desde ellos en milisegundos (también con otros pesos, ver `summary` abajo).
+
+Estructura (root, por defecto .state/stage_cache, relativa al directorio desde
+el que se lanza el CLI, como .state/last_run.txt):
+    inputs/<ruta>.json      huella de cada entrada con su tamaño y mtime: si no
+                            cambian, no se vuelve a leer el fichero para el hash
+    entries/ab/<clave>/     ficheros de la entrada y meta.json (nº de filas...)
+
+- Se conservan las `keep` entradas usadas más recientemente.
+- Escritura atómica (carpeta temporal + rename): varios procesos del modo
+  batch pueden compartir la caché.
+
+Uso:
+    python -m scripts.stage_cache .state/stage_cache list
+    python -m scripts.stage_cache .state/stage_cache summary <clave|latest> --weights completitud=0.5,consistencia=0.5 --outdir /tmp/s
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+from functools import lru_cache
+
+import pandas as pd
+
+from scripts.archive import file_hash
+
+CACHE_VERSION = 1
+# Informes de las etapas 3-6.2 que se guardan (los que existan en outdir)
+STAGE_FILES = (
+    'quality_metrics.csv',
+    'business_rules.csv',
+    'statistical_profile.csv',
+    'pattern_validation.csv',
+    'memory_report.csv',
+    'violations.npz',
+    'violation_samples.csv',
+)
+# Informes que usan el summary y las alertas: {etapa: fichero}
+REPORTS = {
+    'quality': 'quality_metrics.csv',
+    'rules': 'business_rules.csv',
+    'profile': 'statistical_profile.csv',
+    'patterns': 'pattern_validation.csv',
+}
+
+
+def input_fingerprint(path: str, root: str) -> str:
+    """
+    sha256 del contenido de path. Se guarda junto a su tamaño y mtime: mientras
+    no cambien se reutiliza sin volver a leer el fichero. None si path no es un
+    fichero (p.ej. una carpeta de Parquet).
+    """
+    if not os.path.isfile(path):
+        return None
+    st = os.stat(path)
+    stat = {'source': os.path.abspath(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    memo = os.path.join(root, 'inputs', hashlib.sha1(stat['source'].encode('utf-8')).hexdigest()[:16] + '.json')
+    try:
+        with open(memo, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if all(saved.get(k) == v for k, v in stat.items()):
+            return saved['sha256']
+    except (OSError, ValueError, KeyError):
+        pass
+    digest = file_hash(path)
+    os.makedirs(os.path.dirname(memo), exist_ok=True)
+    tmp = f'{memo}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({**stat, 'sha256': digest}, f)
+    os.replace(tmp, memo)
+    return digest
+
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    """sha256 de los módulos de scripts/ (nombre y contenido), una vez por proceso."""
+    h = hashlib.sha256()
+    package = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(package)):
+        if name.endswith('.py'):
+            h.update(name.encode('utf-8'))
+            with open(os.path.join(package, name), 'rb') as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+def stage_cache_key(fingerprint: str, schema: dict, rules: list, **options) -> str:
+    """sha256 de la huella de la entrada, esquema, reglas, opciones y código (JSON canónico)."""
+    payload = json.dumps(
+        {'version': CACHE_VERSION, 'code': code_version(), 'input': fingerprint,
+         'schema': schema, 'rules': rules, 'options': options},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class StageCache:
+    """Entradas de la caché de etapas en `root`; keep: nº de entradas conservadas."""
+
+    def __init__(self, root: str, keep: int = 50):
+        self.root = root
+        self.keep = keep
+        os.makedirs(os.path.join(root, 'entries'), exist_ok=True)
+
+    def fingerprint(self, path: str) -> str:
+        return input_fingerprint(path, self.root)
+
+    def path(self, key: str) -> str:
+        """Carpeta de la entrada."""
+        return os.path.join(self.root, 'entries', key[:2], key)
+
+    def resolve(self, key: str) -> str:
+        """Clave completa a partir de un prefijo único o 'latest'."""
+        entries = self.entries()
+        if key == 'latest' and len(entries):
+            return entries['key'].iloc[0]
+        matches = [k for k in entries['key'] if k.startswith(key)]
+        if len(matches) != 1:
+            raise KeyError(f"{key!r} no identifica una entrada de la caché ({len(matches)} coincidencias)")
+        return matches[0]
+
+    def meta(self, key: str) -> dict:
+        """meta.json de la entrada, o None si no está en la caché."""
+        try:
+            with open(os.path.join(self.path(key), 'meta.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def restore(self, key: str, outdir: str) -> dict:
+        """
+        Copia los informes de la entrada a outdir y devuelve su meta (None si
+        la clave no está). Marca la entrada como usada (para la retención).
+        """
+        meta = self.meta(key)
+        if meta is None:
+            return None
+        entry = self.path(key)
+        os.makedirs(outdir, exist_ok=True)
+        for name in meta['files']:
+            shutil.copyfile(os.path.join(entry, name), os.path.join(outdir, name))
+        os.utime(os.path.join(entry, 'meta.json'))
+        return meta
+
+    def put(self, key: str, outdir: str, **meta) -> dict:
+        """Guarda los STAGE_FILES de outdir en la entrada `key` con meta (nº de filas...)."""
+        files = [name for name in STAGE_FILES if os.path.isfile(os.path.join(outdir, name))]
+        entry = self.path(key)
+        tmp = f'{entry}.{os.getpid()}.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name in files:
+            shutil.copyfile(os.path.join(outdir, name), os.path.join(tmp, name))
+        meta = {**meta, 'key': key, 'files': files, 'created_at': time.time()}
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2, default=str)
+        try:
+            os.replace(tmp, entry)
+        except OSError:
+            # Otro proceso guardó la misma clave (mismo contenido): vale la suya
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.prune()
+        return meta
+
+    def entries(self) -> pd.DataFrame:
+        """Entradas (usada más recientemente primero) con entrada, filas y bytes."""
+        rows = []
+        base = os.path.join(self.root, 'entries')
+        for prefix in os.listdir(base):
+            for key in os.listdir(os.path.join(base, prefix)):
+                path = os.path.join(base, prefix, key)
+                if key.endswith('.tmp') or not os.path.isfile(os.path.join(path, 'meta.json')):
+                    continue
+                meta = self.meta(key)
+                rows.append({
+                    'key': key,
+                    'input': meta.get('input'),
+                    'rows': meta.get('row_count'),
+                    'bytes': sum(os.path.getsize(os.path.join(path, n)) for n in meta['files']),
+                    'used_at': os.path.getmtime(os.path.join(path, 'meta.json')),
+                })
+        out = pd.DataFrame(rows, columns=['key', 'input', 'rows', 'bytes', 'used_at'])
+        return out.sort_values('used_at', ascending=False, ignore_index=True)
+
+    def prune(self) -> list:
+        """Borra las entradas que exceden `keep` (las usadas hace más tiempo)."""
+        entries = self.entries()
+        drop = list(entries['key'].iloc[self.keep:])
+        for key in drop:
+            shutil.rmtree(self.path(key), ignore_errors=True)
+        return drop
+
+
+def _read_report(path: str) -> pd.DataFrame:
+    # Un informe sin filas ni columnas (p.ej. sin reglas) es un CSV vacío
+    try:
+        return pd.read_csv(path)
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+
+
+def read_reports(directory: str) -> dict:
+    """REPORTS de una carpeta (entrada de la caché u outdir) como DataFrames."""
+    return {stage: _read_report(os.path.join(directory, name)) for stage, name in REPORTS.items()}
+
+
+if __name__ == '__main__':
+    import sys
+    import argparse
+
+    from scripts.io_utils import save_json
+    from scripts.score import build_summary, parse_weights
+
+    parser = argparse.ArgumentParser(description='Consulta de la caché de etapas')
+    parser.add_argument('root', help='Carpeta de la caché (p.ej. .state/stage_cache)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list')
+    summary = sub.add_parser('summary', help='summary.json e index.html desde la caché, sin recalcular las etapas')
+    summary.add_argument('key', help='Clave, prefijo de la clave o latest')
+    summary.add_argument('--weights', default=None, help='Pesos dimension=peso separados por comas')
+    summary.add_argument('--outdir', default='.')
+    args = parser.parse_args()
+
+    cache = StageCache(args.root)
+    if args.command == 'list':
+        cache.entries().to_string(sys.stdout, index=False)
+        print()
+    else:
+        reports = read_reports(cache.path(cache.resolve(args.key)))
+        weights = parse_weights(args.weights) if args.weights else None
+        result = build_summary(reports['quality'], reports['rules'], reports['profile'], weights)
+        path = os.path.join(args.outdir, 'summary.json')
+        save_json(result, path)
+        try:
+            from scripts.render_report import render_html, TEMPLATE_DIR
+            render_html(json_path=path, template_dir=TEMPLATE_DIR,
+                        output_path=os.path.join(args.outdir, 'index.html'))
+        except ImportError:
+            pass
+        print(json.dumps(result, ensure_ascii=False, indent=2))
@@ -0,0 +1,203 @@
+"""
+Estado de métricas persistente e incremental (opción --state-store).
+
+En lugar de auditar sólo las filas nuevas (last_run.txt), cada ejecución reduce
+el delta a un StreamingAudit y lo fusiona con los agregados guardados de las
+ejecuciones anteriores: las métricas describen la tabla completa con el coste
+de procesar sólo el delta.
+
+Estructura en disco (root, por defecto .state/metrics):
+  - manifest.json: huella de esquema+reglas, lista de segmentos, filas
+    acumuladas y watermark (máximo updated_at visto).
+  - seg_NNNNNN.json: un StreamingAudit serializado por ejecución. Se fusionan al
+    cargar y se compactan en uno solo al superar max_segments.
+
+Supuesto append-only: el delta son las filas con updated_at > watermark y se
+suman al estado. Si una fila existente se modifica, su versión antigua sigue
+contada; en ese caso (o si cambian esquema/reglas, lo que invalida la huella)
+hay que reconstruir el estado (--rebuild-state). Una entrada sin columna
+'updated_at' se trata como una foto completa y siempre reemplaza el estado.
+"""
+import os
+import json
+import glob
+import hashlib
+
+import pandas as pd
+
+from scripts.load import load_data
+from scripts.streaming import StreamingAudit, audit_stream
+
+MANIFEST = 'manifest.json'
+
+
+def fingerprint(schema: dict, rules: list) -> str:
+    """Huella sha256 de esquema y reglas: el estado sólo es válido con los mismos."""
+    payload = json.dumps({'schema': schema or {}, 'rules': rules or []}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _write_json_atomic(data: dict, path: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+class MetricStore:
+    """
+    Agregados por columna (conteos, nulos, hashes de distintos o HLL, momentos y
+    KLL) y conteos de reglas, persistidos como segmentos fusionables.
+    """
+
+    def __init__(self, root: str = os.path.join('.state', 'metrics'), max_segments: int = 20):
+        self.root = root
+        self.max_segments = max_segments
+
+    # --- Manifest -----------------------------------------------------------
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST)
+
+    def manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @property
+    def watermark(self) -> str:
+        manifest = self.manifest()
+        return manifest.get('watermark') if manifest else None
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    # --- Lectura/escritura --------------------------------------------------
+    def load(self, schema: dict, rules: list) -> StreamingAudit:
+        """
+        Fusiona todos los segmentos en un StreamingAudit.
+        Devuelve None si no hay estado o si se generó con otro esquema/reglas.
+        """
+        manifest = self.manifest()
+        if manifest is None or manifest['fingerprint'] != fingerprint(schema, rules):
+            return None
+        audit = StreamingAudit(schema, rules)
+        for name in manifest['segments']:
+            with open(self._segment_path(name), 'r', encoding='utf-8') as f:
+                audit.merge(StreamingAudit.from_dict(json.load(f), schema, rules))
+        return audit
+
+    def append(self, audit: StreamingAudit, watermark: str = None) -> None:
+        """
+        Añade el delta como un nuevo segmento. El segmento se escribe antes que el
+        manifest, así que una ejecución interrumpida no deja estado a medias.
+        """
+        manifest = self.manifest()
+        if manifest is None or manifest['fingerprint'] != fingerprint(audit.schema, audit.rules):
+            self.reset(audit, watermark)
+            return
+        os.makedirs(self.root, exist_ok=True)
+        name = f"seg_{manifest['next_segment']:06d}.json"
+        _write_json_atomic(audit.to_dict(), self._segment_path(name))
+        manifest['segments'].append(name)
+        manifest['next_segment'] += 1
+        manifest['row_count'] += audit.row_count
+        if watermark is not None:
+            manifest['watermark'] = watermark
+        _write_json_atomic(manifest, self.manifest_path)
+        if len(manifest['segments']) > self.max_segments:
+            self.compact(audit.schema, audit.rules)
+
+    def reset(self, audit: StreamingAudit, watermark: str = None) -> None:
+        """Sustituye todo el estado por un único segmento con `audit`."""
+        os.makedirs(self.root, exist_ok=True)
+        manifest = self.manifest() or {}
+        next_segment = manifest.get('next_segment', 0)
+        name = f"seg_{next_segment:06d}.json"
+        _write_json_atomic(audit.to_dict(), self._segment_path(name))
+        _write_json_atomic({
+            'fingerprint': fingerprint(audit.schema, audit.rules),
+            'segments': [name],
+            'next_segment': next_segment + 1,
+            'row_count': audit.row_count,
+            'watermark': watermark
+        }, self.manifest_path)
+        self._remove_orphans([name])
+
+    def compact(self, schema: dict, rules: list) -> None:
+        """Fusiona todos los segmentos en uno (mismo resultado, menos ficheros)."""
+        audit = self.load(schema, rules)
+        if audit is not None:
+            self.reset(audit, self.watermark)
+
+    def rebuild(self, chunks, schema: dict, rules: list, watermark: str = None) -> StreamingAudit:
+        """Recalcula el estado desde cero a partir de los datos completos."""
+        audit = audit_stream(chunks, schema, rules)
+        self.reset(audit, watermark)
+        return audit
+
+    def _remove_orphans(self, keep: list) -> None:
+        for path in glob.glob(os.path.join(self.root, 'seg_*.json')):
+            if os.path.basename(path) not in keep:
+                os.remove(path)
+
+
+def _max_updated_at(chunk: pd.DataFrame):
+    values = chunk['updated_at'].dropna()
+    return values.max() if len(values) else None
+
+
+def _watermark_str(value) -> str:
+    if value is None:
+        return None
+    return value.isoformat() if isinstance(value, pd.Timestamp) else str(value)
+
+
+def incremental_audit(
+    store: MetricStore,
+    path: str,
+    schema: dict,
+    rules: list,
+    chunksize: int = None,
+    columns: list = None,
+    rebuild: bool = False,
+    engine: str = 'pandas'
+) -> StreamingAudit:
+    """
+    Lee sólo las filas posteriores al watermark del store, las fusiona con el
+    estado guardado y devuelve el StreamingAudit de la tabla completa.
+    - rebuild=True (o estado inexistente/incompatible) recalcula desde cero.
+    - Sin columna 'updated_at' la entrada es una foto completa: reemplaza el estado.
+    - engine: lector de CSV de load_data.
+    """
+    state = None if rebuild else store.load(schema, rules)
+    since = store.watermark if state is not None else None
+    if columns is not None and 'updated_at' not in columns:
+        # Necesaria para avanzar el watermark
+        columns = list(columns) + ['updated_at']
+
+    data = load_data(path, since=since, chunksize=chunksize, columns=columns, engine=engine, schema=schema)
+    chunks = data if chunksize else [data]
+
+    seen = {'has_updated_at': False, 'max': None}
+
+    def tracked():
+        for chunk in chunks:
+            if 'updated_at' in chunk.columns:
+                seen['has_updated_at'] = True
+                current = _max_updated_at(chunk)
+                if current is not None and (seen['max'] is None or current > seen['max']):
+                    seen['max'] = current
+            yield chunk
+
+    delta = audit_stream(tracked(), schema, rules)
+    watermark = _watermark_str(seen['max'])
+
+    if state is None or not seen['has_updated_at']:
+        store.reset(delta, watermark)
+        return delta
+    if delta.row_count:
+        store.append(delta, watermark or since)
+        state.merge(delta)
+    return state
@@ -0,0 +1,342 @@
+"""
+Auditoría en modo streaming: cada chunk de datos se reduce a agregados
+parciales fusionables y el DataFrame completo nunca se materializa.
+
+Los conteos (nulos, duplicados, tipos, patrones, reglas) son exactos y coinciden
+con la ejecución en memoria. Los valores distintos se guardan como hashes de
+64 bits (KeySet; colisiones con probabilidad ~n²/2**65), o se estiman con un
+HyperLogLog fusionable en las columnas `sketch: hll`.
+Los cuantiles del perfil estadístico (y por tanto los outliers IQR) salen de un
+NumericSketch/KLLSketch: son exactos mientras la columna tenga <= quantile_k
+valores y, por encima, tienen un error de rango normalizado de
+KLLSketch.normalized_rank_error(quantile_k) (≈1.33% con k=200).
+
+Promoción de tipos entre chunks: pandas infiere el dtype por chunk, así que una
+columna entera puede llegar como float en un chunk con nulos. El tipo final se
+resuelve como lo haría la lectura completa (int+float -> float; cualquier mezcla
+con texto/bool/fecha -> object, donde los valores se tratan como texto).
+Las columnas de texto del esquema se leen como str en todos los chunks (ver
+load._text_columns): si una columna sin tipo de texto mezcla chunks enteros y
+de texto, sus enteros ya no conservan el texto original ('08001' -> 8001, y 1 y
+'1' cuentan como valores distintos), así que sus conteos de distintos y de
+patrones pueden diferir de la lectura completa.
+"""
+import numpy as np
+import pandas as pd
+
+from scripts.column_profile import build_profiles
+from scripts.rules import _rule_counts, _rule_record
+from scripts.metrics import _format_profile
+from scripts.patterns import count_matches
+from scripts.sketches import HyperLogLog, KeySet, NumericSketch
+
+
+def _kind(dtype) -> str:
+    """Clase de dtype relevante para la promoción entre chunks."""
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iufbM':
+        return {'u': 'i'}.get(dtype.kind, dtype.kind)
+    return 'O'
+
+
+def _promote(kinds: set) -> str:
+    if not kinds:
+        return 'f'
+    if kinds <= {'i'}:
+        return 'i'
+    if kinds <= {'i', 'f'}:
+        return 'f'
+    if len(kinds) == 1:
+        return next(iter(kinds))
+    return 'O'
+
+
+def _pct(n: int, total: int) -> float:
+    return round(n/total*100, 2) if total else 0.0
+
+
+class ColumnAggregate:
+    """
+    Agregado parcial de una columna: conteos, valores distintos, momentos
+    y cuantiles (NumericSketch). update() consume un ColumnProfile de un
+    chunk y merge() combina dos agregados de la misma columna.
+    """
+
+    def __init__(self, name: str, col_schema: dict = None, quantile_k: int = 200):
+        self.name = name
+        self.schema = col_schema or {}
+        self.total = 0
+        self.n_nulls = 0
+        # Valores distintos: conjunto exacto de hashes, o HyperLogLog con `sketch: hll`
+        self.hll = HyperLogLog(self.schema.get('hll_precision', 14)) if self.schema.get('sketch') == 'hll' else None
+        self.keys = KeySet() if self.hll is None else None
+        # Conteos de tipo/patrón por clase de dtype del chunk: {kind: {...}}
+        self.by_kind = {}
+        # Momentos y cuantiles de los valores numéricos
+        self.numeric = NumericSketch(quantile_k)
+
+    def update(self, prof) -> None:
+        s = prof.series
+        kind = _kind(s.dtype)
+        n_valid = prof.total - prof.n_nulls
+        self.total += prof.total
+        self.n_nulls += prof.n_nulls
+        if self.hll is not None:
+            self.hll.merge(prof.hll)
+        else:
+            self.keys.update(prof.value_counts.index)
+
+        counts = self.by_kind.setdefault(kind, {
+            'n_valid': 0, 'n_type_mismatch': 0, 'n_pattern_matches': 0, 'n_pattern_matches_float': 0
+        })
+        counts['n_valid'] += n_valid
+        counts['n_type_mismatch'] += prof.n_type_mismatch
+        counts['n_pattern_matches'] += prof.n_pattern_matches
+        if kind == 'i' and prof.pattern_value_mask is not None:
+            # Si otro chunk promueve la columna a float, el texto será '5.0' y no '5'
+            vc = prof.value_counts
+            as_float = vc.index.astype(float).astype(str)
+            counts['n_pattern_matches_float'] += count_matches(as_float, vc.to_numpy(), self.schema['pattern'])
+        else:
+            counts['n_pattern_matches_float'] += prof.n_pattern_matches
+
+        if prof.is_numeric:
+            self.numeric.update(prof.sorted_numeric)
+
+    def merge(self, other: 'ColumnAggregate') -> None:
+        self.total += other.total
+        self.n_nulls += other.n_nulls
+        if self.hll is not None:
+            self.hll.merge(other.hll)
+        else:
+            self.keys.merge(other.keys)
+        for kind, counts in other.by_kind.items():
+            mine = self.by_kind.setdefault(kind, dict.fromkeys(counts, 0))
+            for key, value in counts.items():
+                mine[key] += value
+        self.numeric.merge(other.numeric)
+
+    def to_dict(self) -> dict:
+        return {
+            'total': self.total,
+            'n_nulls': self.n_nulls,
+            'distinct': (self.hll if self.hll is not None else self.keys).to_dict(),
+            'by_kind': self.by_kind,
+            'numeric': self.numeric.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, name: str, data: dict, col_schema: dict = None) -> 'ColumnAggregate':
+        agg = cls(name, col_schema)
+        # El sketch numérico guardado conserva su propio k
+        agg.total = data['total']
+        agg.n_nulls = data['n_nulls']
+        if data['distinct']['type'] == 'hll':
+            agg.hll, agg.keys = HyperLogLog.from_dict(data['distinct']), None
+        else:
+            agg.hll, agg.keys = None, KeySet.from_dict(data['distinct'])
+        agg.by_kind = {kind: dict(counts) for kind, counts in data['by_kind'].items()}
+        agg.numeric = NumericSketch.from_dict(data['numeric'])
+        return agg
+
+    # --- Resultados -------------------------------------------------------
+    @property
+    def final_kind(self) -> str:
+        kind = _promote({k for k, c in self.by_kind.items() if c['n_valid']})
+        if self.n_nulls:
+            # Un nulo en cualquier chunk convierte int -> float y bool -> object
+            kind = {'i': 'f', 'b': 'O'}.get(kind, kind)
+        return kind
+
+    @property
+    def n_distinct(self) -> int:
+        n = round(self.hll.estimate()) if self.hll is not None else len(self.keys)
+        return int(n) + (1 if self.n_nulls else 0)
+
+    @property
+    def n_duplicates(self) -> int:
+        return max(self.total - self.n_distinct, 0)
+
+    @property
+    def n_duplicates_error(self) -> int:
+        if self.hll is None:
+            return 0
+        return int(np.ceil(2 * self.hll.relative_error * self.hll.estimate()))
+
+    @property
+    def n_type_mismatch(self) -> int:
+        expected_type = self.schema.get('type')
+        kind = self.final_kind
+        if expected_type not in ('integer', 'number'):
+            return sum(c['n_type_mismatch'] for c in self.by_kind.values())
+        if kind == 'f' and expected_type == 'integer':
+            return sum(c['n_valid'] for c in self.by_kind.values())
+        if kind == 'O':
+            # En la lectura completa los valores numéricos llegarían como texto
+            return sum(
+                c['n_valid'] if k in ('i', 'f') else c['n_type_mismatch'] for k, c in self.by_kind.items()
+            )
+        return sum(c['n_type_mismatch'] for c in self.by_kind.values())
+
+    @property
+    def n_pattern_matches(self) -> int:
+        key = 'n_pattern_matches_float' if self.final_kind == 'f' else 'n_pattern_matches'
+        return sum(c[key] for c in self.by_kind.values())
+
+    @property
+    def n_pattern_mismatches(self) -> int:
+        if not self.schema.get('pattern'):
+            return 0
+        n_valid = sum(c['n_valid'] for c in self.by_kind.values())
+        return n_valid - self.n_pattern_matches
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.final_kind in ('i', 'f')
+
+    def quality_record(self) -> dict:
+        total = self.total
+        return {
+            'column': self.name,
+            'n_nulls': self.n_nulls,
+            'pct_nulls': _pct(self.n_nulls, total),
+            'n_duplicates': self.n_duplicates,
+            'pct_duplicates': _pct(self.n_duplicates, total),
+            'pct_duplicates_error': _pct(self.n_duplicates_error, total),
+            'n_type_mismatch': self.n_type_mismatch,
+            'pct_type_mismatch': _pct(self.n_type_mismatch, total),
+            'n_pattern_mismatch': self.n_pattern_mismatches,
+            'pct_pattern_mismatch': _pct(self.n_pattern_mismatches, total)
+        }
+
+    def profile_record(self) -> dict:
+        return _format_profile(self.name, self.numeric.stats(), self.total)
+
+    def pattern_record(self) -> dict:
+        return {
+            'column': self.name,
+            'n_matches': self.n_pattern_matches,
+            'pct_matches': _pct(self.n_pattern_matches, self.total),
+            'n_mismatches': self.n_pattern_mismatches,
+            'pct_mismatches': _pct(self.n_pattern_mismatches, self.total)
+        }
+
+
+class StreamingAudit:
+    """
+    Acumula los agregados parciales de todas las columnas y reglas.
+    Uso:
+        audit = StreamingAudit(schema, rules)
+        for chunk in load_data(path, chunksize=100_000):
+            audit.update(chunk)
+        mdf = audit.quality_metrics()
+    Dos auditorías sobre particiones distintas se combinan con merge().
+    """
+
+    def __init__(self, schema: dict, rules: list, quantile_k: int = 200):
+        self.schema = schema or {}
+        self.rules = rules or []
+        self.quantile_k = quantile_k
+        self.columns = []
+        self.aggregates = {}
+        # Conteos de reglas por (índice de regla, columna)
+        self.rule_counts = {}
+        self.row_count = 0
+
+    def _aggregate(self, col: str) -> ColumnAggregate:
+        if col not in self.aggregates:
+            self.columns.append(col)
+            self.aggregates[col] = ColumnAggregate(col, self.schema.get(col), self.quantile_k)
+        return self.aggregates[col]
+
+    def _rule_columns(self, rule: dict) -> list:
+        return self.columns if rule['column'] == 'any' else [rule['column']]
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        profiles = build_profiles(chunk, self.schema)
+        self.row_count += len(chunk)
+        for col in chunk.columns:
+            self._aggregate(col).update(profiles[col])
+        for i, rule in enumerate(self.rules):
+            if rule['type'] == 'unique':
+                # Se resuelve al final con los valores distintos de la columna
+                continue
+            for c in self._rule_columns(rule):
+                counts = self.rule_counts.setdefault((i, c), {})
+                for key, value in _rule_counts(rule, chunk[c], self.schema.get(c), profiles[c]).items():
+                    counts[key] = counts.get(key, 0) + value
+
+    def merge(self, other: 'StreamingAudit') -> None:
+        self.row_count += other.row_count
+        for col in other.columns:
+            self._aggregate(col).merge(other.aggregates[col])
+        for key, counts in other.rule_counts.items():
+            mine = self.rule_counts.setdefault(key, {})
+            for name, value in counts.items():
+                mine[name] = mine.get(name, 0) + value
+
+    def to_dict(self) -> dict:
+        """Estado serializable a JSON (ver scripts.state.MetricStore)."""
+        return {
+            'row_count': self.row_count,
+            'quantile_k': self.quantile_k,
+            'columns': self.columns,
+            'aggregates': {c: self.aggregates[c].to_dict() for c in self.columns},
+            'rule_counts': [[i, c, counts] for (i, c), counts in self.rule_counts.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, schema: dict, rules: list) -> 'StreamingAudit':
+        """
+        Reconstruye el estado. schema y rules deben ser los mismos con los que se
+        generó (los conteos de reglas se indexan por posición).
+        """
+        audit = cls(schema, rules, data.get('quantile_k', 200))
+        audit.row_count = data['row_count']
+        for col in data['columns']:
+            audit.columns.append(col)
+            audit.aggregates[col] = ColumnAggregate.from_dict(
+                col, data['aggregates'][col], audit.schema.get(col)
+            )
+        audit.rule_counts = {(i, c): dict(counts) for i, c, counts in data['rule_counts']}
+        return audit
+
+    # --- Informes ---------------------------------------------------------
+    def quality_metrics(self) -> pd.DataFrame:
+        return pd.DataFrame([self.aggregates[c].quality_record() for c in self.columns])
+
+    def business_rules(self) -> pd.DataFrame:
+        records = []
+        for i, rule in enumerate(self.rules):
+            for c in self._rule_columns(rule):
+                if rule['type'] == 'unique':
+                    agg = self.aggregates[c]
+                    counts = {'duplicates': agg.n_duplicates}
+                    if agg.hll is not None:
+                        counts['error'] = agg.n_duplicates_error
+                else:
+                    counts = self.rule_counts.get((i, c), {})
+                records.append(_rule_record(rule, c, counts))
+        return pd.DataFrame(records)
+
+    def statistical_profile(self) -> pd.DataFrame:
+        return pd.DataFrame([
+            self.aggregates[c].profile_record() for c in self.columns
+            if self.aggregates[c].is_numeric and self.aggregates[c].numeric.n
+        ])
+
+    def pattern_validation(self) -> pd.DataFrame:
+        return pd.DataFrame([
+            self.aggregates[col].pattern_record() for col, rules in self.schema.items()
+            if rules.get('pattern') and col in self.aggregates
+        ])
+
+
+def audit_stream(chunks, schema: dict, rules: list, quantile_k: int = 200) -> StreamingAudit:
+    """
+    Consume un iterable de DataFrames (p.ej. load_data(..., chunksize=N)) y
+    devuelve el StreamingAudit con todos los agregados.
+    """
+    audit = StreamingAudit(schema, rules, quantile_k)
+    for chunk in chunks:
+        audit.update(chunk)
+    return audit
@@ -0,0 +1,332 @@
+"""
+Índice de violaciones por fila: un bitmap empaquetado (np.packbits, 1 bit por
+fila) por comprobación y columna, guardado con los informes en violations.npz.
+
+Claves:
+    quality:<métrica>:<columna>   null, type_mismatch, pattern_mismatch
+    rule:<regla>:<columna>        reglas de negocio (not_null, unique, range, non_empty_string)
+
+- Las máscaras salen de los ColumnProfile de las métricas (nulos, tipo, patrón);
+  sólo se construyen para las comprobaciones con violaciones según
+  quality_metrics/business_rules. Los duplicados sólo se indexan para las
+  reglas unique (en otras columnas repetir valores no es una violación) y no
+  en columnas `sketch: hll` (el conteo es aproximado).
+- rows(key, limit) desempaqueta por bloques sólo los bytes no nulos y para al
+  llegar a `limit`; sample(key, k) es un muestreo reservoir (algoritmo L, salta
+  entre reemplazos) sobre los mismos bloques. Ninguna de las dos copia filas
+  del dataset.
+- El .npz se guarda sin comprimir: el archivo de informes ya lo comprime.
+- Las posiciones son las del DataFrame auditado; si su índice no es 0..n-1
+  (p.ej. carga incremental) se guardan también las etiquetas y se devuelven éstas.
+
+Uso:
+    python -m scripts.violations reports/violations.npz list
+    python -m scripts.violations reports/violations.npz rows rule:edad_rango:edad --limit 20
+    python -m scripts.violations reports/archive rows quality:null:email --run 20240101_120000 --input data/raw/input.csv
+"""
+import io
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from scripts.column_profile import ColumnProfile
+
+# Bytes del bitmap que se desempaquetan de una vez (64K bytes = 512K filas)
+_BLOCK = 1 << 16
+
+# Métrica de quality_metrics.csv que cuenta cada comprobación de calidad
+_QUALITY_COUNTS = {
+    'null': 'n_nulls',
+    'type_mismatch': 'n_type_mismatch',
+    'pattern_mismatch': 'n_pattern_mismatch',
+}
+
+
+def _quality_mask(check: str, prof: ColumnProfile):
+    """Máscara fila a fila de una comprobación de calidad (None si no aplica)."""
+    if check == 'null':
+        return prof.null_mask.to_numpy()
+    if check == 'type_mismatch':
+        return prof.type_mismatch_mask.to_numpy()
+    if prof.pattern_mask is None:
+        return None
+    # pattern_mask está alineada con los valores no nulos
+    nulls = prof.null_mask.to_numpy()
+    mask = np.zeros(prof.total, dtype=bool)
+    mask[~nulls] = ~prof.pattern_mask.to_numpy()
+    return mask
+
+
+def _rule_mask(rule: dict, prof: ColumnProfile):
+    """Máscara de las filas que incumplen una regla (None si no aplica)."""
+    t = rule['type']
+    if t == 'not_null':
+        return prof.null_mask.to_numpy()
+    if t == 'unique':
+        if prof.hll is not None:
+            return None
+        return prof.series.duplicated(keep='first').to_numpy()
+    if t == 'range':
+        lo, hi = rule['min'], rule['max']
+        s = prof.series
+        if prof.is_numeric:
+            values = s.to_numpy(dtype=float, na_value=np.nan)
+            return (values < lo) | (values > hi)
+        try:
+            return ((s < lo) | (s > hi)).fillna(False).to_numpy(dtype=bool)
+        except TypeError:
+            return None
+    if t == 'non_empty_string':
+        # Los textos vacíos se buscan en pattern_counts (valores distintos)
+        counts = prof.pattern_counts
+        empty = counts.index[counts.index.str.strip() == '']
+        s = prof.series
+        mask = np.zeros(prof.total, dtype=bool)
+        notnull = ~prof.null_mask.to_numpy()
+        mask[notnull] = s[notnull].astype(str).isin(empty).to_numpy()
+        return mask
+    return None
+
+
+def _block_positions(bits: np.ndarray, start: int) -> np.ndarray:
+    """Posiciones de los bits a 1 de bits[start:start+_BLOCK] (sólo bytes no nulos)."""
+    block = bits[start:start + _BLOCK]
+    nonzero = np.flatnonzero(block)
+    if not len(nonzero):
+        return nonzero
+    unpacked = np.unpackbits(block[nonzero]).reshape(-1, 8)
+    byte, bit = np.nonzero(unpacked)
+    return (start + nonzero[byte]) * 8 + bit
+
+
+def reservoir_sample(chunks, k: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Muestreo reservoir (algoritmo L) de k elementos de un flujo de arrays: tras
+    llenar la reserva salta directamente al siguiente elemento que entra, así
+    que sólo genera O(k·log(n/k)) aleatorios. Devuelve la muestra ordenada.
+    """
+    reservoir = np.empty(k, dtype=np.int64)
+    seen = 0
+    w = nxt = None
+    for chunk in chunks:
+        end = seen + len(chunk)
+        if seen < k:
+            take = min(k - seen, len(chunk))
+            reservoir[seen:seen + take] = chunk[:take]
+            if seen + take == k:
+                w = np.exp(np.log(rng.random()) / k)
+                nxt = k + int(np.log(rng.random()) / np.log1p(-w))
+        while nxt is not None and nxt < end:
+            reservoir[rng.integers(k)] = chunk[nxt - seen]
+            w *= np.exp(np.log(rng.random()) / k)
+            nxt += 1 + int(np.log(rng.random()) / np.log1p(-w))
+        seen = end
+    return np.sort(reservoir[:min(seen, k)])
+
+
+class ViolationIndex:
+    """
+    Bitmaps de violaciones de un DataFrame de n_rows filas.
+    entries: {clave: {'source', 'check', 'column', 'count'}}; bitmaps en _bits.
+    """
+
+    def __init__(self, n_rows: int, labels: np.ndarray = None):
+        self.n_rows = n_rows
+        self.labels = labels
+        self.entries = {}
+        self._bits = {}
+
+    def add(self, source: str, check: str, column: str, mask: np.ndarray) -> str:
+        """Añade la máscara (bool, n_rows) si tiene alguna violación. Devuelve la clave."""
+        key = f'{source}:{check}:{column}'
+        count = int(np.count_nonzero(mask))
+        if count:
+            self.entries[key] = {'source': source, 'check': check, 'column': column, 'count': count}
+            self._bits[key] = np.packbits(mask)
+        return key
+
+    def keys(self) -> list:
+        return list(self.entries)
+
+    def count(self, key: str) -> int:
+        entry = self.entries.get(key)
+        return entry['count'] if entry else 0
+
+    def _iter_positions(self, key: str):
+        bits = self._bits.get(key)
+        if bits is None:
+            return
+        if callable(bits):
+            # Carga perezosa desde el .npz
+            bits = self._bits[key] = bits()
+        for start in range(0, len(bits), _BLOCK):
+            positions = _block_positions(bits, start)
+            if len(positions):
+                yield positions
+
+    def _to_rows(self, positions: np.ndarray) -> np.ndarray:
+        return positions if self.labels is None else self.labels[positions]
+
+    def positions(self, key: str, limit: int = None) -> np.ndarray:
+        """Posiciones (0..n_rows-1) de las filas que violan `key`, como mucho `limit`."""
+        out, n = [], 0
+        for positions in self._iter_positions(key):
+            if limit is not None and n + len(positions) >= limit:
+                out.append(positions[:limit - n])
+                break
+            out.append(positions)
+            n += len(positions)
+        return np.concatenate(out) if out else np.array([], dtype=np.int64)
+
+    def rows(self, key: str, limit: int = None) -> np.ndarray:
+        """Como positions() pero con las etiquetas de fila del DataFrame auditado."""
+        return self._to_rows(self.positions(key, limit))
+
+    def sample_positions(self, key: str, k: int = 5, seed: int = 0) -> np.ndarray:
+        return reservoir_sample(self._iter_positions(key), k, np.random.default_rng(seed))
+
+    def sample(self, key: str, k: int = 5, seed: int = 0) -> np.ndarray:
+        """k filas al azar (reservoir, reproducible con seed) entre las que violan `key`."""
+        return self._to_rows(self.sample_positions(key, k, seed))
+
+    def summary(self) -> pd.DataFrame:
+        """Una fila por clave con source, check, column y count."""
+        return pd.DataFrame(
+            [{'key': k, **e} for k, e in self.entries.items()],
+            columns=['key', 'source', 'check', 'column', 'count']
+        )
+
+    def samples(self, df: pd.DataFrame, k: int = 5, seed: int = 0) -> pd.DataFrame:
+        """
+        Ejemplos por clave (reservoir de k filas): key, source, check, column,
+        row y value. Sólo se leen de df las celdas muestreadas.
+        """
+        records = []
+        for key, entry in self.entries.items():
+            positions = self.sample_positions(key, k, seed)
+            values = df[entry['column']].iloc[positions]
+            for row, value in zip(self._to_rows(positions), values):
+                records.append({'key': key, **{f: entry[f] for f in ('source', 'check', 'column')},
+                                'row': row, 'value': value})
+        return pd.DataFrame(records, columns=['key', 'source', 'check', 'column', 'row', 'value'])
+
+    # --- Persistencia ---------------------------------------------------------
+    def save(self, path: str) -> str:
+        """Guarda los bitmaps (uno por clave) y los metadatos en un .npz."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        meta = {'n_rows': self.n_rows, 'keys': self.keys(), 'entries': self.entries}
+        arrays = {f'bits_{i}': self._bits[key] for i, key in enumerate(self.keys())}
+        if self.labels is not None:
+            arrays['labels'] = self.labels
+        np.savez(path, meta=np.array(json.dumps(meta)), **arrays)
+        return path
+
+    @classmethod
+    def load(cls, source) -> 'ViolationIndex':
+        """Abre un .npz (ruta o fichero); cada bitmap se lee al consultarlo."""
+        npz = np.load(source, allow_pickle=False)
+        meta = json.loads(str(npz['meta']))
+        index = cls(meta['n_rows'], npz['labels'] if 'labels' in npz.files else None)
+        index.entries = meta['entries']
+        for i, key in enumerate(meta['keys']):
+            index._bits[key] = lambda name=f'bits_{i}': npz[name]
+        return index
+
+
+def _row_labels(index: pd.Index):
+    """Etiquetas a guardar (None si el índice es 0..n-1)."""
+    if isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1:
+        return None
+    if pd.api.types.is_integer_dtype(index.dtype):
+        return index.to_numpy(dtype=np.int64)
+    return index.astype(str).to_numpy(dtype=str)
+
+
+def build_violation_index(
+    df: pd.DataFrame,
+    schema: dict,
+    rules,
+    profiles: dict = None,
+    quality: pd.DataFrame = None,
+    rules_report: pd.DataFrame = None
+) -> ViolationIndex:
+    """
+    Construye el índice de df.
+    - profiles: perfiles de las métricas (se reutilizan sus máscaras).
+    - quality / rules_report: quality_metrics y business_rules ya calculados;
+      las comprobaciones sin violaciones no se escanean.
+    """
+    from scripts.rules import compile_rules
+
+    schema = schema or {}
+    profiles = profiles if profiles is not None else {}
+    index = ViolationIndex(len(df), _row_labels(df.index))
+
+    def profile(col):
+        if col not in profiles:
+            profiles[col] = ColumnProfile(df[col], schema.get(col))
+        return profiles[col]
+
+    counts = quality.set_index('column') if quality is not None else None
+    for col in df.columns:
+        for check, metric in _QUALITY_COUNTS.items():
+            if counts is not None and not counts.at[col, metric]:
+                continue
+            mask = _quality_mask(check, profile(col))
+            if mask is not None:
+                index.add('quality', check, col, mask)
+
+    failed = None
+    if rules_report is not None and len(rules_report):
+        failed = set(zip(rules_report.loc[~rules_report['success'], 'rule'],
+                         rules_report.loc[~rules_report['success'], 'column']))
+    for _, rule, col in compile_rules(rules, df.columns, schema).steps:
+        if failed is not None and (rule['name'], col) not in failed:
+            continue
+        mask = _rule_mask(rule, profile(col))
+        if mask is not None:
+            index.add('rule', rule['name'], col, mask)
+    return index
+
+
+if __name__ == '__main__':
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Consulta del índice de violaciones')
+    parser.add_argument('source', help='violations.npz o carpeta del archivo de informes')
+    parser.add_argument('command', choices=['list', 'rows', 'sample'])
+    parser.add_argument('key', nargs='?')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--run', help='run_id del archivo (por defecto la última ejecución)')
+    parser.add_argument('--input', help='dataset auditado: muestra las filas completas')
+    args = parser.parse_args()
+
+    if os.path.isdir(args.source):
+        from scripts.archive import ReportArchive
+        with ReportArchive(args.source) as archive:
+            data = archive.read_bytes(args.run or archive.latest(), 'violations.npz')
+        vindex = ViolationIndex.load(io.BytesIO(data))
+    else:
+        vindex = ViolationIndex.load(args.source)
+
+    if args.command == 'list':
+        vindex.summary().to_string(sys.stdout, index=False)
+        print()
+        sys.exit(0)
+    if args.key not in vindex.entries:
+        sys.exit(f"Clave sin violaciones o inexistente: {args.key}")
+    if args.command == 'rows':
+        positions = vindex.positions(args.key, args.limit)
+    else:
+        positions = vindex.sample_positions(args.key, args.limit)
+    if args.input:
+        from scripts.load import load_data
+        data = load_data(args.input)
+        # Las etiquetas de una carga incremental son las filas del fichero completo
+        data.loc[vindex._to_rows(positions)].to_string(sys.stdout)
+        print()
+    else:
+        print('\n'.join(str(r) for r in vindex._to_rows(positions)))
@@ -9,6 +9,10 @@ setup(
         'PyYAML',
         'click'
     ],
+    extras_require={
+        'arrow': ['pyarrow'],
+        'sql': ['duckdb'],
+    },
     entry_points={
         'console_scripts': [
             'audit_data=scripts.main:main',
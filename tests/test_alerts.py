@@ -0,0 +1,59 @@
+import time
+import pandas as pd
+from click.testing import CliRunner
+from scripts.alerts import AlertDispatcher, StubWebhookServer, channels_from_env
+from scripts.main import main
+
+def test_dedupe_and_one_message_per_channel():
+    with StubWebhookServer() as stub, StubWebhookServer() as ops:
+        alerts = AlertDispatcher({'default': stub.url, 'ops': ops.url}, title='Auditoría')
+        assert alerts.add('nulos en a', key=('null_rate', 'a'))
+        assert not alerts.add('nulos en a (otra vez)', key=('null_rate', 'a'))
+        alerts.add('nulos en b')
+        alerts.add('nulos en b')
+        alerts.add('fallo', channel='ops')
+        alerts.add('sin url', channel='otro')
+        assert alerts.flush() == 3
+        results = alerts.close(timeout=5)
+    assert stub.received == [{'text': '*Auditoría* (2 alertas)\nnulos en a\nnulos en b'}]
+    assert len(ops.received) == 1
+    assert sorted(r['status'] for r in results) == ['sent', 'sent', 'skipped']
+
+def test_retries_and_failures():
+    with StubWebhookServer(responses=[500, 429]) as stub:
+        alerts = AlertDispatcher({'default': stub.url}, backoff=0.01)
+        alerts.add('x')
+        assert alerts.close(timeout=5)[0] == {
+            'channel': 'default', 'status': 'sent', 'attempts': 3, 'n_alerts': 1, 'error': None
+        }
+    with StubWebhookServer(responses=[400]) as stub:
+        alerts = AlertDispatcher({'default': stub.url}, backoff=0.01)
+        alerts.add('x')
+        result = alerts.close(timeout=5)[0]
+        assert result['status'] == 'failed' and result['attempts'] == 1 and result['error'] == 'HTTP 400'
+
+def test_flush_does_not_wait_for_slow_webhook():
+    with StubWebhookServer(delay=0.5) as stub:
+        alerts = AlertDispatcher({'default': stub.url}, timeout=0.1, retries=1, backoff=0.01)
+        alerts.add('x')
+        t0 = time.perf_counter()
+        alerts.flush()
+        assert time.perf_counter() - t0 < 0.1
+        result = alerts.close(timeout=5)[0]
+    assert result['status'] == 'failed' and result['attempts'] == 2
+
+def test_channels_from_env():
+    env = {'SLACK_WEBHOOK_URL': 'http://a', 'SLACK_WEBHOOK_URL_OPS': 'http://b', 'SLACK_WEBHOOK_URL_X': ''}
+    assert channels_from_env(env) == {'default': 'http://a', 'ops': 'http://b'}
+
+def test_cli_sends_null_rate_alerts(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame({'id': [1, 2, 3, 4], 'email': ['a@b.com', None, None, 'c@d.com']}).to_csv('data.csv', index=False)
+    with open('rules.yml', 'w') as f:
+        f.write("columns:\n  email:\n    type: string\nrules: []\n")
+    with StubWebhookServer() as stub:
+        monkeypatch.setenv('SLACK_WEBHOOK_URL', stub.url)
+        result = CliRunner().invoke(main, ['--input', 'data.csv', '--rules', 'rules.yml', '--outdir', 'out'])
+    assert result.exit_code == 0, result.output
+    assert len(stub.received) == 1
+    assert "Null Rate alto en 'email': 50.0%" in stub.received[0]['text']
@@ -0,0 +1,82 @@
+import os
+import pandas as pd
+import pytest
+from scripts.archive import ReportArchive
+from scripts.io_utils import archive_reports
+
+def _reports(outdir, value):
+    os.makedirs(os.path.join(outdir, 'sub'), exist_ok=True)
+    pd.DataFrame({'a': range(1000)}).to_csv(os.path.join(outdir, 'big.csv'), index=False)
+    with open(os.path.join(outdir, 'summary.json'), 'w') as f:
+        f.write(f'{{"score_global": {value}}}')
+    with open(os.path.join(outdir, 'sub', 'x.txt'), 'w') as f:
+        f.write('x')
+
+@pytest.mark.parametrize('codec', ['zstd', 'gzip', 'none'])
+def test_commit_dedupe_and_read(tmp_path, codec):
+    out = str(tmp_path / 'reports')
+    _reports(out, 90)
+    first = archive_reports(out, codec=codec)
+    assert os.listdir(out) == ['archive']
+    _reports(out, 80)
+    second = archive_reports(out, codec=codec)
+
+    with ReportArchive(os.path.join(out, 'archive')) as archive:
+        assert list(archive.runs()['run_id']) == [second, first]
+        files = archive.files(second)
+        assert list(files['name']) == ['big.csv', 'sub/x.txt', 'summary.json']
+        # big.csv y x.txt son idénticos: un solo objeto por contenido
+        n_objects = archive.conn.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+        assert n_objects == 4
+        assert archive.read_json(first, 'summary.json') == {'score_global': 90}
+        assert archive.read_json(second, 'summary.json') == {'score_global': 80}
+        assert archive.read_csv(first, 'big.csv')['a'].sum() == sum(range(1000))
+        if codec != 'none':
+            big = files.set_index('name').loc['big.csv']
+            assert big['stored_size'] < big['size']
+        dest = archive.extract(first, str(tmp_path / 'restored'))
+        assert open(os.path.join(dest, 'sub', 'x.txt')).read() == 'x'
+        with pytest.raises(FileNotFoundError):
+            archive.open(first, 'missing.csv')
+
+def test_append_and_retention(tmp_path):
+    out = str(tmp_path / 'reports')
+    run_ids = []
+    for i in range(4):
+        _reports(out, i)
+        run_ids.append(archive_reports(out, keep_runs=2))
+    with open(os.path.join(out, 'run_metrics.json'), 'w') as f:
+        f.write('{}')
+    archive_reports(out, run_ids[-1], keep_runs=2)
+
+    with ReportArchive(os.path.join(out, 'archive')) as archive:
+        assert list(archive.runs()['run_id']) == run_ids[:1:-1]
+        assert 'run_metrics.json' in set(archive.files(run_ids[-1])['name'])
+        # Los summary.json de las ejecuciones borradas ya no están en disco
+        objects = archive.conn.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+        stored = sum(len(files) for _, _, files in os.walk(os.path.join(out, 'archive', 'objects')))
+        assert objects == stored == 5
+        assert archive.apply_retention() == []
+
+@pytest.mark.parametrize('codec', ['gzip', 'none'])
+def test_failed_commit_keeps_reports(tmp_path, monkeypatch, codec):
+    out = str(tmp_path / 'reports')
+    _reports(out, 90)
+    store = ReportArchive._store
+    calls = []
+    def failing_store(self, path):
+        calls.append(path)
+        if len(calls) == 2:
+            raise OSError('disco lleno')
+        return store(self, path)
+    monkeypatch.setattr(ReportArchive, '_store', failing_store)
+    with pytest.raises(OSError):
+        archive_reports(out, codec=codec)
+    # Sin índice que apunte a ellos, los informes siguen en outdir
+    assert sorted(os.listdir(out)) == ['archive', 'big.csv', 'sub', 'summary.json']
+    monkeypatch.setattr(ReportArchive, '_store', store)
+    run_id = archive_reports(out, codec=codec)
+    assert os.listdir(out) == ['archive']
+    with ReportArchive(os.path.join(out, 'archive')) as archive:
+        assert list(archive.runs()['run_id']) == [run_id]
+        assert archive.read_json(run_id, 'summary.json') == {'score_global': 90}
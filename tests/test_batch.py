@@ -0,0 +1,64 @@
+import os
+import json
+import pandas as pd
+from click.testing import CliRunner
+from scripts.batch import expand_inputs, dataset_names, run_batch
+from scripts.main import main
+from scripts.archive import ReportArchive
+
+RULES = ("columns:\n  email:\n    type: string\n    pattern: '^\\S+@\\S+$'\n"
+         "rules:\n  - name: id_unico\n    column: id\n    type: unique\n")
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for day, emails in (('2024-01-01', ['a@b.com', 'x']), ('2024-01-02', ['c@d.com', None])):
+        os.makedirs(f'data/dt={day}')
+        pd.DataFrame({'id': [1, 2], 'email': emails}).to_csv(f'data/dt={day}/part.csv', index=False)
+    os.makedirs('data/dt=2024-01-03')
+    open('data/dt=2024-01-03/part.csv', 'w').close()   # vacío: falla al cargar
+    with open('rules.yml', 'w') as f:
+        f.write(RULES)
+
+def test_expand_inputs_and_names(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    paths = expand_inputs('data/**/*.csv')
+    assert len(paths) == 3
+    with open('data/manifest.txt', 'w') as f:
+        f.write('# particiones\ndt=2024-01-01/part.csv\n\ndt=2024-01-02/part.csv\n')
+    assert expand_inputs('data/manifest.txt') == paths[:2]
+    assert dataset_names(paths) == ['dt=2024-01-01__part', 'dt=2024-01-02__part', 'dt=2024-01-03__part']
+    assert dataset_names(['a/x.csv', 'a/x.parquet']) == ['x', 'x_1']
+
+def test_run_batch_isolates_failures(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    result = run_batch('data/**/*.csv', 'rules.yml', 'out', jobs=2)
+    assert list(result['status']) == ['ok', 'ok', 'error']
+    assert list(result['rows'][:2]) == [2, 2]
+    assert 'EmptyDataError' in result['error'][2]
+    summary = json.load(open('out/batch_summary.json'))
+    assert summary['ok'] == 2 and summary['failed'] == 1
+    for name, run_id in zip(result['dataset'][:2], result['archive'][:2]):
+        with ReportArchive(os.path.join('out', name, 'archive')) as archive:
+            assert {'run_metrics.json', 'quality_metrics.csv'} <= set(archive.files(run_id)['name'])
+    # last_run separado por dataset
+    assert sorted(os.listdir('.state/last_run')) == ['dt=2024-01-01__part.txt', 'dt=2024-01-02__part.txt']
+
+def test_cli_batch(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    runner = CliRunner()
+    result = runner.invoke(main, ['--batch', 'data/**/*.csv', '--rules', 'rules.yml', '--outdir', 'out'])
+    assert result.exit_code == 1
+    assert os.path.exists('out/batch_summary.csv')
+    result = runner.invoke(main, ['--batch', 'data/*/x.csv', '--input', 'a.csv', '--rules', 'rules.yml'])
+    assert result.exit_code == 2
+
+def test_batch_alerts_one_message(tmp_path, monkeypatch):
+    from scripts.alerts import StubWebhookServer, wait_pending
+    _setup(tmp_path, monkeypatch)
+    with StubWebhookServer() as stub:
+        monkeypatch.setenv('SLACK_WEBHOOK_URL', stub.url)
+        run_batch('data/**/*.csv', 'rules.yml', 'out', jobs=2)
+        wait_pending(5)
+    # Sólo dt=2024-01-02 tiene un 50% de nulos en email
+    assert len(stub.received) == 1
+    assert "[dt=2024-01-02__part] :warning: Null Rate alto en 'email'" in stub.received[0]['text']
@@ -0,0 +1,32 @@
+import os
+import sys
+import json
+import subprocess
+import pandas as pd
+from click.testing import CliRunner
+from scripts.main import main
+from scripts.archive import ReportArchive
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_import_does_not_load_stage_modules():
+    code = "import sys, json, scripts.main; print(json.dumps(sorted(sys.modules)))"
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    loaded = set(json.loads(out.stdout))
+    for mod in ('scipy', 'jinja2', 'scripts.remediation', 'scripts.alerts', 'scripts.parallel', 'scripts.drift',
+                'scripts.violations', 'scripts.sql_backend', 'duckdb', 'scripts.stage_cache'):
+        assert mod not in loaded, mod
+
+def test_cli_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame({'id': [1, 2, 3, 4], 'email': ['a@b.com', 'x', None, 'c@d.com']}).to_csv('data.csv', index=False)
+    with open('rules.yml', 'w') as f:
+        f.write("columns:\n  email:\n    type: string\n    pattern: '^\\S+@\\S+$'\n"
+                "rules:\n  - name: id_unico\n    column: id\n    type: unique\n")
+    result = CliRunner().invoke(main, ['--input', 'data.csv', '--rules', 'rules.yml', '--outdir', 'out'])
+    assert result.exit_code == 0, result.output
+    with ReportArchive(os.path.join('out', 'archive')) as archive:
+        names = set(archive.files(archive.latest())['name'])
+    assert {'run_metrics.json', 'summary.json', 'quality_metrics.csv', 'history_manifest.json',
+            'violations.npz', 'violation_samples.csv'} <= names
+    assert os.listdir('out') == ['archive']
@@ -0,0 +1,49 @@
+import pandas as pd
+import numpy as np
+from scripts.column_profile import build_profiles
+from scripts.metrics import compute_quality_metrics, validate_patterns
+from scripts.rules import apply_business_rules
+
+def test_column_profile_counts():
+    df = pd.DataFrame({
+        'a': [1, 1, None, None, 5],
+        'b': ['x', 'bad', 'x', None, 'x']
+    })
+    schema = {'b': {'pattern': r'^x$'}}
+    profiles = build_profiles(df, schema)
+
+    pa, pb = profiles['a'], profiles['b']
+    assert pa.n_nulls == 2
+    assert pa.n_duplicates == int(df['a'].duplicated().sum())
+    assert pb.n_duplicates == int(df['b'].duplicated().sum())
+    assert pa.percentiles([25, 50, 75]) == list(np.percentile([1, 1, 5], [25, 50, 75]))
+    assert pa.count_outside(1, 4) == 1
+    assert pb.n_pattern_matches == 3
+    assert pb.n_pattern_mismatches == 1
+
+def test_profiles_are_scanned_once(monkeypatch):
+    import scripts.column_profile
+    df = pd.DataFrame({'a': [1, 2, 2, None], 'b': ['x', 'y', 'x', 'x']})
+    schema = {'a': {'type': 'integer'}, 'b': {'pattern': r'^x$'}}
+    rules = [
+        {'name': 'a_unico', 'column': 'a', 'type': 'unique'},
+        {'name': 'b_unico', 'column': 'b', 'type': 'unique'},
+        {'name': 'a_rango', 'column': 'a', 'type': 'range', 'min': 1, 'max': 2},
+        {'name': 'no_nulos', 'column': 'any', 'type': 'not_null'}
+    ]
+    scans = {'value_counts': 0, 'match_values': 0}
+    value_counts, match_values = pd.Series.value_counts, scripts.column_profile.match_values
+    def counting(name, fn):
+        def wrapper(*args, **kwargs):
+            scans[name] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+    monkeypatch.setattr(pd.Series, 'value_counts', counting('value_counts', value_counts))
+    monkeypatch.setattr(scripts.column_profile, 'match_values', counting('match_values', match_values))
+
+    profiles = build_profiles(df, schema)
+    compute_quality_metrics(df, schema, profiles)
+    apply_business_rules(df, rules, schema, profiles)
+    validate_patterns(df, schema, profiles)
+    # Un conteo de valores por columna y un match del patrón para las tres etapas
+    assert scans == {'value_counts': 2, 'match_values': 1}
@@ -19,3 +19,49 @@ def test_compute_drift(tmp_path):
     # Ahora hay hist previo y js_distance calculado
     assert isinstance(rpt2['x']['js_distance'], float)
     assert rpt2['x']['drift'] is True
+
+def test_drift_store_fixed_edges_and_window(tmp_path):
+    from scripts.drift import DriftStore
+    rng = np.random.default_rng(0)
+    with DriftStore(str(tmp_path / 'drift.sqlite'), bins=8, window=3) as store:
+        first = store.record(pd.DataFrame({'x': rng.normal(0, 1, 2000), 'y': rng.uniform(0, 1, 2000)}))
+        assert first['x']['js_distance'] is None
+        edges = store.edges()['x'][1]
+        for _ in range(4):
+            rpt = store.record(pd.DataFrame({'x': rng.normal(0, 1, 2000), 'y': rng.uniform(5, 6, 2000)}),
+                               threshold=0.1)
+        # Los bordes no cambian entre ejecuciones y la ventana se recorta a 3
+        assert np.array_equal(store.edges()['x'][1], edges)
+        assert rpt['x']['baseline_runs'] == 3
+        assert rpt['x']['drift'] is False and rpt['x']['psi'] < 0.1
+        # 'y' fuera del rango original: todo cae en el último bin
+        assert rpt['y']['baseline_runs'] == 3
+
+        store.rebaseline(['y'])
+        rpt = store.record(pd.DataFrame({'x': rng.normal(0, 1, 100), 'y': rng.uniform(5, 6, 100)}))
+        assert rpt['y']['edges_version'] == 2
+        assert rpt['y']['js_distance'] is None
+        assert rpt['x']['edges_version'] == 1
+
+def test_categorical_drift_with_frequency_sketches(tmp_path):
+    from scripts.drift import DriftStore
+    rng = np.random.default_rng(1)
+    codes = np.array(['A', 'B', 'C', 'D'])
+
+    def frame(p, n=4000):
+        # Texto libre de alta cardinalidad junto a un código categórico
+        return pd.DataFrame({
+            'code': rng.choice(codes, n, p=p),
+            'comment': [f'c{i}' for i in rng.integers(0, 10 ** 6, n)]
+        })
+
+    with DriftStore(str(tmp_path / 'drift.sqlite')) as store:
+        base = frame([0.4, 0.3, 0.2, 0.1])
+        store.record_stream(base.iloc[i:i + 1000] for i in range(0, 4000, 1000))
+        stable = store.record(frame([0.4, 0.3, 0.2, 0.1]), threshold=0.1)
+        shifted = store.record(frame([0.1, 0.2, 0.3, 0.4]), threshold=0.1)
+    assert stable['code']['kind'] == 'categorical'
+    assert stable['code']['drift'] is False
+    assert shifted['code']['drift'] is True
+    assert shifted['code']['psi'] > stable['code']['psi']
+    assert shifted['comment']['baseline_runs'] == 2
@@ -0,0 +1,35 @@
+import json
+import pandas as pd
+from scripts.column_profile import build_profiles
+from scripts.instrumentation import RunMetrics, RunProfiler
+from scripts.metrics import compute_quality_metrics
+
+def test_run_metrics_stages_and_columns(tmp_path):
+    df = pd.DataFrame({'a': [1, 2, 2, None] * 100, 'b': ['x@y.com', 'bad', None, 'x@y.com'] * 100})
+    schema = {'b': {'pattern': r'^\S+@\S+$'}}
+    with RunMetrics() as run:
+        run.stage('load')
+        run.rows = len(df)
+        run.stage('quality')
+        compute_quality_metrics(df, schema, build_profiles(df, schema))
+    # Fuera del bloque no se registra nada más
+    build_profiles(df, schema)['a'].null_mask
+
+    data = json.load(open(run.write(str(tmp_path))))
+    assert [s['stage'] for s in data['stages']] == ['load', 'quality']
+    quality = data['stages'][1]
+    assert quality['rows'] == 400 and quality['rows_per_s'] > 0
+    assert quality['cpu_s'] >= 0 and quality['peak_rss_mb'] > 0
+    assert {'null_mask', 'value_counts', 'type_mismatch_mask'} <= set(data['columns']['a'])
+    assert {'pattern_counts', 'pattern_value_mask'} <= set(data['columns']['b'])
+    scan = data['columns']['a']['value_counts']
+    assert scan['rows'] == 400 and scan['wall_s'] >= 0 and scan['cpu_s'] >= 0
+    assert scan['peak_rss_growth_mb'] >= 0 and 'rows_per_s' in scan
+
+def test_profiler_dump(tmp_path):
+    profiler = RunProfiler()
+    profiler.start()
+    sum(range(1000))
+    profiler.stop()
+    path = profiler.dump(str(tmp_path))
+    assert path.endswith('.html' if profiler.kind == 'pyinstrument' else '.prof')
@@ -0,0 +1,38 @@
+import os
+import numpy as np
+import pandas as pd
+from scripts.integrity import parent_key_index, check_referential_integrity
+
+def test_streamed_child_against_disk_index(tmp_path):
+    rng = np.random.default_rng(0)
+    parent = pd.DataFrame({'id': np.arange(5000), 'region': rng.choice(['n', 's'], 5000)})
+    parent_path = tmp_path / 'parent.csv'
+    parent.to_csv(parent_path, index=False)
+    child = pd.DataFrame({'id': rng.integers(0, 5500, 3000), 'region': rng.choice(['n', 's', 'e'], 3000)})
+    child.loc[:9, 'id'] = None
+
+    index = parent_key_index(str(parent_path), ['id', 'region'], str(tmp_path / 'idx'), chunksize=700)
+    chunks = [child.iloc[i:i + 512] for i in range(0, len(child), 512)]
+    row = check_referential_integrity(chunks, index, ['id', 'region'], sample_size=5).iloc[0]
+
+    checked = child.dropna(subset=['id']).astype({'id': int})
+    expected = ~checked.merge(parent.assign(found=True), how='left', on=['id', 'region'])['found'].notna()
+    assert row['n_null_keys'] == 10
+    assert row['n_missing'] == int(expected.sum())
+    assert len(row['orphan_sample']) == 5
+    assert len(set(row['orphan_sample'])) == 5
+
+def test_index_reused_until_parent_changes(tmp_path):
+    parent_path = tmp_path / 'parent.csv'
+    pd.DataFrame({'id': [1, 2, 3]}).to_csv(parent_path, index=False)
+    index = parent_key_index(str(parent_path), 'id', str(tmp_path / 'idx'))
+    meta_mtime = os.path.getmtime(os.path.join(index.directory, 'meta.json'))
+    assert parent_key_index(str(parent_path), 'id', str(tmp_path / 'idx')).meta == index.meta
+    assert os.path.getmtime(os.path.join(index.directory, 'meta.json')) == meta_mtime
+
+    pd.DataFrame({'id': [1, 2, 3, 4]}).to_csv(parent_path, index=False)
+    index = parent_key_index(str(parent_path), 'id', str(tmp_path / 'idx'))
+    assert len(index) == 4
+    row = check_referential_integrity([pd.DataFrame({'id': [4, 5, 5]})], index, 'id').iloc[0]
+    assert row['n_missing'] == 2
+    assert row['orphan_sample'] == [5]
@@ -0,0 +1,137 @@
+import pandas as pd
+import pytest
+from scripts.load import load_data, compact_dtypes
+from scripts.metrics import compute_quality_metrics
+
+def _frame():
+    return pd.DataFrame({
+        'id': range(6),
+        'email': ['a@b.com'] * 6,
+        'extra': ['x'] * 6,
+        'updated_at': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03',
+                                      '2024-02-01', '2024-02-02', '2024-02-03'])
+    })
+
+def test_load_csv_since_and_projection(tmp_path):
+    path = tmp_path / 'data.csv'
+    _frame().to_csv(path, index=False)
+    df = load_data(str(path), since='2024-01-15', columns=['id', 'email'])
+    assert list(df.columns) == ['id', 'email']
+    assert df['id'].tolist() == [3, 4, 5]
+
+    # Sin 'updated_at' se lee igual (una sola vez) y no se filtra
+    _frame().drop(columns='updated_at').to_csv(path, index=False)
+    assert len(load_data(str(path), since='2024-01-15')) == 6
+
+def test_load_csv_pyarrow_engine(tmp_path):
+    pytest.importorskip('pyarrow.csv')
+    path = tmp_path / 'data.csv'
+    frame = _frame()
+    frame['zip'] = ['08001', '28001', None, '41001', 'NA', '']
+    frame['edad'] = [25, 'treinta', None, 40, 41, 42]
+    frame.to_csv(path, index=False)
+    schema = {'zip': {'type': 'string', 'pattern': r'^\d{5}$'}, 'edad': {'type': 'integer'}}
+
+    pd_df = load_data(str(path), since='2024-01-02')
+    pa_df = load_data(str(path), since='2024-01-02', engine='pyarrow', schema=schema)
+    assert list(pa_df.columns) == list(pd_df.columns)
+    assert pa_df['id'].tolist() == pd_df['id'].tolist() == [2, 3, 4, 5]
+    assert pa_df['updated_at'].dtype == pd_df['updated_at'].dtype
+    assert pa_df['edad'].tolist() == pd_df['edad'].tolist()
+    # Columna de texto del esquema: sin inferencia (se conservan los ceros) y mismos nulos
+    assert pa_df['zip'].isna().tolist() == pd_df['zip'].isna().tolist()
+    assert load_data(str(path), engine='pyarrow', schema=schema)['zip'].iloc[0] == '08001'
+
+    # Streaming: chunks de chunksize filas, filtrados y sin la columna auxiliar
+    chunks = list(load_data(str(path), since='2024-01-02', chunksize=2, columns=['id'], engine='pyarrow'))
+    assert [c.columns.tolist() for c in chunks] == [['id']] * len(chunks)
+    assert [i for c in chunks for i in c['id']] == [2, 3, 4, 5]
+
+    with pytest.raises(ValueError):
+        load_data(str(path), engine='polars')
+
+def test_load_csv_pyarrow_stream_falls_back_to_pandas(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow.csv')
+    import scripts.load
+    # Bloques pequeños: los tipos del primero (enteros) no valen para los siguientes
+    monkeypatch.setattr(scripts.load, '_ARROW_BLOCK_SIZE', 256)
+    path = tmp_path / 'data.csv'
+    edad = list(range(200)) + ['treinta', 1.5] + list(range(50))
+    pd.DataFrame({'id': range(len(edad)), 'edad': edad}).to_csv(path, index=False)
+
+    chunks = list(load_data(str(path), chunksize=40, engine='pyarrow', schema={'edad': {'type': 'integer'}}))
+    expected = list(load_data(str(path), chunksize=40))
+    assert sum(len(c) for c in chunks) == len(edad)
+    assert [i for c in chunks for i in c['id']] == list(range(len(edad)))
+    # Desde el fallo, los mismos chunks que con pandas
+    assert [str(v) for v in chunks[-1]['edad']] == [str(v) for v in expected[-1]['edad']]
+    assert 'treinta' in [v for c in chunks for v in c['edad']]
+
+def test_load_csv_pyarrow_fallback_keeps_text_columns(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow.csv')
+    import scripts.load
+    monkeypatch.setattr(scripts.load, '_ARROW_BLOCK_SIZE', 256)
+    path = tmp_path / 'data.csv'
+    n = 250
+    edad = list(range(200)) + ['treinta'] + list(range(n - 201))
+    # Una nota entre comillas de varias líneas antes del fallo: se reanuda por registros
+    nota = ['línea 1\nlínea 2' if i == 5 else 'ok' for i in range(n)]
+    zips = [f'{i % 100:05d}' for i in range(n)]
+    pd.DataFrame({'id': range(n), 'edad': edad, 'zip': zips, 'nota': nota}).to_csv(path, index=False)
+
+    schema = {'edad': {'type': 'integer'}, 'zip': {'type': 'string'}, 'nota': {'type': 'string'}}
+    chunks = list(load_data(str(path), chunksize=40, engine='pyarrow', schema=schema))
+    assert [i for c in chunks for i in c['id']] == list(range(n))
+    # Antes y después del fallo, 'zip' es texto con sus ceros a la izquierda
+    assert [z for c in chunks for z in c['zip']] == zips
+    assert [v for c in chunks for v in c['nota']] == nota
+
+def test_load_parquet_pushdown(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    import pyarrow as pa
+    path = tmp_path / 'data.parquet'
+    # Dos row groups: enero y febrero
+    pq.write_table(pa.Table.from_pandas(_frame(), preserve_index=False), path, row_group_size=3)
+
+    df = load_data(str(path), since='2024-01-15', columns=['id', 'updated_at'])
+    assert list(df.columns) == ['id', 'updated_at']
+    assert df['id'].tolist() == [3, 4, 5]
+
+    chunks = list(load_data(str(path), since='2024-01-02', chunksize=2))
+    assert sum(len(c) for c in chunks) == 4
+    assert 'extra' in chunks[0].columns
+
+def test_load_arrow_ipc(tmp_path):
+    feather = pytest.importorskip('pyarrow.feather')
+    path = tmp_path / 'data.arrow'
+    feather.write_feather(_frame(), str(path))
+    df = load_data(str(path), columns=['email'])
+    assert list(df.columns) == ['email']
+    assert len(df) == 6
+
+def test_compact_dtypes():
+    n = 1000
+    df = pd.DataFrame({
+        'id': range(n),
+        'zip': [80001.0, None] * (n // 2),             # enteros con huecos -> float64 (se queda)
+        'importe': [0.5, 1.25] * (n // 2),             # exactos en float32
+        'precio': [0.1, 0.2] * (n // 2),               # no exactos en float32
+        'pais': pd.Series(['ES', 'FR'] * (n // 2), dtype=object),
+        'email': pd.Series([f'u{i}@x.com' for i in range(n)], dtype=object),
+        'edad': [25, 'treinta'] * (n // 2),
+    })
+    schema = {'zip': {'type': 'integer', 'pattern': r'^\d{5}$'}, 'importe': {'type': 'number'}, 'precio': {'type': 'number'},
+              'edad': {'type': 'integer'}}
+    out, report = compact_dtypes(df, schema)
+    dtypes = dict(zip(report['column'], report['dtype_after']))
+    assert dtypes['id'] == 'int16' and dtypes['zip'] == 'float64'
+    assert dtypes['importe'] == 'float32' and dtypes['precio'] == 'float64'
+    assert dtypes['pais'] == 'category' and dtypes['edad'] == 'object'
+    assert out['email'].dtype != object
+    assert report['bytes_after'].sum() < report['bytes_before'].sum()
+    # Los informes no cambian
+    pd.testing.assert_frame_equal(compute_quality_metrics(out, schema), compute_quality_metrics(df, schema))
+    # Los valores no cambian
+    for col in df.columns:
+        assert out[col].isna().tolist() == df[col].isna().tolist()
+        assert out[col].dropna().tolist() == df[col].dropna().tolist()
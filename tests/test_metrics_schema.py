@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from scripts.rules import infer_schema
 from scripts.metrics import compute_quality_metrics
@@ -26,3 +27,47 @@ def test_type_and_pattern_mismatch():
     row_email = mdf.loc[mdf.column == 'email'].iloc[0]
     assert row_email['n_pattern_mismatch'] == 1
     assert row_email['pct_pattern_mismatch'] == round(1/3*100, 2)
+
+def test_type_mismatch_number_and_date():
+    data = {
+        'importe': [1.5, 2, None],
+        'alta': ['2024-01-31', '2024-02-30', '31/01/2024'],
+        'codigo': [1, 'x', None]
+    }
+    df = pd.DataFrame(data)
+    schema = {
+        'importe': {'type': 'number'},
+        'alta': {'type': 'date', 'format': '%Y-%m-%d'},
+        'codigo': {'type': 'integer'}
+    }
+
+    mdf = compute_quality_metrics(df, schema).set_index('column')
+
+    assert mdf.loc['importe', 'n_type_mismatch'] == 0
+    # 30 de febrero y formato dd/mm/YYYY no cumplen el formato
+    assert mdf.loc['alta', 'n_type_mismatch'] == 2
+    assert mdf.loc['codigo', 'n_type_mismatch'] == 1
+
+def test_type_check_accepts_numpy_and_compact_dtypes():
+    df = pd.DataFrame({
+        'codigo': pd.Series([1, None, 3], dtype='Int16'),
+        'objeto': pd.Series([np.int64(1), np.int32(2), 'x'], dtype=object),
+        'importe': pd.Series([1.5, 2.0, None], dtype='float32'),
+        'alta': pd.Series(['2024-01-01', 'mal', '2024-01-01'], dtype='category'),
+    })
+    schema = {'codigo': {'type': 'integer'}, 'objeto': {'type': 'integer'},
+              'importe': {'type': 'number'}, 'alta': {'type': 'date', 'format': '%Y-%m-%d'}}
+    mdf = compute_quality_metrics(df, schema).set_index('column')
+    assert mdf['n_type_mismatch'].to_dict() == {'codigo': 0, 'objeto': 1, 'importe': 0, 'alta': 1}
+
+def test_type_mismatch_date_with_timezones():
+    # Offsets distintos (horario de verano) y una directiva que pandas no soporta (%s)
+    df = pd.DataFrame({
+        'alta': ['2024-03-01 10:00 +0100', '2024-07-01 10:00 +0200', '2024-07-01 10:00'],
+        'epoch': ['1700000000', '1700003600', 'ayer']
+    })
+    schema = {'alta': {'type': 'date', 'format': '%Y-%m-%d %H:%M %z'},
+              'epoch': {'type': 'date', 'format': '%s'}}
+    mdf = compute_quality_metrics(df, schema).set_index('column')
+    # strptime tampoco admite %s: como con el bucle por valor, todos son desajustes
+    assert mdf['n_type_mismatch'].to_dict() == {'alta': 1, 'epoch': 3}
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from scripts.parallel import parallel_audit
+from scripts.metrics import compute_quality_metrics, compute_statistical_profile, validate_patterns
+from scripts.rules import apply_business_rules
+
+def test_parallel_audit_matches_serial():
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame({
+        'id': np.arange(n),
+        'edad': rng.integers(0, 120, n).astype(float),
+        'email': rng.choice(['a@b.com', 'bad', None], n),
+        'mixta': pd.Series(rng.choice([1, 'a', 2.5], n), dtype=object),
+        'alta': pd.date_range('2024-01-01', periods=n, freq='D')
+    })
+    schema = {
+        'edad': {'type': 'integer'},
+        'email': {'pattern': r'^\S+@\S+$'},
+        'mixta': {'type': 'number'}
+    }
+    rules = [
+        {'name': 'no_nulos', 'column': 'any', 'type': 'not_null'},
+        {'name': 'id_unico', 'column': 'id', 'type': 'unique'},
+        {'name': 'edad_rango', 'column': 'edad', 'type': 'range', 'min': 18, 'max': 99}
+    ]
+    out = parallel_audit(df, schema, rules, workers=2)
+
+    pd.testing.assert_frame_equal(out['quality'], compute_quality_metrics(df, schema))
+    pd.testing.assert_frame_equal(out['rules'], apply_business_rules(df, rules, schema))
+    pd.testing.assert_frame_equal(out['profile'], compute_statistical_profile(df))
+    pd.testing.assert_frame_equal(out['patterns'], validate_patterns(df, schema))
+
+def test_parallel_object_columns_keep_python_values():
+    # Arrow convertiría estos object a float: el paralelo debe ver los mismos valores que la serie
+    n = 200
+    df = pd.DataFrame({
+        'enteros': pd.Series([1, 2, None, 2] * (n // 4), dtype=object),
+        'mezcla': pd.Series([1.5, 2, 3, 4] * (n // 4), dtype=object),
+        'texto': pd.Series(['a', None, 'b', 'c'] * (n // 4), dtype=object),
+    })
+    schema = {'enteros': {'type': 'integer'}, 'mezcla': {'type': 'integer'}, 'texto': {'type': 'string'}}
+    rules = [{'name': 'rango', 'column': 'mezcla', 'type': 'range', 'min': 2, 'max': 3}]
+    out = parallel_audit(df, schema, rules, workers=2)
+
+    serial = compute_quality_metrics(df, schema)
+    pd.testing.assert_frame_equal(out['quality'], serial)
+    assert serial.set_index('column')['n_type_mismatch'].to_dict() == {'enteros': 0, 'mezcla': 50, 'texto': 0}
+    pd.testing.assert_frame_equal(out['rules'], apply_business_rules(df, rules, schema))
+    pd.testing.assert_frame_equal(out['profile'], compute_statistical_profile(df))
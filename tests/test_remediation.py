@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from scripts.column_profile import build_profiles
+from scripts.metrics import compute_quality_metrics
+from scripts.remediation import apply_remediation, write_log
+
+SCHEMA = {
+    'edad': {'type': 'integer', 'range': [18, 99],
+             'remediation': {'type_mismatch': 'null', 'out_of_range': 'clip', 'fill_null': 0}},
+    'email': {'type': 'string', 'pattern': r'^\S+@\S+\.\w+$',
+              'remediation': {'strip': True, 'pattern_mismatch': 'null'}},
+    'importe': {'type': 'number', 'remediation': {'type_mismatch': 'coerce'}},
+    'nota': {'type': 'string'},
+}
+
+def _frame():
+    return pd.DataFrame({
+        'edad': [25, 'treinta', 150, None, 10],
+        'email': [' a@b.com', 'malo', 'c@d.com ', None, 'e@f.org'],
+        'importe': ['1.5', 2, 'x', None, 3.25],
+        'nota': ['a', 'b', 'c', 'd', 'e'],
+    }, index=[10, 11, 12, 13, 14])
+
+def test_apply_remediation_in_place_and_log(tmp_path):
+    df = _frame()
+    nota = df['nota']
+    profiles = build_profiles(df, SCHEMA)
+    before = compute_quality_metrics(df, SCHEMA, profiles).set_index('column')
+    out, log, changed = apply_remediation(df, SCHEMA, profiles)
+
+    assert out is df and changed == ['edad', 'email', 'importe']
+    assert df['nota'] is nota or df['nota'].equals(nota)
+    assert df['edad'].tolist() == [25, 0, 99, 0, 18]
+    assert df['email'].isna().tolist() == [False, True, False, True, False]
+    assert df['email'][[10, 12]].tolist() == ['a@b.com', 'c@d.com']
+    assert df['importe'][[10, 11, 14]].tolist() == [1.5, 2, 3.25]
+    assert pd.isna(df['importe'][12])
+
+    assert set(log['action'].cat.categories) <= {'type_mismatch', 'pattern_mismatch', 'out_of_range',
+                                                  'strip', 'fill_null'}
+    edad = log[log['column'] == 'edad']
+    assert list(zip(edad['row'], edad['action'])) == [
+        (11, 'type_mismatch'), (12, 'out_of_range'), (14, 'out_of_range'), (11, 'fill_null'), (13, 'fill_null')
+    ]
+    assert log[(log['column'] == 'email') & (log['action'] == 'strip')]['row'].tolist() == [10, 12]
+
+    # Métricas actualizadas sólo con los perfiles de las columnas cambiadas
+    after = compute_quality_metrics(df, SCHEMA, profiles).set_index('column')
+    fresh = compute_quality_metrics(df, SCHEMA).set_index('column')
+    pd.testing.assert_frame_equal(after, fresh)
+    assert before.loc['edad', 'n_type_mismatch'] == 1 and after.loc['edad', 'n_type_mismatch'] == 0
+    assert after.loc['email', 'n_pattern_mismatch'] == 0
+
+    path = write_log(log, str(tmp_path))
+    back = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    assert len(back) == len(log)
+
+def test_remediation_without_config_is_noop():
+    df = _frame()
+    out, log, changed = apply_remediation(df, {'nota': {'type': 'string'}})
+    assert changed == [] and len(log) == 0
+    pd.testing.assert_frame_equal(out, _frame())
+
+def test_strip_categorical():
+    df = pd.DataFrame({'pais': pd.Series([' ES', 'FR', None, ' ES'], dtype='category')})
+    _, log, _ = apply_remediation(df, {'pais': {'remediation': {'strip': True}}})
+    assert df['pais'].tolist()[:2] == ['ES', 'FR'] and np.isnan(df['pais'].iloc[2])
+    assert log['row'].tolist() == [0, 3]
+
+def test_remediation_config_from_yaml(tmp_path):
+    import pytest
+    from scripts.rules import infer_schema
+
+    # `null` en YAML es None: anula, no desactiva la acción
+    path = tmp_path / 'rules.yml'
+    path.write_text(
+        "columns:\n"
+        "  edad:\n    type: integer\n    range: [18, 99]\n"
+        "    remediation:\n      type_mismatch: null\n      out_of_range: null\n"
+        "  email:\n    type: string\n    pattern: '^\\S+@\\S+$'\n"
+        "    remediation:\n      strip: true\n      pattern_mismatch: null\n"
+    )
+    schema = infer_schema(str(path))
+    df = pd.DataFrame({'edad': [25, 'x', 120], 'email': ['a@b.com', 'bad', ' c@d.com ']})
+    out, log, changed = apply_remediation(df, schema)
+    assert changed == ['edad', 'email']
+    assert out['edad'].isna().tolist() == [False, True, True]
+    assert out['email'].tolist()[::2] == ['a@b.com', 'c@d.com'] and pd.isna(out['email'][1])
+    assert sorted(log['action'].astype(str).unique()) == ['out_of_range', 'pattern_mismatch', 'strip', 'type_mismatch']
+
+    with pytest.raises(ValueError, match='out_of_range'):
+        apply_remediation(_frame(), {'edad': {'remediation': {'out_of_range': 'drop'}}})
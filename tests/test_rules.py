@@ -0,0 +1,34 @@
+import pandas as pd
+from scripts.rules import apply_business_rules, compile_rules
+
+RULES = [
+    {'name': 'no_nulos', 'column': 'any', 'type': 'not_null'},
+    {'name': 'edad_rango', 'column': 'edad', 'type': 'range', 'min': 18, 'max': 99},
+    {'name': 'edad_unica', 'column': 'edad', 'type': 'unique'},
+    {'name': 'edad_rango_bis', 'column': 'edad', 'type': 'range', 'min': 18, 'max': 99},
+    {'name': 'nombre_no_vacio', 'column': 'nombre', 'type': 'non_empty_string'}
+]
+
+def test_apply_business_rules_observed():
+    df = pd.DataFrame({'edad': [10, 25, 25, 120, None], 'nombre': ['ana', ' ', 'luis', '', 'eva']})
+    rdf = apply_business_rules(df, RULES).set_index(['rule', 'column'])
+    assert rdf.loc[('no_nulos', 'edad'), 'observed'] == '1 nulls'
+    assert rdf.loc[('no_nulos', 'nombre'), 'observed'] == '0 nulls'
+    assert rdf.loc[('edad_rango', 'edad'), 'observed'] == '1<18, 1>99'
+    assert rdf.loc[('edad_unica', 'edad'), 'observed'] == '1 duplicates'
+    assert rdf.loc[('nombre_no_vacio', 'nombre'), 'observed'] == '2 empty'
+    assert not rdf.loc[('edad_rango', 'edad'), 'success']
+
+def test_rule_plan_shares_computations():
+    df = pd.DataFrame({'edad': [10, 25, 30], 'nombre': ['a', 'b', 'c']})
+    plan = compile_rules(RULES, df.columns)
+    # 'any' se expande al compilar, en el orden del informe
+    assert [(r['name'], c) for _, r, c in plan.steps][:2] == [('no_nulos', 'edad'), ('no_nulos', 'nombre')]
+    rdf = plan.execute(df)
+    assert len(rdf) == len(plan.steps)
+
+    explain = plan.explain().set_index(['rule', 'column'])
+    assert not explain.loc[('edad_rango', 'edad'), 'reused']
+    assert explain.loc[('edad_rango_bis', 'edad'), 'reused']
+    assert explain.loc[('edad_rango', 'edad'), 'shared'] == 'range:18:99'
+    assert (explain['rows'] == 3).all()
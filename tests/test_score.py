@@ -1,5 +1,6 @@
 import pandas as pd
-from scripts.score import normalize, compute_dimensions, compute_overall_score
+import pytest
+from scripts.score import normalize, compute_dimensions, compute_overall_score, build_summary, parse_weights
 
 def test_normalize_bounds():
     assert normalize(0, 0, 100) == 1.0
@@ -33,3 +34,24 @@ def test_compute_overall_score_default_weights():
     # =1*0.25 +0.5*0.25+0*0.25+0.5*0.25 = 0.5
     assert score == 0.5
 
+
+def test_overall_score_normalizes_present_dimensions():
+    # Sin outliers, las tres dimensiones reparten todo el peso
+    assert compute_overall_score({'completitud': 1, 'duplicados': 1, 'consistencia': 1}) == 1.0
+    assert compute_overall_score({'completitud': 1, 'duplicados': 0}, {'completitud': 3, 'duplicados': 1}) == 0.75
+
+def test_build_summary_and_weights():
+    metrics = pd.DataFrame({'pct_nulls': [10, 20], 'pct_duplicates': [0, 0]})
+    profile = pd.DataFrame({'pct_outliers': [1.0, 2.0, None]})
+    summary = build_summary(metrics, pd.DataFrame({'success': [True, True]}), profile)
+    assert summary['dimensions']['outliers'] == 0.85
+    # (0.85 + 1 + 1 + 0.85) / 4
+    assert summary['score_global'] == 0.925 and summary['semaforo'] == 'VERDE'
+    # Sin reglas no hay dimensión de consistencia
+    assert 'consistencia' not in build_summary(metrics, pd.DataFrame())['dimensions']
+
+    assert parse_weights('completitud=0.5, outliers=0.5') == {'completitud': 0.5, 'outliers': 0.5}
+    for bad in ('calidad=1', 'completitud', 'completitud=0'):
+        with pytest.raises(ValueError):
+            parse_weights(bad)
+    assert build_summary(metrics, pd.DataFrame(), weights={'completitud': 1})['semaforo'] == 'VERDE'
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from scripts.sketches import HyperLogLog
+from scripts.metrics import compute_quality_metrics
+from scripts.rules import apply_business_rules
+
+def test_hll_estimate_and_merge():
+    a, b = HyperLogLog(12), HyperLogLog(12)
+    a.update(np.arange(0, 60000))
+    b.update(np.arange(40000, 100000).astype(float))  # 5.0 y 5 son el mismo valor
+    a.merge(b)
+    restored = HyperLogLog.from_dict(a.to_dict())
+    assert restored.estimate() == a.estimate()
+    assert abs(a.estimate() / 100000 - 1) <= 3 * a.relative_error
+
+def test_quality_metrics_with_hll_column():
+    df = pd.DataFrame({'id': list(range(5000)) + list(range(1000)), 'b': ['x'] * 6000})
+    schema = {'id': {'sketch': 'hll', 'hll_precision': 14}}
+    mdf = compute_quality_metrics(df, schema).set_index('column')
+
+    row = mdf.loc['id']
+    assert abs(row['n_duplicates'] - 1000) <= row['pct_duplicates_error'] / 100 * len(df)
+    assert row['pct_duplicates_error'] > 0
+    # Las columnas sin sketch siguen siendo exactas
+    assert mdf.loc['b', 'n_duplicates'] == 5999
+    assert mdf.loc['b', 'pct_duplicates_error'] == 0
+
+def test_unique_rule_with_hll():
+    df = pd.DataFrame({'id': range(3000)})
+    rules = [{'name': 'id_unico', 'column': 'id', 'type': 'unique'}]
+    rdf = apply_business_rules(df, rules, {'id': {'sketch': 'hll'}})
+    assert rdf.iloc[0]['observed'].startswith('~')
+    assert bool(rdf.iloc[0]['success'])
+
+def test_numeric_sketch_profile_matches_exact_and_merges():
+    from scripts.metrics import (
+        compute_statistical_profile, build_numeric_sketches, profile_from_sketches
+    )
+    from scripts.sketches import dump_sketches, load_sketches, merge_sketches
+    df = pd.DataFrame({'a': [1, 2, 3, 4, 100, None], 'b': [10, 20, 30, 40, 50, 60]})
+    exact = compute_statistical_profile(df)
+    sketch = compute_statistical_profile(df, method='sketch')
+    pd.testing.assert_frame_equal(exact, sketch, check_dtype=False)
+
+    # Particiones serializadas y fusionadas == perfil de la tabla completa
+    part1 = load_sketches(dump_sketches(build_numeric_sketches(df.iloc[:3])))
+    part2 = build_numeric_sketches(df.iloc[3:])
+    merged = profile_from_sketches(merge_sketches(part1, part2))
+    pd.testing.assert_frame_equal(exact, merged, check_dtype=False)
@@ -0,0 +1,98 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+from scripts.load import load_data
+from scripts.column_profile import build_profiles
+from scripts.metrics import compute_quality_metrics, compute_statistical_profile, validate_patterns
+from scripts.rules import apply_business_rules
+from scripts.archive import ReportArchive
+
+duckdb = pytest.importorskip('duckdb')
+pytest.importorskip('pyarrow')
+from scripts.sql_backend import sql_audit  # noqa: E402
+
+SCHEMA = {
+    'id': {'type': 'integer'},
+    'zip': {'type': 'integer', 'pattern': r'^\d{5}$'},
+    'email': {'type': 'string', 'pattern': r'^\S+@\S+$'},
+    'alta': {'type': 'date', 'format': '%Y-%m-%d'},
+    'x': {'type': 'number'},
+}
+RULES = [
+    {'name': 'no_nulos', 'column': 'any', 'type': 'not_null'},
+    {'name': 'id_unico', 'column': 'id', 'type': 'unique'},
+    {'name': 'edad_rango', 'column': 'edad', 'type': 'range', 'min': 18, 'max': 99},
+    {'name': 'email_no_vacio', 'column': 'email', 'type': 'non_empty_string'}
+]
+
+def _frame(n=500):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'id': np.arange(n) % (n - 3),
+        'edad': rng.integers(0, 120, n),
+        'zip': rng.integers(9000, 99999, n).astype(float),
+        'email': rng.choice(['a@b.com', 'bad', ' ', None], n),
+        'alta': rng.choice(['2024-01-31', '2024-02-30', '31/01/2024'], n),
+        'x': rng.normal(0, 1, n),
+        'ok': rng.choice([True, False], n),
+    })
+    df.loc[[3, 7], 'zip'] = None
+    df.loc[5, 'x'] = np.nan
+    return df
+
+def _pandas_reports(df):
+    profiles = build_profiles(df, SCHEMA)
+    return [compute_quality_metrics(df, SCHEMA, profiles), apply_business_rules(df, RULES, SCHEMA, profiles),
+            compute_statistical_profile(df, profiles), validate_patterns(df, SCHEMA, profiles)]
+
+def _sql_reports(audit):
+    return [audit.quality_metrics(), audit.business_rules(), audit.statistical_profile(), audit.pattern_validation()]
+
+def test_duckdb_matches_pandas_on_parquet(tmp_path):
+    path = str(tmp_path / 'data.parquet')
+    _frame().to_parquet(path, index=False)
+    audit = sql_audit(path, SCHEMA, RULES)
+    assert audit.row_count == 500 and audit.sql.count('FROM src') == 2
+    for expected, got in zip(_pandas_reports(load_data(path)), _sql_reports(audit)):
+        pd.testing.assert_frame_equal(expected, got, check_dtype=False)
+
+def test_duckdb_table_and_since(tmp_path):
+    df = _frame()
+    df['updated_at'] = pd.date_range('2024-01-01', periods=len(df), freq='h')
+    path = str(tmp_path / 'ventas.duckdb')
+    con = duckdb.connect(path)
+    con.register('df', df)
+    con.execute('CREATE TABLE ventas AS SELECT * FROM df')
+    con.execute('CREATE TABLE otra AS SELECT 1 AS a')
+    con.close()
+    with pytest.raises(ValueError, match='--table'):
+        sql_audit(path, SCHEMA, RULES)
+
+    since = '2024-01-10 00:00:00'
+    audit = sql_audit(path, SCHEMA, RULES, table='ventas', since=since, columns=list(SCHEMA) + ['edad'])
+    # Como load_data: columnas en el orden de la tabla
+    expected = df[df['updated_at'] > since][['id', 'edad', 'zip', 'email', 'alta', 'x']].reset_index(drop=True)
+    assert audit.row_count == len(expected)
+    for want, got in zip(_pandas_reports(expected), _sql_reports(audit)):
+        pd.testing.assert_frame_equal(want, got, check_dtype=False)
+
+def test_cli_duckdb_backend(tmp_path, monkeypatch):
+    from scripts.main import main
+
+    monkeypatch.chdir(tmp_path)
+    _frame().to_parquet('data.parquet', index=False)
+    with open('rules.yml', 'w') as f:
+        f.write("columns:\n  email:\n    type: string\n    pattern: '^\\S+@\\S+$'\n"
+                "rules:\n  - name: id_unico\n    column: id\n    type: unique\n")
+    runner = CliRunner()
+    result = runner.invoke(main, ['--input', 'data.parquet', '--rules', 'rules.yml', '--outdir', 'out',
+                                  '--backend', 'duckdb'])
+    assert result.exit_code == 0, result.output
+    with ReportArchive(os.path.join('out', 'archive')) as archive:
+        rules = archive.read_csv(archive.latest(), 'business_rules.csv')
+    assert rules.loc[0, 'observed'] == '3 duplicates'
+
+    result = runner.invoke(main, ['--input', 'data.parquet', '--rules', 'rules.yml', '--table', 't'])
+    assert result.exit_code == 2 and '--table requiere --backend duckdb' in result.output
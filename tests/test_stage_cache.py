@@ -0,0 +1,78 @@
+import io
+import os
+import pandas as pd
+from click.testing import CliRunner
+from scripts.main import main
+from scripts.archive import ReportArchive
+from scripts.stage_cache import StageCache, stage_cache_key
+
+RULES_YML = ("columns:\n  email:\n    type: string\n    pattern: '^\\S+@\\S+$'\n  edad:\n    type: integer\n"
+             "rules:\n  - name: id_unico\n    column: id\n    type: unique\n"
+             "  - name: edad_rango\n    column: edad\n    type: range\n    min: 18\n    max: 99\n")
+
+def _run(*extra):
+    result = CliRunner().invoke(main, ['--input', 'data.csv', '--rules', 'rules.yml', '--outdir', 'out', *extra])
+    assert result.exit_code == 0, result.output
+    with ReportArchive(os.path.join('out', 'archive')) as archive:
+        run_id = archive.latest()
+        stages = [s['stage'] for s in archive.read_json(run_id, 'run_metrics.json')['stages']]
+        return stages, archive.read_json(run_id, 'summary.json'), archive.read_bytes(run_id, 'quality_metrics.csv')
+
+def test_cli_reuses_cached_stages(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame({'id': [1, 2, 2, 4], 'email': ['a@b.com', 'x', None, 'c@d.com'],
+                  'edad': [25, 17, 40, 120]}).to_csv('data.csv', index=False)
+    with open('rules.yml', 'w') as f:
+        f.write(RULES_YML)
+
+    stages, summary, quality = _run()
+    assert '3_quality_metrics' in stages and '3-6_cached' not in stages
+    assert 0 <= summary['score_global'] <= 1
+    assert set(summary['dimensions']) == {'completitud', 'duplicados', 'consistencia', 'outliers'}
+
+    # Misma entrada: no se vuelve a leer ni a calcular, mismos informes y score
+    stages, cached_summary, cached_quality = _run()
+    assert '3-6_cached' in stages and '1_load_data' not in stages
+    assert cached_quality == quality and cached_summary == summary
+
+    # Otros pesos: sólo cambia el summary
+    stages, weighted, _ = _run('--weights', 'consistencia=1')
+    assert '3-6_cached' in stages
+    assert weighted['score_global'] == summary['dimensions']['consistencia']
+
+    # La entrada cambia: la clave también
+    pd.DataFrame({'id': [1, 2, 3, 4], 'email': ['a@b.com'] * 4, 'edad': [25] * 4}).to_csv('data.csv', index=False)
+    stages, _, quality = _run()
+    assert '3_quality_metrics' in stages
+    assert 'email' in pd.read_csv(io.BytesIO(quality))['column'].tolist()
+
+    assert CliRunner().invoke(main, ['--input', 'data.csv', '--rules', 'rules.yml', '--weights', 'x=1']).exit_code == 2
+
+def test_stage_cache_put_restore_prune(tmp_path):
+    cache = StageCache(str(tmp_path / 'cache'), keep=2)
+    out = tmp_path / 'out'
+    out.mkdir()
+    (out / 'quality_metrics.csv').write_text('column,pct_nulls\na,0.0\n')
+    (out / 'summary.json').write_text('{}')
+    keys = [stage_cache_key(f'sha{i}', {'a': {}}, [], since=None) for i in range(3)]
+    assert len(set(keys)) == 3
+    assert stage_cache_key('sha0', {'a': {}}, [], since=None) == keys[0]
+
+    for i, key in enumerate(keys):
+        cache.put(key, str(out), row_count=i)
+        os.utime(os.path.join(cache.path(key), 'meta.json'), (i, i))
+    cache.prune()
+    assert cache.meta(keys[0]) is None
+    assert cache.resolve(keys[2][:8]) == keys[2]
+
+    dest = tmp_path / 'restored'
+    meta = cache.restore(keys[1], str(dest))
+    # Sólo los informes de las etapas, no el resto de outdir
+    assert meta['row_count'] == 1 and os.listdir(dest) == ['quality_metrics.csv']
+    assert cache.meta(keys[1])['files'] == ['quality_metrics.csv']
+
+def test_stage_cache_key_depends_on_code(monkeypatch):
+    import scripts.stage_cache as stage_cache
+    key = stage_cache_key('sha', {}, [])
+    monkeypatch.setattr(stage_cache, 'code_version', lambda: 'otra versión')
+    assert stage_cache_key('sha', {}, []) != key
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from scripts.load import load_data
+from scripts.metrics import compute_quality_metrics
+from scripts.rules import apply_business_rules
+from scripts.state import MetricStore, incremental_audit
+
+SCHEMA = {'id': {'type': 'integer'}, 'email': {'pattern': r'^\S+@\S+$'}}
+RULES = [
+    {'name': 'no_nulos', 'column': 'any', 'type': 'not_null'},
+    {'name': 'id_unico', 'column': 'id', 'type': 'unique'}
+]
+
+def _frame(start, n):
+    rng = np.random.default_rng(start)
+    return pd.DataFrame({
+        'id': np.arange(start, start + n) % 40,
+        'email': rng.choice(['a@b.com', 'bad', None], n),
+        'updated_at': pd.date_range('2024-01-01', periods=n, freq='h') + pd.Timedelta(days=start)
+    })
+
+def test_incremental_state_matches_full_table(tmp_path):
+    store = MetricStore(str(tmp_path / 'state'), max_segments=2)
+    path = tmp_path / 'data.csv'
+    df = pd.DataFrame()
+    for start in (0, 30, 60, 90):
+        # Cada ejecución ve el fichero con filas nuevas añadidas al final
+        df = pd.concat([df, _frame(start, 30)], ignore_index=True)
+        df.to_csv(path, index=False)
+        audit = incremental_audit(store, str(path), SCHEMA, RULES, chunksize=7)
+
+    full = load_data(str(path))
+    pd.testing.assert_frame_equal(audit.quality_metrics(), compute_quality_metrics(full, SCHEMA), check_dtype=False)
+    pd.testing.assert_frame_equal(audit.business_rules(), apply_business_rules(full, RULES), check_dtype=False)
+    assert audit.row_count == len(full)
+    # La compactación mantiene el número de segmentos acotado
+    assert len(store.manifest()['segments']) <= 2
+
+    # Un estado recargado desde disco da el mismo resultado
+    reloaded = store.load(SCHEMA, RULES)
+    pd.testing.assert_frame_equal(reloaded.quality_metrics(), audit.quality_metrics())
+
+def test_state_invalidated_by_new_rules_and_snapshot(tmp_path):
+    store = MetricStore(str(tmp_path / 'state'))
+    path = tmp_path / 'data.csv'
+    _frame(0, 20).to_csv(path, index=False)
+    incremental_audit(store, str(path), SCHEMA, RULES)
+    assert store.load(SCHEMA, RULES[:1]) is None
+
+    # Sin updated_at la entrada es una foto completa: reemplaza el estado
+    _frame(0, 20).drop(columns='updated_at').to_csv(path, index=False)
+    audit = incremental_audit(store, str(path), SCHEMA, RULES)
+    audit = incremental_audit(store, str(path), SCHEMA, RULES)
+    assert audit.row_count == 20
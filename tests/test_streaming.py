@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from scripts.load import load_data
+from scripts.metrics import compute_quality_metrics, compute_statistical_profile, validate_patterns
+from scripts.rules import apply_business_rules
+from scripts.streaming import audit_stream
+from scripts.sketches import KLLSketch
+
+SCHEMA = {
+    'id': {'type': 'integer'},
+    'zip': {'type': 'integer', 'pattern': r'^\d{5}$'},
+    'email': {'pattern': r'^\S+@\S+$'}
+}
+RULES = [
+    {'name': 'no_nulos', 'column': 'any', 'type': 'not_null'},
+    {'name': 'id_unico', 'column': 'id', 'type': 'unique'},
+    {'name': 'edad_rango', 'column': 'edad', 'type': 'range', 'min': 18, 'max': 99},
+    {'name': 'email_no_vacio', 'column': 'email', 'type': 'non_empty_string'}
+]
+
+def _write_csv(tmp_path, n):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'id': np.arange(n) % (n - 3),
+        'edad': rng.integers(0, 120, n),
+        'zip': rng.integers(10000, 99999, n),
+        'email': rng.choice(['a@b.com', 'bad', ' '], n),
+        'x': rng.normal(0, 1, n)
+    })
+    # Un nulo en el último chunk convierte 'zip' en float en la lectura completa
+    df.loc[n - 1, 'zip'] = None
+    path = tmp_path / 'data.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+def test_streaming_matches_in_memory(tmp_path):
+    path = _write_csv(tmp_path, 150)
+    df = load_data(path)
+    audit = audit_stream(load_data(path, chunksize=16), SCHEMA, RULES)
+
+    pd.testing.assert_frame_equal(audit.quality_metrics(), compute_quality_metrics(df, SCHEMA), check_dtype=False)
+    pd.testing.assert_frame_equal(audit.business_rules(), apply_business_rules(df, RULES), check_dtype=False)
+    pd.testing.assert_frame_equal(audit.pattern_validation(), validate_patterns(df, SCHEMA), check_dtype=False)
+    # Con menos de k valores por columna los cuantiles también son exactos
+    pd.testing.assert_frame_equal(audit.statistical_profile(), compute_statistical_profile(df), check_dtype=False)
+    assert audit.row_count == len(df)
+
+def test_streaming_quantiles_within_bound(tmp_path):
+    path = _write_csv(tmp_path, 20000)
+    audit = audit_stream(load_data(path, chunksize=1000), SCHEMA, RULES)
+    x = np.sort(load_data(path)['x'].to_numpy())
+    row = audit.statistical_profile().set_index('column').loc['x']
+    eps = KLLSketch.normalized_rank_error(200)
+    for q, col in [(10, 'pct10'), (50, 'median'), (90, 'pct90')]:
+        rank = np.searchsorted(x, row[col]) / len(x)
+        assert abs(rank - q / 100) <= eps + 0.01  # + redondeo a 2 decimales
+
+def test_streaming_text_column_switching_from_int(tmp_path):
+    # Los primeros chunks de 'code' parecen enteros y los últimos son texto:
+    # leída como str (type: string) conserva '08001' y '1' en todos los chunks
+    codes = [f'{i:05d}' for i in range(8000, 8250)] * 2 + ['1', '01'] * 40 + [f'A{i}' for i in range(20)]
+    path = tmp_path / 'codes.csv'
+    pd.DataFrame({'id': range(len(codes)), 'code': codes}).to_csv(path, index=False)
+    schema = {'code': {'type': 'string', 'pattern': r'^\d{5}$'}}
+    rules = [{'name': 'code_unico', 'column': 'code', 'type': 'unique'}]
+    df = load_data(str(path), schema=schema)
+    assert df['code'].iloc[0] == '08000'
+    for engine in ('pandas', 'pyarrow'):
+        audit = audit_stream(load_data(str(path), chunksize=100, engine=engine, schema=schema), schema, rules)
+        pd.testing.assert_frame_equal(audit.quality_metrics(), compute_quality_metrics(df, schema), check_dtype=False)
+        pd.testing.assert_frame_equal(audit.business_rules(), apply_business_rules(df, rules), check_dtype=False)
+        pd.testing.assert_frame_equal(audit.pattern_validation(), validate_patterns(df, schema), check_dtype=False)
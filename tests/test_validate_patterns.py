@@ -1,3 +1,5 @@
+import re
+import pytest
 import pandas as pd
 from scripts.rules import infer_schema
 from scripts.metrics import validate_patterns
@@ -19,3 +21,30 @@ def test_validate_patterns():
     assert row['n_matches'] == 2
     assert row['n_mismatches'] == 1
     assert row['pct_matches'] == round(2/3*100, 2)
+
+def test_patterns_follow_python_re_semantics():
+    # Unicode y '\n' final se evalúan como re.match aunque el motor sea RE2
+    values = ['12345', '１２３４５', '12345\n', ' 12345', None, 'abc'] * 50
+    df = pd.DataFrame({'zip': values, 'n': [1, 12345, 0, 99999, 7, 12345] * 50})
+    schema = {'zip': {'pattern': r'^\d{5}$'}, 'n': {'pattern': r'^\d{5}$'}}
+    pat_df = validate_patterns(df, schema).set_index('column')
+    assert pat_df.loc['zip', 'n_matches'] == 150
+    assert pat_df.loc['zip', 'n_mismatches'] == 100
+    assert pat_df.loc['n', 'n_matches'] == 150
+
+def test_patterns_not_supported_by_re2_fall_back():
+    df = pd.DataFrame({'code': ['ab', 'abab', 'ba']})
+    # Las referencias hacia atrás no existen en RE2
+    pat_df = validate_patterns(df, {'code': {'pattern': r'^(ab)\1$'}})
+    assert pat_df.iloc[0]['n_matches'] == 1
+
+# `re` avisa de que '[[' podría ser un conjunto anidado en el futuro
+@pytest.mark.filterwarnings('ignore::FutureWarning')
+def test_patterns_control_characters_and_posix_classes():
+    # \s de re incluye \x0b y \x1c-\x1f (RE2 no); [[:digit:]] sólo es una clase en RE2
+    values = ['abc', 'a\x0bb', 'a\x1cb', 'a\tb', '7', '[:', ':]'] * 10
+    df = pd.DataFrame({'s': values, 'posix': values})
+    schema = {'s': {'pattern': r'^\S*$'}, 'posix': {'pattern': r'[[:digit:]]'}}
+    pat_df = validate_patterns(df, schema).set_index('column')
+    assert pat_df.loc['s', 'n_matches'] == sum(bool(re.match(r'^\S*$', v)) for v in values)
+    assert pat_df.loc['posix', 'n_matches'] == sum(bool(re.match(r'[[:digit:]]', v)) for v in values)
@@ -0,0 +1,67 @@
+import io
+import numpy as np
+import pandas as pd
+from scripts.column_profile import build_profiles
+from scripts.metrics import compute_quality_metrics
+from scripts.rules import apply_business_rules
+from scripts.violations import ViolationIndex, build_violation_index, reservoir_sample
+
+SCHEMA = {
+    'edad': {'type': 'number'},
+    'email': {'type': 'string', 'pattern': r'^\S+@\S+$'},
+}
+RULES = [
+    {'name': 'edad_rango', 'column': 'edad', 'type': 'range', 'min': 18, 'max': 99},
+    {'name': 'email_no_nulo', 'column': 'email', 'type': 'not_null'},
+    {'name': 'email_unico', 'column': 'email', 'type': 'unique'},
+]
+
+def _frame():
+    return pd.DataFrame({
+        'edad': [25, 10, 150, 40, None, 18],
+        'email': ['a@b.com', 'malo', None, 'a@b.com', 'c@d.com', ' '],
+    })
+
+def test_index_matches_reports(tmp_path):
+    df = _frame()
+    profiles = build_profiles(df, SCHEMA)
+    mdf = compute_quality_metrics(df, SCHEMA, profiles)
+    rdf = apply_business_rules(df, RULES, SCHEMA, profiles)
+    index = build_violation_index(df, SCHEMA, RULES, profiles, mdf, rdf)
+
+    assert index.rows('rule:edad_rango:edad').tolist() == [1, 2]
+    assert index.rows('quality:null:email').tolist() == [2]
+    assert index.rows('quality:pattern_mismatch:email').tolist() == [1, 5]
+    assert index.rows('rule:email_unico:email').tolist() == [3]
+    # Sin violaciones: sin bitmap
+    assert 'quality:type_mismatch:edad' not in index.entries and index.count('quality:null:edad') == 1
+    assert 'quality:duplicate:email' not in index.entries
+
+    path = index.save(str(tmp_path / 'violations.npz'))
+    back = ViolationIndex.load(io.BytesIO(open(path, 'rb').read()))
+    assert back.summary().equals(index.summary())
+    assert back.rows('rule:edad_rango:edad', limit=1).tolist() == [1]
+
+    samples = index.samples(df, k=1)
+    assert set(samples['key']) == set(index.keys())
+    assert samples.set_index('key').loc['rule:edad_rango:edad', 'value'] in (10, 150)
+
+def test_large_bitmap_limit_and_labels():
+    n = 2_000_003
+    mask = np.zeros(n, dtype=bool)
+    mask[[3, 600_000, 1_999_999, n - 1]] = True
+    df = pd.DataFrame({'x': np.where(mask, np.nan, 1.0)}, index=np.arange(n) + 100)
+    index = build_violation_index(df, {}, [])
+    assert index.rows('quality:null:x').tolist() == [103, 600_100, 2_000_099, n + 99]
+    assert index.positions('quality:null:x', limit=2).tolist() == [3, 600_000]
+    assert set(index.sample('quality:null:x', k=2).tolist()) <= {103, 600_100, 2_000_099, n + 99}
+
+def test_reservoir_sample_is_uniform():
+    rng = np.random.default_rng(1)
+    hits = np.zeros(100)
+    for _ in range(2000):
+        chunks = [np.arange(0, 30), np.arange(30, 100)]
+        hits[reservoir_sample(chunks, 10, rng)] += 1
+    assert reservoir_sample([np.arange(3)], 10, rng).tolist() == [0, 1, 2]
+    # 2000 * 10/100 = 200 por elemento
+    assert hits.min() > 140 and hits.max() < 260